@@ -9,19 +9,83 @@ CONSTRAINTS:
 - Append-only logging
 - No signal modification
 - No retry logic
+- Each signal_id executed at most once (across cycles)
 """
 
 import os
 import json
-import requests
+import threading
+import http_client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+
+from log_store import SegmentedLogStore
+from rate_budget import EXECUTION, budget
+from structured_log import get_logger
+
+log = get_logger("auto_executor")
 
 # Configuration
 API_BASE = os.getenv("API_BASE", "https://signalgeniusai-production.up.railway.app")
-EXECUTION_LOG_FILE = "auto_execution_log.jsonl"  # Append-only
-DAILY_GATE_LOG_FILE = "daily_gate_log.jsonl"    # Append-only
+EXECUTION_LOG_FILE = "auto_execution_log.jsonl"  # Append-only, canonical (segments mirror it)
+DAILY_GATE_LOG_FILE = "daily_gate_log.jsonl"    # Append-only, canonical (segments mirror it)
 MAX_LATENCY_MS = 5000  # Maximum acceptable latency
+EXECUTION_WORKERS = int(os.getenv("EXECUTION_WORKERS", "4"))  # Assets executed in parallel
+MAX_EXECUTIONS_PER_ASSET_PER_DAY = int(os.getenv("MAX_EXECUTIONS_PER_ASSET_PER_DAY", "0"))  # 0 = unlimited
+SIGNAL_TTL_MINUTES = 90
+DEDUPE_WINDOW = timedelta(hours=24)  # Longer than the signal TTL, so older IDs can never revalidate
+
+# Daily-segmented, indexed read copies of the flat logs (logs/auto_execution, logs/daily_gate)
+execution_log_store = SegmentedLogStore("auto_execution", time_field="auto_order_time", legacy_file=EXECUTION_LOG_FILE)
+gate_log_store = SegmentedLogStore("daily_gate", time_field="timestamp", legacy_file=DAILY_GATE_LOG_FILE)
+
+class ExecutionLedger:
+    """
+    In-memory record of recent executions, seeded from the execution log.
+    Backs signal_id dedupe and the per-asset daily gates.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._signal_ids = set()
+        self._per_asset_day = defaultdict(int)  # (asset, date) -> executions
+    
+    def _load(self):
+        if self._loaded:
+            return
+        now = datetime.now(timezone.utc)
+        for record in execution_log_store.range(now - DEDUPE_WINDOW, now + timedelta(minutes=1)):
+            self._remember(record)
+        self._loaded = True
+    
+    def _remember(self, record: Dict[str, Any]):
+        self._signal_ids.add(record.get('signal_id'))
+        day = (record.get('auto_order_time') or '')[:10]
+        self._per_asset_day[(record.get('asset'), day)] += 1
+    
+    def claim(self, signal: Dict[str, Any]) -> Tuple[bool, str]:
+        """Atomically reserve a signal for execution; (ok, reason)"""
+        with self._lock:
+            self._load()
+            if signal.get('signal_id') in self._signal_ids:
+                return False, "Signal already executed (dedupe)"
+            asset = signal.get('asset')
+            if MAX_EXECUTIONS_PER_ASSET_PER_DAY and \
+                    self._per_asset_day[(asset, DailyExecutionGate.get_today_date())] >= MAX_EXECUTIONS_PER_ASSET_PER_DAY:
+                return False, f"Daily cap reached for {asset} ({MAX_EXECUTIONS_PER_ASSET_PER_DAY}/day)"
+            self._signal_ids.add(signal.get('signal_id'))
+            return True, "Signal valid, gate open, executing"
+    
+    def record(self, execution_result: Dict[str, Any]):
+        with self._lock:
+            self._remember(execution_result)
+
+
+ledger = ExecutionLedger()
+
 
 class DailyExecutionGate:
     """Enforces 1 execution per day constraint"""
@@ -32,12 +96,13 @@ class DailyExecutionGate:
         return datetime.now(timezone.utc).strftime("%Y-%m-%d")
     
     @staticmethod
-    def has_executed_today() -> bool:
+    def has_executed_today(asset: Optional[str] = None) -> bool:
         """Check if we've already executed today (DISABLED - Unlimited Flow)"""
+        # Global cap disabled; per-asset caps are enforced by ExecutionLedger.claim
         return False
     
     @staticmethod
-    def log_gate_decision(signal_id: str, decision: str, reason: str):
+    def log_gate_decision(signal_id: str, decision: str, reason: str, asset: Optional[str] = None):
         """Log daily gate decision (append-only)"""
         entry = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -46,9 +111,10 @@ class DailyExecutionGate:
             "reason": reason,
             "date": DailyExecutionGate.get_today_date()
         }
+        if asset:
+            entry["asset"] = asset
         
-        with open(DAILY_GATE_LOG_FILE, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
+        gate_log_store.append(entry)
 
 
 class SignalConsumer:
@@ -57,61 +123,100 @@ class SignalConsumer:
     @staticmethod
     def fetch_latest_signal() -> Optional[Dict[str, Any]]:
         """Fetch latest signal from backend (read-only)"""
+        if not budget.acquire("signal_api", priority=EXECUTION):
+            log.warning("⚠️ Signal API budget exhausted, skipping fetch")
+            return None
         try:
-            response = requests.get(f"{API_BASE}/signal/latest", timeout=10)
+            response = http_client.get(f"{API_BASE}/signal/latest", timeout=10)
             
             if response.status_code == 404:
-                print("ℹ️ No signal available (AWAITING_EXECUTION)")
+                log.info("ℹ️ No signal available (AWAITING_EXECUTION)")
                 return None
             
             if response.status_code == 403:
-                print("⚠️ Market closed")
+                log.info("⚠️ Market closed")
                 return None
             
             if response.ok:
                 signal = response.json()
-                print(f"✅ Fetched signal: {signal.get('signal_id')}")
+                log.info("✅ Fetched signal", signal_id=signal.get('signal_id'))
                 return signal
             
-            print(f"❌ API error: {response.status_code}")
+            log.error("❌ API error", status=response.status_code)
             return None
             
         except Exception as e:
-            print(f"❌ Failed to fetch signal: {e}")
+            log.error("❌ Failed to fetch signal", error=str(e))
             return None
     
     @staticmethod
-    def is_signal_valid(signal: Dict[str, Any]) -> bool:
-        """Check if signal is still valid (within TTL)"""
+    def fetch_active_signals() -> List[Dict[str, Any]]:
+        """Fetch every actionable signal in one call (read-only)"""
+        if not budget.acquire("signal_api", priority=EXECUTION):
+            log.warning("⚠️ Signal API budget exhausted, skipping fetch")
+            return []
+        try:
+            response = http_client.get(f"{API_BASE}/signal/active", timeout=10)
+            
+            if response.status_code == 404:
+                # Backend without the batch endpoint: fall back to the single signal
+                signal = SignalConsumer.fetch_latest_signal()
+                return [signal] if signal else []
+            
+            if response.ok:
+                signals = response.json().get("signals", [])
+                log.info("✅ Fetched active signals", count=len(signals))
+                return signals
+            
+            log.error("❌ API error", status=response.status_code)
+            return []
+            
+        except Exception as e:
+            log.error("❌ Failed to fetch signals", error=str(e))
+            return []
+    
+    @staticmethod
+    def validate_signals(signals: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Bulk validation against one clock reading; returns (valid, invalid)"""
+        now = datetime.now(timezone.utc)
+        valid, invalid = [], []
+        for signal in signals:
+            (valid if SignalConsumer.is_signal_valid(signal, now) else invalid).append(signal)
+        return valid, invalid
+    
+    @staticmethod
+    def is_signal_valid(signal: Dict[str, Any], now: Optional[datetime] = None,
+                        ttl_minutes: Optional[float] = None) -> bool:
+        """Check if signal is still valid (within TTL; ttl_minutes overrides it, e.g. in replays)"""
         if not signal:
             return False
         
         # Signal must have a valid structure
         if not signal.get('entry') or not signal.get('direction'):
-            print("⚠️ Signal missing core data (entry/direction)")
+            log.warning("⚠️ Signal missing core data (entry/direction)", signal_id=signal.get('signal_id'))
             return False
         
         # Check timestamp (signals should be fresh)
         signal_time = signal.get('executed_at') or signal.get('timestamp')
         if not signal_time:
-            print("⚠️ Signal missing timestamp")
+            log.warning("⚠️ Signal missing timestamp", signal_id=signal.get('signal_id'))
             return False
         
         try:
             sig_dt = datetime.fromisoformat(signal_time.replace('Z', '+00:00'))
-            now = datetime.now(timezone.utc)
+            now = now or datetime.now(timezone.utc)
             age_minutes = (now - sig_dt).total_seconds() / 60
             
             # Signal should be executed within reasonable time (e.g., 90 min TTL)
-            if age_minutes > 90:
-                print(f"⚠️ Signal expired (age: {age_minutes:.1f} min)")
+            if age_minutes > (SIGNAL_TTL_MINUTES if ttl_minutes is None else ttl_minutes):
+                log.debug("⚠️ Signal expired", signal_id=signal.get('signal_id'), age_minutes=round(age_minutes, 1))
                 return False
             
-            print(f"✅ Signal valid (age: {age_minutes:.1f} min)")
+            log.debug("✅ Signal valid", signal_id=signal.get('signal_id'), age_minutes=round(age_minutes, 1))
             return True
             
         except Exception as e:
-            print(f"⚠️ Error validating signal timestamp: {e}")
+            log.warning("⚠️ Error validating signal timestamp", signal_id=signal.get('signal_id'), error=str(e))
             return False
 
 
@@ -133,6 +238,7 @@ class ExecutionAdapter:
         # Simulate MT4 execution (replace with actual MT4 API call)
         execution_result = {
             "signal_id": signal['signal_id'],
+            "asset": signal.get('asset'),
             "signal_time": signal.get('executed_at') or signal.get('timestamp'),
             "auto_order_time": start_time.isoformat(),
             "signal_price": signal['entry'],
@@ -153,7 +259,7 @@ class ExecutionAdapter:
         
         # Validate latency
         if latency_ms > MAX_LATENCY_MS:
-            print(f"⚠️ High latency: {latency_ms}ms (max: {MAX_LATENCY_MS}ms)")
+            log.warning("⚠️ High latency", latency_ms=latency_ms, max_ms=MAX_LATENCY_MS)
             execution_result['status'] = 'EXECUTED_HIGH_LATENCY'
         
         return execution_result
@@ -161,72 +267,99 @@ class ExecutionAdapter:
     @staticmethod
     def log_execution(execution_result: Dict[str, Any]):
         """Append execution log (immutable)"""
-        with open(EXECUTION_LOG_FILE, 'a') as f:
-            f.write(json.dumps(execution_result) + '\n')
+        execution_log_store.append(execution_result)
+        ledger.record(execution_result)
         
-        print(f"📝 Logged execution: {execution_result['signal_id']}")
+        log.info("📝 Logged execution", signal_id=execution_result['signal_id'])
 
 
-def run_auto_v0():
+def _execute_asset(asset: str, signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Execute one asset's signals in order (assets run in parallel)"""
+    results = []
+    for signal in signals:
+        signal_id = signal.get('signal_id', 'UNKNOWN')
+        ok, reason = ledger.claim(signal)
+        if not ok:
+            DailyExecutionGate.log_gate_decision(signal_id, "SKIP", reason, asset)
+            continue
+        
+        # Log gate decision (EXECUTE)
+        DailyExecutionGate.log_gate_decision(signal_id, "EXECUTE", reason, asset)
+        
+        # Execute (stateless)
+        log.info("🚀 Executing signal", signal_id=signal_id, asset=asset)
+        execution_result = ExecutionAdapter.execute_to_mt4_demo(signal)
+        
+        # Log execution (append-only)
+        ExecutionAdapter.log_execution(execution_result)
+        results.append(execution_result)
+    return results
+
+
+def run_auto_v0() -> Dict[str, Any]:
     """
     Main AUTO v0 execution loop
     
     This function:
     1. Checks daily execution gate
-    2. Fetches signal (read-only)
-    3. Validates signal
-    4. Executes if all constraints pass
+    2. Fetches every actionable signal in one call (read-only)
+    3. Validates signals in bulk
+    4. Executes per asset in parallel, each signal_id at most once
     5. Logs everything (append-only)
+    
+    Returns a cycle summary (used by the scheduler to detect activity).
     """
-    print("=" * 60)
-    print("AUTO v0 - Execution Cycle")
-    print(f"Time: {datetime.now(timezone.utc).isoformat()}")
-    print("=" * 60)
+    log.info("AUTO v0 - Execution Cycle")
+    
+    cycle = {"fetched": 0, "valid": 0, "executed": 0, "signal_ids": []}
     
     # Step 1: Check daily gate
     if DailyExecutionGate.has_executed_today():
-        print("🚫 Daily execution cap reached (1/day)")
-        return
+        log.info("🚫 Daily execution cap reached (1/day)")
+        return cycle
     
-    # Step 2: Fetch signal (read-only)
-    signal = SignalConsumer.fetch_latest_signal()
-    if not signal:
+    # Step 2: Fetch signals (read-only)
+    signals = SignalConsumer.fetch_active_signals()
+    cycle["fetched"] = len(signals)
+    cycle["signal_ids"] = sorted(str(s.get('signal_id')) for s in signals)
+    if not signals:
         DailyExecutionGate.log_gate_decision(
             "N/A", 
             "SKIP", 
             "No signal available"
         )
-        return
+        return cycle
     
-    signal_id = signal.get('signal_id', 'UNKNOWN')
-    
-    # Step 3: Validate signal
-    if not SignalConsumer.is_signal_valid(signal):
+    # Step 3: Validate signals
+    valid, invalid = SignalConsumer.validate_signals(signals)
+    cycle["valid"] = len(valid)
+    for signal in invalid:
         DailyExecutionGate.log_gate_decision(
-            signal_id,
+            signal.get('signal_id', 'UNKNOWN'),
             "SKIP",
-            "Signal invalid or expired"
+            "Signal invalid or expired",
+            signal.get('asset')
         )
-        return
-    
-    # Step 4: Log gate decision (EXECUTE)
-    DailyExecutionGate.log_gate_decision(
-        signal_id,
-        "EXECUTE",
-        "Signal valid, gate open, executing"
-    )
     
-    # Step 5: Execute (stateless)
-    print(f"🚀 Executing signal: {signal_id}")
-    execution_result = ExecutionAdapter.execute_to_mt4_demo(signal)
+    # Step 4-6: Gate, execute and log, one worker per asset
+    by_asset = defaultdict(list)
+    for signal in valid:
+        by_asset[signal.get('asset', 'UNKNOWN')].append(signal)
     
-    # Step 6: Log execution (append-only)
-    ExecutionAdapter.log_execution(execution_result)
+    results = []
+    if by_asset:
+        with ThreadPoolExecutor(max_workers=min(EXECUTION_WORKERS, len(by_asset))) as pool:
+            for asset_results in pool.map(lambda item: _execute_asset(*item), by_asset.items()):
+                results.extend(asset_results)
+    cycle["executed"] = len(results)
     
-    print("=" * 60)
-    print(f"✅ AUTO v0 execution complete: {signal_id}")
-    print(f"Latency: {execution_result['latency_ms']}ms")
-    print("=" * 60)
+    log.info(
+        "✅ AUTO v0 cycle complete",
+        executed=len(results),
+        assets=len(by_asset),
+        latency_ms={result['signal_id']: result['latency_ms'] for result in results},
+    )
+    return cycle
 
 
 if __name__ == "__main__":
@@ -1,17 +1,44 @@
 """
 AUTO v0 Scheduler with Guardrails
-Polling mechanism: Every 60 seconds
+Polling mechanism: Adaptive (session-aware, budgeted, sleeps through market close)
 Execution gate: Max 1/day (enforced by auto_executor.py)
 """
 
 import os
+import random
 import time
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from typing import Optional
 from auto_executor import run_auto_v0
+from daily_aggregator import DailyLogAggregator
+from jsonl_writer import shared_writer
+
+from rate_budget import NORMAL, budget
+from signal_engine import is_market_open
+from structured_log import get_logger
+
+log = get_logger("auto_scheduler")
 
 # Polling config (Adjusted to stay within 800 req/day API limit)
-POLL_INTERVAL_SECONDS = 120  # 30 req/hr = 720 req/24h (Safe)
+POLL_INTERVAL_SECONDS = 120  # 30 req/hr = 720 req/24h (Safe) - pause/error fallback
+
+# Adaptive polling: fast where signals appear, never over the daily budget
+# (shared "signal_api" quota in rate_budget; planning uses the NORMAL share,
+# leaving the rest for execution-priority retries and other processes)
+MIN_POLL_SECONDS = 30
+MAX_POLL_SECONDS = 600
+IDLE_BACKOFF_FACTOR = 1.5         # Per unchanged cycle
+IDLE_BACKOFF_MAX_STEPS = 4
+POLL_JITTER_RATIO = 0.1
+
+# Base interval per UTC session
+SESSION_INTERVALS = (
+    (12, 16, 45),    # London/NY overlap (PEAK)
+    (7, 12, 90),     # London (HIGH)
+    (16, 21, 90),    # New York
+    (0, 24, 240),    # Asia / late NY (LOW)
+)
 
 # Guardrail 1: Kill Switch
 AUTO_V0_ENABLED = os.getenv("AUTO_V0_ENABLED", "true").lower() == "true"
@@ -19,68 +46,114 @@ AUTO_V0_ENABLED = os.getenv("AUTO_V0_ENABLED", "true").lower() == "true"
 # Configuration
 DAILY_SUMMARY_FILE = "daily_summary_log.jsonl"
 
+_aggregator = DailyLogAggregator()
+
 
-def log_daily_summary():
+def log_daily_summary(date: Optional[str] = None):
     """
     Generate daily summary from execution and gate logs
     Called at end of day or on demand
+    Counters are maintained incrementally (see daily_aggregator), so this
+    only reads log lines appended since the previous summary.
     """
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    today = date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
     
-    # Count executions
-    executions = 0
-    if os.path.exists("auto_execution_log.jsonl"):
-        with open("auto_execution_log.jsonl", 'r') as f:
-            for line in f:
-                if line.strip():
-                    log = json.loads(line)
-                    exec_time = datetime.fromisoformat(log['auto_order_time'].replace('Z', '+00:00'))
-                    if exec_time.strftime("%Y-%m-%d") == today:
-                        executions += 1
+    _aggregator.update()
+    summary = _aggregator.summary(today)
+    summary["timestamp"] = datetime.now(timezone.utc).isoformat()
     
-    # Count gate decisions
-    signals_seen = 0
-    skipped = 0
-    if os.path.exists("daily_gate_log.jsonl"):
-        with open("daily_gate_log.jsonl", 'r') as f:
-            for line in f:
-                if line.strip():
-                    log = json.loads(line)
-                    if log.get('date') == today:
-                        if log['decision'] == 'EXECUTE':
-                            signals_seen += 1
-                        elif log['decision'] == 'SKIP':
-                            skipped += 1
-                            if log.get('signal_id') != 'N/A':
-                                signals_seen += 1
+    # Append to daily summary log
+    shared_writer.append(DAILY_SUMMARY_FILE, summary)
     
-    # Check for violations (should always be 0 for AUTO v0)
-    violations = 0
-    if executions > 1:
-        violations += 1  # Violated 1/day constraint
+    log.info("📊 Daily Summary", **summary)
+    return summary
+
+
+def session_interval(now: datetime) -> float:
+    for start, end, interval in SESSION_INTERVALS:
+        if start <= now.hour < end:
+            return interval
+    return POLL_INTERVAL_SECONDS
+
+
+def next_market_open(now: datetime) -> datetime:
+    """Next Sunday 22:00 UTC (only meaningful while the market is closed)"""
+    days_ahead = (6 - now.weekday()) % 7
+    candidate = (now + timedelta(days=days_ahead)).replace(hour=22, minute=0, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=7)
+    return candidate
+
+
+class AdaptivePoller:
+    """
+    Decides the delay before the next cycle:
+    - market closed: sleep to the open (waking at UTC midnight for summaries)
+    - market open: session interval, stretched while nothing changes
+    - the remaining daily budget is spread over the rest of the day in
+      proportion to session weight, so peak hours keep the fast cadence
+    - jitter avoids lockstep with other pollers
+    """
     
-    summary = {
-        "date": today,
-        "signals_seen": signals_seen,
-        "executions": executions,
-        "skipped": skipped,
-        "violations": violations,
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
+    def __init__(self, request_budget=budget, provider: str = "signal_api"):
+        self.budget = request_budget
+        self.provider = provider
+        self.idle_cycles = 0
+        self._last_signature = None
     
-    # Append to daily summary log
-    with open(DAILY_SUMMARY_FILE, 'a') as f:
-        f.write(json.dumps(summary) + '\n')
+    def record_cycle(self, cycle: Optional[dict]):
+        cycle = cycle or {}
+        signature = tuple(cycle.get("signal_ids", []))
+        if cycle.get("executed") or signature != self._last_signature:
+            self.idle_cycles = 0
+        else:
+            self.idle_cycles += 1
+        self._last_signature = signature
     
-    print(f"📊 Daily Summary: {summary}")
-    return summary
+    def remaining_budget(self) -> float:
+        """Requests left today across every process sharing the quota"""
+        remaining = self.budget.remaining(self.provider, priority=NORMAL)["day"]["remaining"]
+        return float("inf") if remaining is None else remaining
+    
+    @staticmethod
+    def planned_requests(now: datetime) -> float:
+        """Requests the base schedule would spend from now until UTC midnight"""
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        planned, cursor = 0.0, now
+        while cursor < midnight:
+            slice_end = min(midnight, cursor.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+            if is_market_open(cursor):
+                planned += (slice_end - cursor).total_seconds() / session_interval(cursor)
+            cursor = slice_end
+        return planned
+    
+    def next_delay(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now(timezone.utc)
+        
+        if not is_market_open(now):
+            midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            wake = min(next_market_open(now), midnight)
+            return max(1.0, (wake - now).total_seconds() + 1)
+        
+        base = session_interval(now)
+        backoff = IDLE_BACKOFF_FACTOR ** min(self.idle_cycles, IDLE_BACKOFF_MAX_STEPS)
+        
+        remaining = self.remaining_budget()
+        if remaining <= 0:
+            midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            return max(1.0, (midnight - now).total_seconds() + 1)
+        
+        # Stretch every interval by the same factor if the plan would overspend
+        scale = max(1.0, self.planned_requests(now) / remaining)
+        delay = min(MAX_POLL_SECONDS, max(MIN_POLL_SECONDS, base * max(backoff, scale)))
+        return delay * random.uniform(1 - POLL_JITTER_RATIO, 1 + POLL_JITTER_RATIO)
 
 
 def check_kill_switch():
     """Guardrail 2: Check kill switch before each cycle"""
     enabled = os.getenv("AUTO_V0_ENABLED", "true").lower() == "true"
     if not enabled:
-        print("🛑 AUTO v0 DISABLED via kill switch (AUTO_V0_ENABLED=false)")
+        log.warning("🛑 AUTO v0 DISABLED via kill switch (AUTO_V0_ENABLED=false)")
         return False
     return True
 
@@ -88,39 +161,43 @@ def check_kill_switch():
 def scheduler_loop():
     """
     Main scheduler loop
-    Polls every POLL_INTERVAL_SECONDS
+    Polls on the AdaptivePoller cadence
     Gate enforcement happens inside auto_executor
     """
     # Guardrail: Check data feed configuration
     if not os.getenv("TWELVE_DATA_API_KEY"):
-        print("⚠️  DATA FEED NOT LOCAL: Continuing in Pure Consumption mode.")
+        log.warning("⚠️ DATA FEED NOT LOCAL: Continuing in Pure Consumption mode.")
     else:
-        print("✅ DATA FEED CONFIGURED: Twelve Data API key present.")
+        log.info("✅ DATA FEED CONFIGURED: Twelve Data API key present.")
     
-    print("=" * 60)
-    print("AUTO v0 Scheduler Started")
-    print(f"Poll Interval: {POLL_INTERVAL_SECONDS}s")
-    print(f"Kill Switch: AUTO_V0_ENABLED={AUTO_V0_ENABLED}")
-    print(f"Data Feed: Twelve Data API configured ✓")
-    print("=" * 60)
+    log.info(
+        "AUTO v0 Scheduler Started",
+        poll_seconds=f"{MIN_POLL_SECONDS}-{MAX_POLL_SECONDS}",
+        budget_left_today=AdaptivePoller().remaining_budget(),
+        auto_v0_enabled=AUTO_V0_ENABLED,
+    )
     
     cycle_count = 0
     last_summary_date = None
+    poller = AdaptivePoller()
     
     while True:
         try:
             # Guardrail 2: Check kill switch
             if not check_kill_switch():
-                print("⏸️ Scheduler paused. Set AUTO_V0_ENABLED=true to resume.")
+                log.info("⏸️ Scheduler paused. Set AUTO_V0_ENABLED=true to resume.")
                 time.sleep(POLL_INTERVAL_SECONDS)
                 continue
             
-            cycle_count += 1
-            print(f"\n🔄 Cycle #{cycle_count} - {datetime.now(timezone.utc).isoformat()}")
-            
-            # Run AUTO v0 execution cycle
-            # Gate enforcement (1/day) happens inside run_auto_v0()
-            run_auto_v0()
+            if is_market_open():
+                cycle_count += 1
+                log.info("🔄 Cycle", cycle=cycle_count)
+                
+                # Run AUTO v0 execution cycle
+                # Gate enforcement (1/day) happens inside run_auto_v0()
+                poller.record_cycle(run_auto_v0())
+            else:
+                log.info("🌑 Market closed")
             
             # Guardrail 3: Daily summary (once per day)
             current_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
@@ -129,26 +206,25 @@ def scheduler_loop():
                 last_summary_date = current_date
             
             # Wait for next poll
-            print(f"⏳ Next poll in {POLL_INTERVAL_SECONDS}s...")
-            time.sleep(POLL_INTERVAL_SECONDS)
+            delay = poller.next_delay()
+            log.info("⏳ Next poll", delay_seconds=round(delay), idle_cycles=poller.idle_cycles)
+            time.sleep(delay)
             
         except KeyboardInterrupt:
-            print("\n🛑 Scheduler stopped by user (Ctrl+C)")
+            log.info("🛑 Scheduler stopped by user (Ctrl+C)")
             # Final summary before exit
             log_daily_summary()
             break
             
         except Exception as e:
-            print(f"❌ Scheduler error: {e}")
-            print(f"⏳ Retrying in {POLL_INTERVAL_SECONDS}s...")
+            log.error("❌ Scheduler error", error=str(e), retry_in_seconds=POLL_INTERVAL_SECONDS)
             time.sleep(POLL_INTERVAL_SECONDS)
 
 
 if __name__ == "__main__":
     # Guardrail 1: Check kill switch at startup
     if not AUTO_V0_ENABLED:
-        print("🛑 AUTO v0 is DISABLED")
-        print("Set environment variable: AUTO_V0_ENABLED=true to enable")
+        log.warning("🛑 AUTO v0 is DISABLED. Set environment variable: AUTO_V0_ENABLED=true to enable")
         exit(0)
     
     # Start scheduler
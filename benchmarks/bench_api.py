@@ -0,0 +1,40 @@
+"""FastAPI endpoints through an in-process client (lifespan included)"""
+from benchmarks.harness import benchmark
+
+_client = None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        from fastapi.testclient import TestClient
+        import main
+        _client = TestClient(main.app)
+        _client.__enter__()  # Runs the lifespan (queue workers, pollers)
+    return _client
+
+
+def _register(name: str, method: str, path: str, **kwargs):
+    @benchmark(f"api.{name}")
+    def _bench():
+        client = _get_client()
+        call = getattr(client, method)
+        return lambda: call(path, **kwargs)
+
+
+_register("health", "get", "/health")
+_register("signal_latest", "get", "/signal/latest")
+_register("signal_active", "get", "/signal/active")
+_register("signal_history[limit=50]", "get", "/signal", params={"limit": 50})
+_register("notify", "post", "/api/v1/signal/notify", json={
+    "signal": {"id": 1, "asset": "EUR/USD", "direction": "BUY", "entry": 1.08, "tp": 1.0815, "sl": 1.0785},
+    "status": "TP_HIT",
+    "price": 1.0816,
+})
+
+
+def close():
+    global _client
+    if _client is not None:
+        _client.__exit__(None, None, None)
+        _client = None
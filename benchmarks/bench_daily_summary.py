@@ -0,0 +1,72 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.harness import benchmark
+
+SYNTHETIC_DAYS = 120
+GATE_RECORDS_PER_DAY = 60
+
+
+def _write_synthetic_logs():
+    """Multi-month execution and gate segments in the store layout"""
+    from auto_executor import execution_log_store, gate_log_store
+    os.makedirs(execution_log_store.dir, exist_ok=True)
+    os.makedirs(gate_log_store.dir, exist_ok=True)
+    start = datetime.now(timezone.utc) - timedelta(days=SYNTHETIC_DAYS)
+    for d in range(SYNTHETIC_DAYS):
+        day = start + timedelta(days=d)
+        date = day.strftime("%Y-%m-%d")
+        with open(os.path.join(gate_log_store.dir, f"{date}.jsonl"), "w") as f:
+            for i in range(GATE_RECORDS_PER_DAY):
+                f.write(json.dumps({
+                    "timestamp": (day + timedelta(minutes=2 * i)).isoformat(),
+                    "date": date,
+                    "signal_id": f"sig-{d}-{i}" if i % 3 else "N/A",
+                    "decision": "EXECUTE" if i == 0 else "SKIP",
+                    "reason": "bench",
+                }) + "\n")
+        with open(os.path.join(execution_log_store.dir, f"{date}.jsonl"), "w") as f:
+            f.write(json.dumps({
+                "signal_id": f"sig-{d}-0",
+                "asset": "EUR/USD",
+                "auto_order_time": (day + timedelta(hours=9)).isoformat(),
+                "status": "EXECUTED",
+            }) + "\n")
+
+
+@benchmark(f"daily_summary.full_rebuild[{SYNTHETIC_DAYS}d]")
+def bench_full_rebuild():
+    from daily_aggregator import DailyLogAggregator
+    _write_synthetic_logs()
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def op():
+        aggregator = DailyLogAggregator(checkpoint_file="bench_checkpoint_cold.json")
+        aggregator.files, aggregator.days = {}, {}
+        aggregator.update()
+        return aggregator.summary(today)
+    return op
+
+
+@benchmark(f"daily_summary.log_daily_summary[incremental,{SYNTHETIC_DAYS}d]")
+def bench_incremental():
+    from auto_executor import DailyExecutionGate
+    from auto_scheduler import log_daily_summary
+    _write_synthetic_logs()
+    log_daily_summary()  # Prime the checkpoint
+
+    def op():
+        DailyExecutionGate.log_gate_decision("bench", "SKIP", "bench")
+        return log_daily_summary()
+    return op
+
+
+@benchmark(f"daily_summary.recompute_day[{SYNTHETIC_DAYS}d]")
+def bench_recompute():
+    from daily_aggregator import DailyLogAggregator
+    _write_synthetic_logs()
+    aggregator = DailyLogAggregator(checkpoint_file="bench_checkpoint_recompute.json")
+    aggregator.update()
+    day = (datetime.now(timezone.utc) - timedelta(days=SYNTHETIC_DAYS // 2)).strftime("%Y-%m-%d")
+    return lambda: aggregator.recompute_day(day)
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+
+from benchmarks.harness import benchmark
+from telegram_formatter import build_message_payload, format_signal_message
+
+STATUSES = ("ACTIVE", "EXECUTED", "AWAITING_EXECUTION", "MARKET_CLOSED",
+            "ENTRY_HIT", "TP_HIT", "SL_HIT", "EXPIRED")
+
+
+def _signal(status: str):
+    return {
+        "signal_id": "bench-001",
+        "status": status,
+        "asset": "EUR/USD",
+        "direction": "BUY",
+        "entry": 1.08123,
+        "tp": 1.08273,
+        "sl": 1.07973,
+        "confidence": 96,
+        "strength": "(HIGH)",
+        "strategy": "Quantix Core [Hybrid]",
+        "validity": 90,
+        "validity_passed": 12,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "executed_at": datetime.now(timezone.utc).isoformat(),
+        "current_price": 1.08201,
+    }
+
+
+def _register(status: str):
+    @benchmark(f"format_signal_message[{status}]")
+    def _bench():
+        signal = _signal(status)
+        return lambda: format_signal_message(signal)
+
+
+for _status in STATUSES:
+    _register(_status)
+
+
+@benchmark("build_message_payload")
+def bench_payload():
+    message = format_signal_message(_signal("ACTIVE"))
+    return lambda: build_message_payload(12345, message)
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.harness import benchmark
+from benchmarks.stubs import make_rows
+
+
+@benchmark("signal_engine.parse_supabase_row")
+def bench_parse_row():
+    from signal_engine import signal_from_supabase_row
+    row = make_rows(1)[0]
+    return lambda: signal_from_supabase_row(row)
+
+
+@benchmark("signal_engine.consume_ai_core_signal[stub]")
+def bench_consume():
+    from signal_engine import consume_ai_core_signal
+    return consume_ai_core_signal
+
+
+@benchmark("signal_engine.get_latest_signal_safe[cached]")
+def bench_cached_signal():
+    from signal_engine import get_latest_signal_safe
+    get_latest_signal_safe()
+    return get_latest_signal_safe
+
+
+@benchmark("auto_executor.is_signal_valid")
+def bench_is_signal_valid():
+    from auto_executor import SignalConsumer
+    signal = {
+        "entry": 1.08,
+        "direction": "BUY",
+        "timestamp": (datetime.now(timezone.utc) - timedelta(minutes=20)).isoformat(),
+    }
+    return lambda: SignalConsumer.is_signal_valid(signal)
+
+
+@benchmark("auto_executor.validate_signals[20]")
+def bench_validate_signals():
+    from auto_executor import SignalConsumer
+    from signal_engine import signal_from_supabase_row
+    signals = [signal_from_supabase_row(row) for row in make_rows(20)]
+    return lambda: SignalConsumer.validate_signals(signals)
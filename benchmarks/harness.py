@@ -0,0 +1,47 @@
+"""
+Benchmark registry and timer (timeit-style autorange, median of repeats)
+"""
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+REGISTRY: List[Tuple[str, Callable]] = []
+
+
+def benchmark(name: str):
+    """
+    Register a benchmark. The decorated function does the setup and returns
+    the operation to time (or (operation, teardown)).
+    """
+    def register(fn: Callable) -> Callable:
+        REGISTRY.append((name, fn))
+        return fn
+    return register
+
+
+def measure(op: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> Dict[str, Any]:
+    """Calibrate loops so one repeat takes >= min_time, then time `repeat` runs"""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        samples.append((time.perf_counter() - started) / number)
+
+    return {
+        "loops": number,
+        "repeat": repeat,
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "min_us": round(min(samples) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(samples) * 1e6, 3) if len(samples) > 1 else 0.0,
+    }
@@ -0,0 +1,151 @@
+"""
+Benchmark runner for the Python hot paths.
+
+Upstreams (Supabase, AI Core, Telegram) are replaced by a local stub server
+and every file the code writes lands in a throwaway working directory.
+Results are stored per commit in benchmarks/results/<commit>.json and
+compared against the previous result to surface regressions.
+
+Usage:
+    python benchmarks/run.py                      # run all, compare with last result
+    python benchmarks/run.py --filter api.        # subset by name
+    python benchmarks/run.py --compare 2a4cbba    # compare with a given commit
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+BENCH_MODULES = ("bench_formatter", "bench_signal_engine", "bench_daily_summary", "bench_api")
+REGRESSION_THRESHOLD = 1.25  # median slower by more than 25%
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.check_output(["git", *args], cwd=REPO_ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return ""
+
+
+def _commit_id() -> str:
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    return f"{commit}-dirty" if _git("status", "--porcelain", "--untracked-files=no") else commit
+
+
+def _prepare_environment(stub_url: str, workdir: str):
+    """Point every upstream at the stub before any repo module is imported"""
+    os.environ.update({
+        "SUPABASE_URL": stub_url,
+        "SUPABASE_KEY": "bench",
+        "TELEGRAM_BOT_TOKEN": "bench",
+        "TELEGRAM_CHAT_ID": "1",
+        "TELEGRAM_API_BASE": stub_url,
+        "RATE_BUDGET_DB": os.path.join(workdir, "rate_budget.db"),
+        "LOG_FSYNC_POLICY": "interval",
+        "SIGNAL_WATCHER_NOTIFY": "false",
+        "LOG_LEVEL": "WARNING",
+    })
+    os.chdir(workdir)
+
+
+def _load_previous(commit: str, compare: str = None):
+    if compare:
+        path = os.path.join(RESULTS_DIR, f"{compare}.json")
+        return json.load(open(path)) if os.path.exists(path) else None
+    candidates = [p for p in glob.glob(os.path.join(RESULTS_DIR, "*.json"))
+                  if os.path.basename(p) != f"{commit}.json"]
+    if not candidates:
+        return None
+    with open(max(candidates, key=os.path.getmtime)) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the microbenchmark suite")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per repeat (calibrated)")
+    parser.add_argument("--compare", help="Commit id of the baseline result")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    from benchmarks.stubs import StubServer
+    stub = StubServer().start()
+    workdir = tempfile.mkdtemp(prefix="quantix-bench-")
+    _prepare_environment(stub.url, workdir)
+
+    import signal_engine
+    import main as api
+    signal_engine.AI_CORE_API = f"{stub.url}/api/v1/active"
+    api.AI_CORE_SIGNALS_API = f"{stub.url}/api/v1/signals"
+
+    from benchmarks.harness import REGISTRY, measure
+    for module in BENCH_MODULES:
+        __import__(f"benchmarks.{module}")
+
+    commit = _commit_id()
+    results = {}
+    devnull = open(os.devnull, "w")
+    print(f"⏱️ Benchmarks @ {commit} (workdir {workdir})")
+    for name, setup in REGISTRY:
+        if args.filter not in name:
+            continue
+        with contextlib.redirect_stdout(devnull):
+            prepared = setup()
+            op, teardown = prepared if isinstance(prepared, tuple) else (prepared, None)
+            results[name] = measure(op, repeat=args.repeat, min_time=args.min_time)
+            if teardown:
+                teardown()
+        print(f"  {name:<60} {results[name]['median_us']:>12.1f} us")
+
+    from benchmarks import bench_api
+    with contextlib.redirect_stdout(devnull):
+        bench_api.close()
+    stub.stop()
+
+    previous = _load_previous(commit, args.compare)
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    regressions = []
+    if previous:
+        print(f"\n📊 Compared with {previous['commit']}:")
+        for name, result in results.items():
+            base = previous["results"].get(name)
+            if not base:
+                continue
+            ratio = result["median_us"] / base["median_us"] if base["median_us"] else 1.0
+            marker = "🔴" if ratio > REGRESSION_THRESHOLD else ("🟢" if ratio < 1 / REGRESSION_THRESHOLD else "  ")
+            print(f"  {marker} {name:<58} x{ratio:.2f}")
+            if ratio > REGRESSION_THRESHOLD:
+                regressions.append(name)
+        report["baseline"] = previous["commit"]
+        report["regressions"] = regressions
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(os.path.join(RESULTS_DIR, f"{commit}.json"), "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    started = time.time()
+    code = main(sys.argv[1:])
+    print(f"\n✅ Done in {time.time() - started:.1f}s")
+    sys.exit(code)
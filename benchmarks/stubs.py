@@ -0,0 +1,91 @@
+"""
+Local upstream stubs for benchmarks: Supabase REST, Quantix AI Core and the
+Telegram Bot API on one loopback HTTP server, so timings measure our code
+and not the network.
+"""
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ASSETS = ("EUR/USD", "GBP/USD", "USD/JPY", "AUD/USD")
+STATES = ("PUBLISHED", "ENTRY_HIT", "TP_HIT", "SL_HIT", "EXPIRED")
+
+
+def make_rows(n: int = 200):
+    """Synthetic fx_signals rows, newest first"""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(n):
+        entry = 1.08 + (i % 50) * 0.0001
+        buy = i % 2 == 0
+        rows.append({
+            "id": n - i,
+            "asset": ASSETS[i % len(ASSETS)],
+            "timeframe": "M15",
+            "direction": "BUY" if buy else "SELL",
+            "status": STATES[i % len(STATES)],
+            "state": STATES[i % len(STATES)],
+            "entry_low": entry,
+            "tp": entry + (0.0015 if buy else -0.0015),
+            "sl": entry - (0.0015 if buy else -0.0015),
+            "ai_confidence": 0.75 + (i % 20) / 100,
+            "generated_at": (now - timedelta(minutes=5 * i)).isoformat(),
+            "strategy": "Quantix Core [Hybrid]",
+        })
+    return rows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    rows = make_rows()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        limit = int(query.get("limit", ["50"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        rows = self.rows
+        if "status" in query and query["status"][0].startswith("in.("):
+            wanted = set(query["status"][0][4:-1].split(","))
+            rows = [r for r in rows if r["status"] in wanted]
+        if url.path == "/rest/v1/fx_signals":
+            self._send(rows[offset:offset + limit])
+        elif url.path in ("/api/v1/active", "/api/v1/signals"):
+            self._send(rows[offset:offset + limit])
+        else:
+            self._send({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if self.path.endswith("/sendMessage"):
+            self._send({"ok": True, "result": {"message_id": 1}})
+        else:
+            self._send({"error": "not found"}, 404)
+
+
+class StubServer:
+    def __init__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
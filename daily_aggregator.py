@@ -0,0 +1,174 @@
+"""
+Incremental Daily Summary Aggregator
+Keeps per-date counters over the append-only execution and gate logs.
+Each update reads only the bytes appended since the last checkpoint, so a
+daily summary costs O(new lines) instead of a full rescan of history.
+Any day can still be recomputed from the raw logs on demand.
+"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from auto_executor import execution_log_store, gate_log_store
+from jsonl_writer import atomic_write_json
+from log_store import LEGACY_SEGMENT, SegmentedLogStore
+from runtime_paths import data_path, prepare
+from structured_log import get_logger
+
+log = get_logger("daily_aggregator")
+
+CHECKPOINT_FILE = os.getenv("DAILY_SUMMARY_CHECKPOINT_FILE") or data_path("daily_summary_checkpoint.json")
+COUNTER_FIELDS = ("signals_seen", "executions", "skipped")
+
+
+def _empty_counters() -> Dict[str, int]:
+    return {field: 0 for field in COUNTER_FIELDS}
+
+
+def _execution_date(record: Dict[str, Any]) -> str:
+    exec_time = datetime.fromisoformat(record['auto_order_time'].replace('Z', '+00:00'))
+    return exec_time.strftime("%Y-%m-%d")
+
+
+def _apply_execution(days: Dict[str, Dict[str, int]], record: Dict[str, Any]):
+    days.setdefault(_execution_date(record), _empty_counters())["executions"] += 1
+
+
+def _apply_gate(days: Dict[str, Dict[str, int]], record: Dict[str, Any]):
+    date = record.get('date')
+    if not date:
+        return
+    counters = days.setdefault(date, _empty_counters())
+    if record['decision'] == 'EXECUTE':
+        counters["signals_seen"] += 1
+    elif record['decision'] == 'SKIP':
+        counters["skipped"] += 1
+        if record.get('signal_id') != 'N/A':
+            counters["signals_seen"] += 1
+
+
+class DailyLogAggregator:
+    """Byte-offset checkpointed counters over the segmented JSONL logs"""
+
+    SOURCES = (
+        (execution_log_store, _apply_execution),
+        (gate_log_store, _apply_gate),
+    )
+
+    def __init__(self, checkpoint_file: str = CHECKPOINT_FILE):
+        self.checkpoint_file = checkpoint_file
+        self.files: Dict[str, Dict[str, int]] = {}
+        self.days: Dict[str, Dict[str, int]] = {}
+        self.malformed = 0
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.checkpoint_file):
+                with open(self.checkpoint_file, 'r') as f:
+                    state = json.load(f)
+                self.files = state.get("files", {})
+                self.days = state.get("days", {})
+                self.malformed = state.get("malformed", 0)
+        except Exception as e:
+            log.warning("⚠️ Checkpoint unreadable, rebuilding from logs", error=str(e))
+            self.files, self.days, self.malformed = {}, {}, 0
+
+    def _save(self):
+        atomic_write_json(prepare(self.checkpoint_file), {"files": self.files, "days": self.days, "malformed": self.malformed})
+
+    @staticmethod
+    def _consume(path: str, apply, start: int, days: Dict[str, Dict[str, int]], end: Optional[int] = None):
+        """Apply complete lines in [start, end); returns (new offset, malformed lines)"""
+        offset, malformed = start, 0
+        with SegmentedLogStore.open_segment(path) as f:
+            f.seek(start)
+            try:
+                for raw in f:
+                    if not raw.endswith(b'\n') or (end is not None and offset + len(raw) > end):
+                        break  # Partial line still being written; pick it up next time
+                    offset += len(raw)
+                    line = raw.strip()
+                    if not line:
+                        continue
+                    try:
+                        apply(days, json.loads(line))
+                    except Exception:
+                        malformed += 1
+            except EOFError:
+                pass  # gzip member still being appended (late record); resume from offset
+        return offset, malformed
+
+    def update(self) -> int:
+        """Fold newly appended log lines into the counters; returns bytes read"""
+        read = 0
+        for store, apply in self.SOURCES:
+            for segment, path, sealed in store.segment_files():
+                key = f"{store.name}/{segment}"
+                cursor = self.files.get(key)
+                start = cursor.get("offset", 0) if cursor else 0
+
+                st = os.stat(path)
+                if sealed:
+                    # A compressed segment only changes when a late record adds a gzip member
+                    if cursor and cursor.get("sealed") and cursor.get("size") == st.st_size:
+                        continue
+                    end, malformed = self._consume(path, apply, start, self.days)
+                    self.malformed += malformed
+                    read += end - start
+                    self.files[key] = {"offset": end, "sealed": True, "size": st.st_size}
+                    continue
+
+                if cursor and (cursor.get("inode") != st.st_ino or st.st_size < start):
+                    # File replaced or truncated: offsets are meaningless, rebuild everything
+                    log.warning("⚠️ Log was rotated or truncated, rebuilding daily counters", path=path)
+                    self.files, self.days = {}, {}
+                    return self.update()
+
+                # The flat file keeps growing, but only its pre-mirroring bytes are the legacy segment
+                limit = store.legacy_end() if segment == LEGACY_SEGMENT else None
+                if min(st.st_size, limit if limit is not None else st.st_size) > start:
+                    end, malformed = self._consume(path, apply, start, self.days, end=limit)
+                    self.malformed += malformed
+                    read += end - start
+                    start = end
+                self.files[key] = {"offset": start, "inode": st.st_ino}
+
+        if read:
+            self._save()
+        return read
+
+    def summary(self, date: str) -> Dict[str, Any]:
+        counters = dict(self.days.get(date) or _empty_counters())
+        # Violations (should always be 0 for AUTO v0): more than 1 execution/day
+        counters["violations"] = 1 if counters["executions"] > 1 else 0
+        return {"date": date, **counters}
+
+    def recompute_day(self, date: str) -> Dict[str, Any]:
+        """Full rescan for one historical day; replaces its stored counters"""
+        self.update()
+        days: Dict[str, Dict[str, int]] = {}
+        for store, apply in self.SOURCES:
+            for segment, path, _ in store.segment_files():
+                # Only the legacy file and that day's segment can hold its records
+                if segment not in (LEGACY_SEGMENT, date):
+                    continue
+                cursor = self.files.get(f"{store.name}/{segment}")
+                if cursor:
+                    # Stop at the checkpoint so later updates do not double count
+                    self._consume(path, apply, 0, days, end=cursor["offset"])
+        self.days[date] = days.get(date) or _empty_counters()
+        self._save()
+        return self.summary(date)
+
+
+if __name__ == "__main__":
+    aggregator = DailyLogAggregator()
+    if len(sys.argv) > 2 and sys.argv[1] == "--recompute":
+        print(json.dumps(aggregator.recompute_day(sys.argv[2]), indent=2))
+    else:
+        aggregator.update()
+        date = sys.argv[1] if len(sys.argv) > 1 else datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        print(json.dumps(aggregator.summary(date), indent=2))
@@ -1,113 +1,278 @@
 """
 Data Feed Health Monitor
 Tracks the health of external data providers (Twelve Data)
+
+- FeedProber runs inside the API as a background task: it probes each
+  provider on an interval and keeps rolling windows of probe latency,
+  errors and price freshness per provider
+- /data-feed/health is served from memory; data_feed_health.json is only
+  a periodic snapshot (and what the one-shot CLI below writes)
+- Probes spend the HEALTH share of the request budget, never execution's
 """
+import asyncio
 import os
 import json
-import requests
+import time
+import http_client
+from collections import deque
+from jsonl_writer import atomic_write_json
+from rate_budget import HEALTH, budget
+from structured_log import get_logger
 from datetime import datetime, timezone
-from typing import Dict, Any
+from typing import Any, Deque, Dict, Optional, Tuple
+
+log = get_logger("data_feed_monitor")
 
 DATA_FEED_HEALTH_FILE = "data_feed_health.json"
+DATA_FEED_PROBE_SECONDS = float(os.getenv("DATA_FEED_PROBE_SECONDS", "300"))  # 288 probes/day fits the HEALTH share
+DATA_FEED_SNAPSHOT_SECONDS = float(os.getenv("DATA_FEED_SNAPSHOT_SECONDS", "300"))
+DATA_FEED_WINDOW = int(os.getenv("DATA_FEED_WINDOW", "100"))  # probes kept per provider
+DATA_FEED_STALE_SECONDS = float(os.getenv("DATA_FEED_STALE_SECONDS", "900"))  # newest price older than this = stale
+DATA_FEED_FAILURES_DOWN = 3  # consecutive failed probes before a provider is reported down
+
+PROBE_SYMBOL = "EUR/USD"
+TWELVE_DATA_PRICE_API = "https://api.twelvedata.com/price"
+
+
+def _result(status: str, **fields) -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "provider": "twelve_data",
+        "status": status,
+        **fields,
+    }
+
+
+def _interpret(status_code: int, data: Any) -> Dict[str, Any]:
+    if status_code != 200:
+        return _result("error", reason=f"HTTP {status_code}")
+    if isinstance(data, dict) and "price" in data:
+        return _result("ok", last_price=float(data["price"]), symbol=PROBE_SYMBOL)
+    return _result("error", reason=f"No price in response: {data}")
+
+
+def _preflight() -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """(api_key, None) if a probe may go out, else (None, result to record)"""
+    api_key = os.getenv("TWELVE_DATA_API_KEY")
+    if not api_key:
+        return None, _result("error", reason="API key not configured", configured=False)
+    # Probes only use the health share of the quota, never execution's
+    if not budget.acquire("twelve_data", priority=HEALTH):
+        return None, _result(
+            "throttled",
+            reason="Request budget reserved for execution",
+            budget=budget.remaining("twelve_data", priority=HEALTH),
+        )
+    return api_key, None
+
 
 class DataFeedMonitor:
     """Monitor external data feed health"""
-    
+
     @staticmethod
     def check_twelve_data() -> Dict[str, Any]:
         """
         Check Twelve Data API health
         Returns health status with timestamp
         """
-        api_key = os.getenv("TWELVE_DATA_API_KEY")
-        
-        if not api_key:
-            return {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "provider": "twelve_data",
-                "status": "error",
-                "reason": "API key not configured"
-            }
-        
+        api_key, skipped = _preflight()
+        if skipped:
+            return skipped
         try:
-            response = requests.get(
-                "https://api.twelvedata.com/price",
-                params={
-                    "symbol": "EUR/USD",
-                    "apikey": api_key
-                },
-                timeout=10
+            response = http_client.get(
+                TWELVE_DATA_PRICE_API, params={"symbol": PROBE_SYMBOL, "apikey": api_key}, timeout=10
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if "price" in data:
-                    return {
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "provider": "twelve_data",
-                        "status": "ok",
-                        "last_price": float(data["price"]),
-                        "symbol": "EUR/USD"
-                    }
-                else:
-                    return {
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "provider": "twelve_data",
-                        "status": "error",
-                        "reason": f"No price in response: {data}"
-                    }
-            else:
-                return {
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "provider": "twelve_data",
-                    "status": "error",
-                    "reason": f"HTTP {response.status_code}"
-                }
-                
+            return _interpret(response.status_code, response.json() if response.status_code == 200 else None)
         except Exception as e:
-            return {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "provider": "twelve_data",
-                "status": "error",
-                "reason": str(e)
-            }
-    
+            return _result("error", reason=str(e))
+
+    @staticmethod
+    async def check_twelve_data_async() -> Dict[str, Any]:
+        """Same probe on the shared async pool (used by the in-process prober)"""
+        # The budget check is a SQLite transaction: keep it off the event loop
+        api_key, skipped = await asyncio.to_thread(_preflight)
+        if skipped:
+            return skipped
+        try:
+            response = await http_client.aget(
+                TWELVE_DATA_PRICE_API, params={"symbol": PROBE_SYMBOL, "apikey": api_key}, timeout=10
+            )
+            return _interpret(response.status_code, response.json() if response.status_code == 200 else None)
+        except Exception as e:
+            return _result("error", reason=str(e))
+
     @staticmethod
     def save_health_status(status: Dict[str, Any]):
         """Save health status to file"""
-        with open(DATA_FEED_HEALTH_FILE, 'w') as f:
-            json.dump(status, f, indent=2)
-    
+        atomic_write_json(DATA_FEED_HEALTH_FILE, status, indent=2)
+
     @staticmethod
     def get_health_status() -> Dict[str, Any]:
-        """Get last saved health status"""
+        """Current health: live prober state if it is running here, else the last saved snapshot"""
+        if feed_prober.started:
+            return feed_prober.snapshot()
         try:
             if os.path.exists(DATA_FEED_HEALTH_FILE):
                 with open(DATA_FEED_HEALTH_FILE, 'r') as f:
                     return json.load(f)
         except Exception:
             pass
-        
-        return {
-            "timestamp": None,
-            "provider": "twelve_data",
-            "status": "unknown",
-            "reason": "No health check performed yet"
-        }
-    
+
+        return _result("unknown", timestamp=None, reason="No health check performed yet")
+
     @staticmethod
     def run_health_check():
         """Run health check and save result"""
         status = DataFeedMonitor.check_twelve_data()
         DataFeedMonitor.save_health_status(status)
-        
-        # Print status
+
         if status["status"] == "ok":
-            print(f"✅ Data feed: ACTIVE (Price: {status.get('last_price')})")
+            log.info("✅ Data feed: ACTIVE", price=status.get("last_price"))
         else:
-            print(f"❌ Data feed: INACTIVE ({status.get('reason')})")
-        
+            log.warning("❌ Data feed: INACTIVE", reason=status.get("reason"))
+
         return status
 
+
+class ProviderHealth:
+    """Rolling probe window for one provider"""
+
+    def __init__(self, name: str, window: int = DATA_FEED_WINDOW):
+        self.name = name
+        self.probes: Deque[Tuple[float, Optional[float], bool]] = deque(maxlen=window)  # (at, latency, ok)
+        self.consecutive_failures = 0
+        self.configured = True
+        self.throttled = 0
+        self.last: Optional[Dict[str, Any]] = None
+        self.last_ok_at: Optional[float] = None
+        self.last_price: Optional[float] = None
+        self.last_price_at: Optional[float] = None
+
+    def record(self, result: Dict[str, Any], latency: Optional[float], now: float):
+        self.last = result
+        if result["status"] == "throttled":
+            self.throttled += 1  # Our own budget said no: not the provider's fault
+            return
+        # No API key is not a flaky provider: report it down at once, not after N probes
+        self.configured = result.get("configured", True)
+        ok = result["status"] == "ok"
+        self.probes.append((now, latency, ok))
+        if ok:
+            self.consecutive_failures = 0
+            self.last_ok_at = now
+            self.observe_price(result.get("last_price"), now)
+        else:
+            self.consecutive_failures += 1
+
+    def observe_price(self, price: Optional[float], ts: float):
+        """Any fresh price (probe or streamed tick) resets staleness"""
+        if price is not None and (self.last_price_at is None or ts >= self.last_price_at):
+            self.last_price, self.last_price_at = price, ts
+
+    def summary(self, now: float) -> Dict[str, Any]:
+        latencies = sorted(l for _, l, ok in self.probes if ok and l is not None)
+
+        def _pct(q: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1)
+
+        failures = sum(1 for _, _, ok in self.probes if not ok)
+        staleness = round(now - self.last_price_at, 1) if self.last_price_at else None
+        if not self.configured:
+            status = "error"
+        elif not self.probes and self.last_price_at is None:
+            status = "unknown"
+        elif self.consecutive_failures >= DATA_FEED_FAILURES_DOWN:
+            status = "error"
+        elif self.consecutive_failures or staleness is None or staleness > DATA_FEED_STALE_SECONDS:
+            status = "degraded"
+        else:
+            status = "ok"
+        return {
+            "provider": self.name,
+            "status": status,
+            "probes": len(self.probes),
+            "error_rate": round(failures / len(self.probes), 3) if self.probes else None,
+            "consecutive_failures": self.consecutive_failures,
+            "throttled": self.throttled,
+            "latency_ms": {"p50": _pct(0.5), "p95": _pct(0.95), "p99": _pct(0.99)},
+            "last_price": self.last_price,
+            "staleness_seconds": staleness,
+            "last_ok_at": datetime.fromtimestamp(self.last_ok_at, timezone.utc).isoformat() if self.last_ok_at else None,
+            "last_reason": self.last.get("reason") if self.last else None,
+        }
+
+
+class FeedProber:
+    """In-process prober: rolling stats in memory, snapshot to disk every few minutes"""
+
+    def __init__(self):
+        self.providers: Dict[str, ProviderHealth] = {"twelve_data": ProviderHealth("twelve_data")}
+        self.probes = {"twelve_data": DataFeedMonitor.check_twelve_data_async}
+        self.started = False
+        self._last_saved = 0.0
+        self.stats = {"probes": 0, "snapshots": 0, "errors": 0}
+
+    def on_tick(self, symbol: str, ts: float, price: float):
+        """tick_store listener: streamed Twelve Data prices keep the feed fresh between probes"""
+        if symbol == PROBE_SYMBOL:  # last_price is reported as the probe symbol's price
+            self.providers["twelve_data"].observe_price(price, ts)
+
+    async def probe_once(self):
+        for name, probe in self.probes.items():
+            started = time.perf_counter()
+            result = await probe()
+            latency = time.perf_counter() - started if result["status"] != "throttled" else None
+            self.providers[name].record(result, latency, time.time())
+            self.stats["probes"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Old single-provider fields (primary provider) plus per-provider rolling stats"""
+        now = time.time()
+        providers = {name: p.summary(now) for name, p in self.providers.items()}
+        primary = providers["twelve_data"]
+        body = _result(primary["status"], providers=providers)
+        if primary["last_price"] is not None:
+            body.update(last_price=primary["last_price"], symbol=PROBE_SYMBOL)
+        if primary["status"] != "ok" and primary["last_reason"]:
+            body["reason"] = primary["last_reason"]
+        return body
+
+    def save(self):
+        DataFeedMonitor.save_health_status(self.snapshot())
+        self._last_saved = time.monotonic()
+        self.stats["snapshots"] += 1
+
+    async def run(self):
+        """Background probe loop; cancel the task to stop it"""
+        self.started = True
+        try:
+            while True:
+                try:
+                    await self.probe_once()
+                    if time.monotonic() - self._last_saved >= DATA_FEED_SNAPSHOT_SECONDS:
+                        self.save()
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    log.warning("⚠️ Feed probe failed", error=str(e))
+                await asyncio.sleep(DATA_FEED_PROBE_SECONDS)
+        finally:
+            # Stopped (e.g. leadership lost): serve the leader's snapshot, not this frozen state
+            self.started = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            **self.stats,
+            "providers": {
+                name: {k: s[k] for k in ("status", "error_rate", "consecutive_failures", "staleness_seconds")}
+                for name, s in ((n, p.summary(now)) for n, p in self.providers.items())
+            },
+        }
+
+
+feed_prober = FeedProber()
+
 if __name__ == "__main__":
     DataFeedMonitor.run_health_check()
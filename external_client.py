@@ -1,12 +1,16 @@
 import os
-import requests
+import http_client
 import time
+from rate_budget import EXECUTION, budget
+from structured_log import get_logger
+
+log = get_logger("external_client")
 
 # Alert tracking
 _consecutive_failures = 0
 _alert_threshold = 2
 
-def get_price():
+def get_price(symbol: str = "EUR/USD"):
     global _consecutive_failures
     
     api_key = os.getenv("TWELVE_DATA_API_KEY")
@@ -18,11 +22,14 @@ def get_price():
     # Simple implementation with retry
     max_retries = 3
     for attempt in range(max_retries):
+        # Every attempt (retries included) is spent from the shared quota
+        if not budget.acquire("twelve_data", priority=EXECUTION):
+            raise RuntimeError("Twelve Data request budget exhausted")
         try:
-            r = requests.get(
+            r = http_client.get(
                 "https://api.twelvedata.com/price",
                 params={
-                    "symbol": "EUR/USD",
+                    "symbol": symbol,
                     "apikey": api_key
                 },
                 timeout=5
@@ -42,12 +49,12 @@ def get_price():
             
             # Alert if threshold exceeded
             if _consecutive_failures >= _alert_threshold:
-                print(f"[ALERT] Market data unavailable – no signals will be generated")
-                print(f"[ALERT] Consecutive failures: {_consecutive_failures}")
+                log.error("[ALERT] Market data unavailable – no signals will be generated",
+                          consecutive_failures=_consecutive_failures)
             
             if attempt < max_retries - 1:
                 wait_time = (attempt + 1) * 2  # Exponential backoff
-                print(f"⚠️ Attempt {attempt + 1} failed: {e}. Retrying in {wait_time}s...")
+                log.warning("⚠️ Price fetch attempt failed", attempt=attempt + 1, error=str(e), retry_in_seconds=wait_time)
                 time.sleep(wait_time)
             else:
                 # Final failure
@@ -7,6 +7,9 @@ import json
 import requests
 from datetime import datetime
 
+from auto_executor import gate_log_store
+from log_store import tail_jsonl
+
 def generate_proof_packet():
     """Generate proof packet with all evidence"""
     
@@ -41,31 +44,26 @@ def generate_proof_packet():
     # 3. Latest Logs
     print("\n3. LATEST ACTIVITY")
     try:
-        if os.path.exists("daily_gate_log.jsonl"):
-            with open("daily_gate_log.jsonl", 'r') as f:
-                lines = f.readlines()
-                if lines:
-                    last_log = json.loads(lines[-1])
-                    print(f"   Last Decision: {last_log.get('decision')}")
-                    print(f"   Reason: {last_log.get('reason')}")
-                    print(f"   Date: {last_log.get('date')}")
-                    print(f"   Timestamp: {last_log.get('timestamp')}")
+        last_log = gate_log_store.last()
+        if last_log:
+            print(f"   Last Decision: {last_log.get('decision')}")
+            print(f"   Reason: {last_log.get('reason')}")
+            print(f"   Date: {last_log.get('date')}")
+            print(f"   Timestamp: {last_log.get('timestamp')}")
     except Exception as e:
         print(f"   ❌ Error: {e}")
     
     # 4. Daily Summary
     print("\n4. DAILY SUMMARY")
     try:
-        if os.path.exists("daily_summary_log.jsonl"):
-            with open("daily_summary_log.jsonl", 'r') as f:
-                lines = f.readlines()
-                if lines:
-                    summary = json.loads(lines[-1])
-                    print(f"   Date: {summary.get('date')}")
-                    print(f"   Signals Seen: {summary.get('signals_seen')}")
-                    print(f"   Executions: {summary.get('executions')}")
-                    print(f"   Skipped: {summary.get('skipped')}")
-                    print(f"   Violations: {summary.get('violations')}")
+        summaries = tail_jsonl("daily_summary_log.jsonl", 1)
+        if summaries:
+            summary = summaries[0]
+            print(f"   Date: {summary.get('date')}")
+            print(f"   Signals Seen: {summary.get('signals_seen')}")
+            print(f"   Executions: {summary.get('executions')}")
+            print(f"   Skipped: {summary.get('skipped')}")
+            print(f"   Violations: {summary.get('violations')}")
     except Exception as e:
         print(f"   ❌ Error: {e}")
     
@@ -0,0 +1,170 @@
+"""
+History Response Cache
+In-process LRU + TTL cache for the /signal history bridge.
+- Bounded by entry count and an approximate byte budget (serialized size)
+- Stale-while-revalidate, and stale data served if the AI Core is down
+- Hot keys are refreshed in the background before they expire
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from structured_log import get_logger
+
+log = get_logger("history_cache")
+
+HISTORY_CACHE_TTL_SECONDS = float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "30"))
+HISTORY_CACHE_STALE_SECONDS = float(os.getenv("HISTORY_CACHE_STALE_SECONDS", "600"))
+HISTORY_CACHE_MAX_ENTRIES = int(os.getenv("HISTORY_CACHE_MAX_ENTRIES", "256"))
+HISTORY_CACHE_MAX_BYTES = int(os.getenv("HISTORY_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+HISTORY_HOT_THRESHOLD = int(os.getenv("HISTORY_HOT_THRESHOLD", "3"))  # hits per refresh cycle
+HISTORY_HOT_MAX_KEYS = int(os.getenv("HISTORY_HOT_MAX_KEYS", "8"))
+
+
+class _Entry:
+    __slots__ = ("value", "size", "fetched_at", "recent_hits")
+
+    def __init__(self, value: Any, size: int):
+        self.value = value
+        self.size = size
+        self.fetched_at = time.monotonic()
+        self.recent_hits = 0
+
+
+class HistoryCache:
+    """LRU + TTL cache with per-key single-flight fetches"""
+
+    def __init__(
+        self,
+        fetch: Callable[[Hashable], Awaitable[Any]],
+        ttl: float = HISTORY_CACHE_TTL_SECONDS,
+        stale_ttl: float = HISTORY_CACHE_STALE_SECONDS,
+        max_entries: int = HISTORY_CACHE_MAX_ENTRIES,
+        max_bytes: int = HISTORY_CACHE_MAX_BYTES,
+    ):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._bytes = 0
+        self.stats = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+            "refreshes": 0, "errors": 0, "stale_on_error": 0, "evictions": 0,
+            "hot_refreshes": 0,
+        }
+
+    def _put(self, key: Hashable, value: Any):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return  # Never let a single response blow the budget
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        entry = _Entry(value, size)
+        if old is not None:
+            entry.recent_hits = old.recent_hits
+        self._entries[key] = entry
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.stats["evictions"] += 1
+
+    async def _refresh(self, key: Hashable) -> bool:
+        try:
+            value = await self._fetch(key)
+        except Exception as e:
+            log.warning("⚠️ History cache refresh failed", key=str(key), error=str(e))
+            self.stats["errors"] += 1
+            return False
+        finally:
+            self._inflight.pop(key, None)
+        self._put(key, value)
+        self.stats["refreshes"] += 1
+        return True
+
+    def _start_refresh(self, key: Hashable) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(key))
+            self._inflight[key] = task
+        return task
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if nothing is available"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            entry.recent_hits += 1
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                self._start_refresh(key)
+                return entry.value
+
+        if key in self._inflight:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+        ok = await asyncio.shield(self._start_refresh(key))
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not ok:
+            # Upstream down: last known page beats an empty history
+            self.stats["stale_on_error"] += 1
+        return entry.value
+
+    async def refresh_hot_keys(self):
+        """Refresh the most requested keys that are past half their TTL"""
+        now = time.monotonic()
+        hot = sorted(
+            (k for k, e in self._entries.items()
+             if e.recent_hits >= HISTORY_HOT_THRESHOLD and now - e.fetched_at > self.ttl / 2),
+            key=lambda k: self._entries[k].recent_hits,
+            reverse=True,
+        )[:HISTORY_HOT_MAX_KEYS]
+        for entry in self._entries.values():
+            entry.recent_hits = 0
+        if hot:
+            await asyncio.gather(*(self._start_refresh(k) for k in hot))
+            self.stats["hot_refreshes"] += len(hot)
+
+    async def run_refresher(self, interval: Optional[float] = None):
+        """Background loop; cancel the task to stop it"""
+        interval = interval or max(1.0, self.ttl / 2)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_hot_keys()
+            except Exception as e:
+                log.warning("⚠️ History hot-key refresh error", error=str(e))
+
+    def export(self, limit: int) -> List[Tuple[Hashable, Any]]:
+        """Most recently used entries, for the warm-start snapshot"""
+        return [(key, entry.value) for key, entry in list(self._entries.items())[-limit:]]
+
+    def prime(self, key: Hashable, value: Any, age: float):
+        """Seed an entry as if fetched age seconds ago (restored from a snapshot)"""
+        self._put(key, value)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.fetched_at = time.monotonic() - age
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["entries"] = len(self._entries)
+        stats["bytes"] = self._bytes
+        stats["max_bytes"] = self.max_bytes
+        stats["ttl_seconds"] = self.ttl
+        return stats
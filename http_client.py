@@ -0,0 +1,216 @@
+"""
+Shared HTTP Client
+One keep-alive session for every upstream call (Supabase, Telegram,
+Twelve Data, AI Core, GitHub raw) so TCP+TLS handshakes are paid once
+per pooled connection instead of once per request.
+
+Sync callers (scheduler, scripts) use get/post; the API event loop uses
+aget/apost, backed by an httpx.AsyncClient with the same pool limits.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from metrics import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+# Pool configuration
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # Host pools kept alive
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))          # Connections per host
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
+_session = None
+_session_lock = threading.Lock()
+_async_client = None
+_async_client_loop = None
+_host_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """Return the process-wide pooled session (created on first use)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                # Imported here: the API process only uses the async client, so it skips requests at startup
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _record(host: str, ok: bool, started: float, via_async: bool = False):
+    metrics.observe_upstream(host, time.perf_counter() - started, ok)
+    with _stats_lock:
+        stats = _host_stats.setdefault(host, {"requests": 0, "errors": 0})
+        stats["requests"] += 1
+        if via_async:
+            stats["async_requests"] = stats.get("async_requests", 0) + 1
+        if not ok:
+            stats["errors"] += 1
+
+
+def _connection_tracer(host: str):
+    """httpcore trace hook: counts new async connections (TCP connects) per host"""
+    async def trace(event: str, info: Dict[str, Any]):
+        if event == "connection.connect_tcp.complete":
+            with _stats_lock:
+                stats = _host_stats.setdefault(host, {"requests": 0, "errors": 0})
+                stats["async_connections_opened"] = stats.get("async_connections_opened", 0) + 1
+    return trace
+
+
+def request(method: str, url: str, **kwargs) -> "requests.Response":
+    """Pooled drop-in for requests.request (default timeout applied)"""
+    kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    host = urlsplit(url).netloc
+    started = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except Exception:
+        _record(host, False, started)
+        raise
+    _record(host, response.status_code < 500, started)
+    return response
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> "requests.Response":
+    return request("POST", url, **kwargs)
+
+
+def _timeout(value) -> httpx.Timeout:
+    """Translate a requests-style timeout (float or (connect, read)) to httpx"""
+    if isinstance(value, tuple):
+        return httpx.Timeout(value[1], connect=value[0])
+    return httpx.Timeout(value)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the pooled async client for the running event loop"""
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=HTTP_POOL_MAXSIZE,
+            ),
+            timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+async def arequest(method: str, url: str, timeout=None, **kwargs) -> httpx.Response:
+    """Async pooled request; accepts the same timeout forms as request()"""
+    if timeout is not None:
+        kwargs["timeout"] = _timeout(timeout)
+    host = urlsplit(url).netloc
+    kwargs["extensions"] = {**kwargs.get("extensions", {}), "trace": _connection_tracer(host)}
+    started = time.perf_counter()
+    try:
+        response = await get_async_client().request(method, url, **kwargs)
+    except Exception:
+        _record(host, False, started, via_async=True)
+        raise
+    _record(host, response.status_code < 500, started, via_async=True)
+    return response
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url: str, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+async def aclose():
+    """Close the async pool (called on API shutdown)"""
+    global _async_client, _async_client_loop
+    if _async_client is not None:
+        await _async_client.aclose()
+    _async_client = None
+    _async_client_loop = None
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Per-host pool usage for both clients.
+    connections_opened counts handshakes; reused = requests served on an
+    already-open connection. The async_* fields are the same for the httpx
+    pool the API event loop uses.
+    """
+    hosts = {}
+    with _stats_lock:
+        for host, stats in _host_stats.items():
+            hosts[host] = dict(stats)
+
+    async_pool = {"open": 0, "idle": 0}
+    pool = getattr(getattr(_async_client, "_transport", None), "_pool", None)
+    if pool is not None:
+        for conn in list(pool.connections):
+            origin = getattr(conn, "_origin", None)
+            if origin is None or conn.is_closed():
+                continue
+            name = origin.host.decode()
+            if origin.port not in (None, 80, 443):
+                name = f"{name}:{origin.port}"
+            entry = hosts.setdefault(name, {"requests": 0, "errors": 0})
+            entry["async_open"] = entry.get("async_open", 0) + 1
+            async_pool["open"] += 1
+            if conn.is_idle():
+                entry["async_idle"] = entry.get("async_idle", 0) + 1
+                async_pool["idle"] += 1
+    for entry in hosts.values():
+        if "async_requests" in entry:
+            entry["async_reused"] = max(0, entry["async_requests"] - entry.get("async_connections_opened", 0))
+
+    if _session is not None:
+        adapter = _session.get_adapter("https://")
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            entry = hosts.setdefault(host, {"requests": 0, "errors": 0})
+            entry["connections_opened"] = pool.num_connections
+            entry["reused"] = max(0, pool.num_requests - pool.num_connections)
+            # The pool queue is pre-filled with None placeholders; count real sockets
+            idle = list(pool.pool.queue) if pool.pool is not None else []
+            entry["idle"] = sum(1 for conn in idle if conn is not None)
+
+    return {
+        "pool_connections": HTTP_POOL_CONNECTIONS,
+        "pool_maxsize": HTTP_POOL_MAXSIZE,
+        "timeouts": {"connect": HTTP_CONNECT_TIMEOUT, "read": HTTP_READ_TIMEOUT},
+        "async_pool": {
+            "max_connections": HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE,
+            "max_keepalive": HTTP_POOL_MAXSIZE,
+            "active": _async_client is not None,
+            **async_pool,
+            "requests": sum(e.get("async_requests", 0) for e in hosts.values()),
+        },
+        "hosts": hosts,
+    }
@@ -0,0 +1,143 @@
+"""
+Group-Commit JSONL Writer
+Shared append writer for the audit logs. File handles stay open (opened
+with O_APPEND) and every record is written to the OS as one write() as
+soon as it is appended, so a process crash never loses a record and
+several processes (API, scheduler, auto_executor) can append to the same
+file without interleaving. Grouping only applies to fsync.
+
+Durability policy (LOG_FSYNC_POLICY):
+- always:   fsync after every record
+- interval: fsync every LOG_FSYNC_INTERVAL_MS (group commit, default)
+- shutdown: fsync on close only (survives a process crash, not power loss)
+
+Files are only ever opened in append mode, so the append-only guarantee
+is unchanged; batching only decides when bytes reach the disk.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from structured_log import get_logger
+
+log = get_logger("jsonl_writer")
+
+FSYNC_POLICIES = ("always", "interval", "shutdown")
+LOG_FSYNC_POLICY = os.getenv("LOG_FSYNC_POLICY", "interval").lower()
+LOG_FSYNC_INTERVAL_MS = int(os.getenv("LOG_FSYNC_INTERVAL_MS", "200"))
+LOG_WRITER_MAX_OPEN_FILES = int(os.getenv("LOG_WRITER_MAX_OPEN_FILES", "32"))
+
+
+class AppendWriter:
+    """Keeps append handles open and commits fsyncs in groups"""
+
+    def __init__(self, policy: str = LOG_FSYNC_POLICY, interval_ms: int = LOG_FSYNC_INTERVAL_MS):
+        if policy not in FSYNC_POLICIES:
+            log.warning("⚠️ Unknown LOG_FSYNC_POLICY, using 'interval'", policy=policy)
+            policy = "interval"
+        self.policy = policy
+        self.interval = interval_ms / 1000.0
+        self._lock = threading.Lock()
+        self._handles: "OrderedDict[str, Any]" = OrderedDict()
+        self._dirty = set()
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {"records": 0, "fsyncs": 0}
+
+    def _handle(self, path: str):
+        f = self._handles.get(path)
+        if f is None:
+            # Unbuffered: each record is a single O_APPEND write()
+            f = open(path, 'ab', buffering=0)
+            self._handles[path] = f
+            while len(self._handles) > LOG_WRITER_MAX_OPEN_FILES:
+                old_path, old = self._handles.popitem(last=False)
+                self._commit(old_path, old, fsync=True)
+                old.close()
+        else:
+            self._handles.move_to_end(path)
+        return f
+
+    def _commit(self, path: str, f, fsync: bool):
+        if fsync and path in self._dirty:
+            os.fsync(f.fileno())
+            self.stats["fsyncs"] += 1
+            self._dirty.discard(path)
+
+    def _ensure_flusher(self):
+        if self._flusher is None and self.policy == "interval":
+            self._flusher = threading.Thread(target=self._flush_loop, name="jsonl-writer", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush(fsync=True)
+
+    def append(self, path: str, record: Any) -> int:
+        """Append one JSON record; returns the byte offset it was written at"""
+        line = (json.dumps(record) + '\n').encode()
+        with self._lock:
+            f = self._handle(path)
+            f.write(line)
+            # With O_APPEND the position after write() is the end of *our* record,
+            # even when another process appended to the file in between
+            offset = f.tell() - len(line)
+            self.stats["records"] += 1
+            self._dirty.add(path)
+            if self.policy == "always":
+                self._commit(path, f, fsync=True)
+        self._ensure_flusher()
+        return offset
+
+    def flush(self, path: Optional[str] = None, fsync: bool = False):
+        """Records already reach the OS on append; fsync=True forces them to disk"""
+        with self._lock:
+            paths = [path] if path else list(self._dirty)
+            for p in paths:
+                if p in self._dirty and p in self._handles:
+                    self._commit(p, self._handles[p], fsync)
+
+    def close(self, path: Optional[str] = None):
+        """Fsync and close one handle (or all of them)"""
+        with self._lock:
+            paths = [path] if path else list(self._handles)
+            for p in paths:
+                f = self._handles.pop(p, None)
+                if f is not None:
+                    self._commit(p, f, fsync=True)
+                    f.close()
+
+    def shutdown(self):
+        self._stop.set()
+        self.close()
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = None):
+    """Crash-safe snapshot replace: temp file, fsync, rename over the target"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself (POSIX)
+        dir_fd = os.open(directory, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+shared_writer = AppendWriter()
+atexit.register(shared_writer.shutdown)
@@ -0,0 +1,108 @@
+"""
+Background Leader
+Every uvicorn worker runs the lifespan, but some loops must run once per
+deployment, not once per worker: the Twelve Data socket and tick replays,
+the signal watcher, the feed prober, the replica / telemetry sync,
+broadcast resume and warm-state snapshots. Loops over a worker's own
+memory (history hot-key refresh, SSE poller) stay on every worker.
+
+- Workers race for a lease in the shared state store; the holder starts
+  the registered loops and renews the lease every LEADER_RENEW_SECONDS
+- A worker that cannot renew stops its loops; if the leader dies, another
+  worker takes over once the lease expires (LEADER_LEASE_SECONDS)
+- Followers still serve requests; they read what the leader writes
+  (replica file, telemetry checkpoint, feed health snapshot)
+"""
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from state_store import StateStore, execution_state
+from structured_log import get_logger
+
+log = get_logger("leader")
+
+LEADER_KEY = "background_leader"
+LEADER_LEASE_SECONDS = float(os.getenv("LEADER_LEASE_SECONDS", "30"))
+LEADER_RENEW_SECONDS = float(os.getenv("LEADER_RENEW_SECONDS", "10"))  # well inside the lease
+
+
+class LeaderElection:
+    """Lease-based single leader across worker processes"""
+
+    def __init__(self, store: StateStore, key: str = LEADER_KEY):
+        self.store = store
+        self.key = key
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.leader_since: Optional[float] = None
+        self._jobs: List[Callable[[], Any]] = []
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"elected": 0, "stepped_down": 0, "errors": 0}
+
+    def register(self, job: Callable[[], Any]):
+        """job() runs on election; a returned coroutine becomes a task cancelled on step-down"""
+        self._jobs.append(job)
+
+    def _start(self):
+        self.is_leader = True
+        self.leader_since = time.time()
+        self.stats["elected"] += 1
+        log.info("👑 Elected background leader", holder=self.holder)
+        for job in self._jobs:
+            try:
+                result = job()
+            except Exception as e:
+                log.warning("⚠️ Leader job failed to start", job=getattr(job, "__name__", repr(job)), error=str(e))
+                continue
+            if asyncio.iscoroutine(result):
+                self._tasks.append(asyncio.create_task(result))
+
+    def _stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self.is_leader:
+            self.stats["stepped_down"] += 1
+        self.is_leader = False
+        self.leader_since = None
+
+    async def run(self):
+        """Election / renewal loop; cancel it (then call stop()) to shut down"""
+        while True:
+            try:
+                held = self.store.acquire_lease(self.key, self.holder, LEADER_LEASE_SECONDS)
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.warning("⚠️ Leader lease check failed", error=str(e))
+                held = False  # Cannot prove we still hold it: another worker may take over
+            if held and not self.is_leader:
+                self._start()
+            elif not held and self.is_leader:
+                log.warning("⚠️ Lost background leadership, stopping loops", holder=self.holder)
+                self._stop()
+            await asyncio.sleep(LEADER_RENEW_SECONDS)
+
+    def stop(self):
+        was_leader = self.is_leader
+        self._stop()
+        if was_leader:
+            try:
+                self.store.release_lease(self.key, self.holder)
+            except Exception as e:
+                log.warning("⚠️ Leader lease not released", error=str(e))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "is_leader": self.is_leader,
+            "holder": self.holder,
+            "leader_since": self.leader_since,
+            "tasks": len(self._tasks),
+        }
+
+
+leader = LeaderElection(execution_state)
@@ -0,0 +1,331 @@
+"""
+Segmented Log Store
+Append-only JSONL storage split into daily segments:
+
+    logs/<stream>/2026-01-26.jsonl      active (or recent) segment
+    logs/<stream>/2026-01-25.jsonl.gz   sealed segment (if compression enabled)
+    logs/<stream>/2026-01-26.idx        sparse index: [timestamp, byte offset]
+
+Readers ("last N", "range by time", "by signal_id") stream segment by
+segment and never load the whole history into memory.
+
+The flat log file (e.g. auto_execution_log.jsonl) stays the canonical,
+append-only record: every record is appended there first, and the daily
+segments are a derived copy used to accelerate reads. logs/<stream>/cutoff
+holds the flat file's size when mirroring started; bytes before it are
+read as the oldest ("legacy") segment, everything after is served from the
+dated segments. Deleting logs/<stream>/ is safe: readers fall back to the
+flat file and mirroring restarts from its current end.
+"""
+import gzip
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from jsonl_writer import shared_writer
+
+LOG_STORE_DIR = os.getenv("LOG_STORE_DIR", "logs")
+LOG_INDEX_SPACING_BYTES = int(os.getenv("LOG_INDEX_SPACING_BYTES", str(64 * 1024)))
+LOG_COMPRESS_SEALED = os.getenv("LOG_COMPRESS_SEALED", "false").lower() == "true"
+
+LEGACY_SEGMENT = "legacy"
+CUTOFF_FILE = "cutoff"
+_TAIL_BLOCK = 64 * 1024
+
+
+def _parse_ts(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _tail_lines(f, n: int, end: Optional[int] = None) -> List[bytes]:
+    """Last n complete lines of a seekable binary file (before byte end), reading backwards"""
+    f.seek(0, os.SEEK_END)
+    pos = f.tell() if end is None else min(end, f.tell())
+    buf = b""
+    while pos > 0 and buf.count(b"\n") <= n:
+        step = min(_TAIL_BLOCK, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+    lines = [line for line in buf.split(b"\n") if line.strip()]
+    return lines[-n:]
+
+
+def tail_jsonl(path: str, n: int = 1) -> List[Dict[str, Any]]:
+    """Last n records of a flat JSONL file without reading all of it"""
+    if n <= 0 or not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        return [json.loads(line) for line in _tail_lines(f, n)]
+
+
+class SegmentedLogStore:
+    """Daily-segmented, sparsely indexed JSONL stream"""
+
+    def __init__(
+        self,
+        name: str,
+        time_field: str = "timestamp",
+        legacy_file: Optional[str] = None,
+        base_dir: str = LOG_STORE_DIR,
+        compress_sealed: bool = LOG_COMPRESS_SEALED,
+    ):
+        self.name = name
+        self.time_field = time_field
+        self.legacy_file = legacy_file
+        self.dir = os.path.join(base_dir, name)
+        self.compress_sealed = compress_sealed
+        self._last_indexed: Dict[str, int] = {}
+        self._active_date: Optional[str] = None
+        self._cutoff: Optional[int] = None
+        # append() runs from executor threads; it mutates _active_date/_last_indexed and may publish the cutoff
+        self._lock = threading.Lock()
+
+    # ---- paths -------------------------------------------------------
+
+    def _segment_path(self, date: str) -> str:
+        return os.path.join(self.dir, f"{date}.jsonl")
+
+    def _index_path(self, date: str) -> str:
+        return os.path.join(self.dir, f"{date}.idx")
+
+    def _cutoff_path(self) -> str:
+        return os.path.join(self.dir, CUTOFF_FILE)
+
+    def legacy_end(self) -> Optional[int]:
+        """Bytes of the flat file read as the legacy segment (None = all of it)"""
+        if self._cutoff is None:
+            try:
+                with open(self._cutoff_path(), 'r') as f:
+                    self._cutoff = int(f.read())
+            except (OSError, ValueError):
+                return None
+        return self._cutoff
+
+    def _ensure_cutoff(self):
+        """
+        Pin the flat file's current size before the first mirrored append.
+        The file is published with link(), which fails if another process
+        got there first, so exactly one process backfills: records that
+        were only written to segments are copied to the flat file once.
+        """
+        if self.legacy_end() is not None or not self.legacy_file:
+            return
+        shared_writer.flush(self.legacy_file)
+        size = os.path.getsize(self.legacy_file) if os.path.exists(self.legacy_file) else 0
+        tmp = f"{self._cutoff_path()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(str(size))
+        try:
+            os.link(tmp, self._cutoff_path())
+            won = True
+        except FileExistsError:
+            won = False
+        finally:
+            os.remove(tmp)
+        if won:
+            for segment, path, _ in self.segment_files():
+                if segment != LEGACY_SEGMENT:
+                    for record in self._iter_segment(path):
+                        shared_writer.append(self.legacy_file, record)
+            shared_writer.flush(self.legacy_file, fsync=True)
+        self._cutoff = None
+        self.legacy_end()
+
+    def segment_files(self) -> List[Tuple[str, str, bool]]:
+        """(segment key, path, sealed) for every segment, oldest first"""
+        shared_writer.flush()  # Make buffered appends visible to readers
+        segments = []
+        if self.legacy_file and os.path.exists(self.legacy_file):
+            segments.append((LEGACY_SEGMENT, self.legacy_file, False))
+        if os.path.isdir(self.dir):
+            dated = {}
+            for fname in os.listdir(self.dir):
+                if fname.endswith(".jsonl.gz"):
+                    dated[fname[:-9]] = (os.path.join(self.dir, fname), True)
+                elif fname.endswith(".jsonl"):
+                    # A plain file wins while compression is mid-flight
+                    dated[fname[:-6]] = (os.path.join(self.dir, fname), False)
+            for date in sorted(dated):
+                path, sealed = dated[date]
+                segments.append((date, path, sealed))
+        return segments
+
+    @staticmethod
+    def open_segment(path: str):
+        """Binary reader for a plain or compressed segment"""
+        return gzip.open(path, 'rb') if path.endswith(".gz") else open(path, 'rb')
+
+    # ---- writing -----------------------------------------------------
+
+    def _date_of(self, record: Dict[str, Any]) -> str:
+        ts = record.get(self.time_field)
+        dt = _parse_ts(ts) if ts else datetime.now(timezone.utc)
+        return dt.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+    def _last_index_offset(self, date: str) -> int:
+        if date not in self._last_indexed:
+            last = -LOG_INDEX_SPACING_BYTES
+            idx_path = self._index_path(date)
+            if os.path.exists(idx_path):
+                shared_writer.flush(idx_path)
+                entries = tail_jsonl(idx_path, 1)
+                if entries:
+                    last = entries[0][1]
+            self._last_indexed[date] = last
+        return self._last_indexed[date]
+
+    def append(self, record: Dict[str, Any]):
+        """Append one record to the flat log, then mirror it into its day's segment"""
+        with self._lock:
+            self._append(record)
+
+    def _append(self, record: Dict[str, Any]):
+        os.makedirs(self.dir, exist_ok=True)
+        if self.legacy_file:
+            self._ensure_cutoff()
+            shared_writer.append(self.legacy_file, record)
+        date = self._date_of(record)
+        if self._active_date and date > self._active_date:
+            self.seal_before(date)
+        self._active_date = max(date, self._active_date or date)
+
+        path = self._segment_path(date)
+        if os.path.exists(path + ".gz"):
+            # Late record for an already sealed day: add a new gzip member
+            with gzip.open(path + ".gz", 'ab') as f:
+                f.write((json.dumps(record) + '\n').encode())
+            return
+        offset = shared_writer.append(path, record)
+
+        if offset - self._last_index_offset(date) >= LOG_INDEX_SPACING_BYTES:
+            shared_writer.append(self._index_path(date), [record.get(self.time_field), offset])
+            self._last_indexed[date] = offset
+
+    def seal_before(self, date: str):
+        """Seal every plain segment older than date (gzip if enabled)"""
+        if not self.compress_sealed:
+            return
+        for seg_date, path, sealed in self.segment_files():
+            if seg_date == LEGACY_SEGMENT or sealed or seg_date >= date:
+                continue
+            shared_writer.close(path)
+            shared_writer.close(self._index_path(seg_date))
+            tmp = path + ".gz.tmp"
+            with open(path, 'rb') as src, gzip.open(tmp, 'wb') as dst:
+                for chunk in iter(lambda: src.read(_TAIL_BLOCK), b""):
+                    dst.write(chunk)
+            os.replace(tmp, path + ".gz")
+            os.remove(path)
+
+    # ---- reading -----------------------------------------------------
+
+    def _end_of(self, segment: str) -> Optional[int]:
+        return self.legacy_end() if segment == LEGACY_SEGMENT else None
+
+    def _raw_lines(self, path: str, start_offset: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        with self.open_segment(path) as f:
+            if start_offset:
+                f.seek(start_offset)
+            offset = start_offset
+            for raw in f:
+                offset += len(raw)
+                if end is not None and offset > end:
+                    return
+                yield raw
+
+    def _iter_segment(self, path: str, start_offset: int = 0, end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        for raw in self._raw_lines(path, start_offset, end):
+            if raw.strip():
+                try:
+                    yield json.loads(raw)
+                except ValueError:
+                    continue  # Torn write at the tail of a crashed segment
+
+    def tail(self, n: int = 1) -> List[Dict[str, Any]]:
+        """Last n records across segments, oldest first"""
+        if n <= 0:
+            return []
+        collected: List[Dict[str, Any]] = []
+        for segment, path, _ in reversed(self.segment_files()):
+            if path.endswith(".gz"):
+                # No random access into gzip; keep only a bounded window
+                window = deque(self._iter_segment(path), maxlen=n - len(collected))
+                records = list(window)
+            else:
+                with open(path, 'rb') as f:
+                    records = []
+                    for line in _tail_lines(f, n - len(collected), self._end_of(segment)):
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            continue
+            collected = records + collected
+            if len(collected) >= n:
+                break
+        return collected[-n:]
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        records = self.tail(1)
+        return records[0] if records else None
+
+    def _seek_offset(self, date: str, start: datetime) -> int:
+        """Largest indexed offset whose timestamp is before start"""
+        idx_path = self._index_path(date)
+        best = 0
+        if os.path.exists(idx_path):
+            with open(idx_path, 'r') as idx:
+                for line in idx:
+                    ts, offset = json.loads(line)
+                    if ts and _parse_ts(ts) < start:
+                        best = offset
+                    else:
+                        break
+        return best
+
+    def range(self, start: Any, end: Any) -> Iterator[Dict[str, Any]]:
+        """Records with start <= time < end, in order"""
+        start_dt, end_dt = _parse_ts(start), _parse_ts(end)
+        first_day = start_dt.astimezone(timezone.utc).strftime("%Y-%m-%d")
+        last_day = end_dt.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+        for seg_date, path, _ in self.segment_files():
+            if seg_date != LEGACY_SEGMENT and not (first_day <= seg_date <= last_day):
+                continue
+            offset = self._seek_offset(seg_date, start_dt) if seg_date == first_day else 0
+            for record in self._iter_segment(path, offset, self._end_of(seg_date)):
+                ts = record.get(self.time_field)
+                if not ts:
+                    continue
+                dt = _parse_ts(ts)
+                if dt >= end_dt:
+                    if seg_date != LEGACY_SEGMENT:
+                        return
+                    continue
+                if dt >= start_dt:
+                    yield record
+
+    def by_signal_id(self, signal_id: str, newest_first: bool = True) -> Iterator[Dict[str, Any]]:
+        """Stream records for one signal_id (substring prefilter before parsing)"""
+        needle = json.dumps(signal_id).encode()
+        segments = self.segment_files()
+        if newest_first:
+            segments = list(reversed(segments))
+        for segment, path, _ in segments:
+            matches = []
+            for raw in self._raw_lines(path, end=self._end_of(segment)):
+                if needle not in raw:
+                    continue
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                if record.get("signal_id") == signal_id:
+                    matches.append(record)
+            yield from (reversed(matches) if newest_first else matches)
@@ -1,25 +1,218 @@
+import time
+BOOT_STARTED = time.perf_counter()  # Cold-start clock, reported in /health "startup"
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from typing import Optional
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from signal_engine import get_latest_signal_safe, is_market_open
-from telegram_formatter import send_telegram, format_signal_message
+from http_client import get_pool_stats
+from data_feed_monitor import DataFeedMonitor, feed_prober
+from history_cache import HistoryCache
+from leader import leader
+from metrics import metrics
+from rate_budget import budget
+from signal_stream import broadcaster
+from signal_watcher import watcher
+from signal_engine import ACTIVE_SIGNALS_LIMIT, get_active_signals_safe_async, get_latest_signal_fresh_async, get_latest_signal_safe_async, get_signal_cache_stats, is_market_open
+from signal_replica import replica
+from state_store import CURRENT_SIGNAL_KEY, execution_state
+from subscribers import broadcasts, subscribers
+from telemetry import telemetry
+from telegram_formatter import format_signal_message
+from telegram_queue import outbox
+from tick_store import replay_file, serve_socket_replay, stream_twelve_data, tick_store
+from warm_state import WARM_HISTORY_KEYS, warm_state
 import os
+import asyncio
+import base64
 import json
-import requests
-import sys
+import re
+import http_client
+import structured_log
 from datetime import datetime, timezone
 
-def print_flush(msg):
-    print(msg)
-    sys.stdout.flush()
+log = structured_log.get_logger("main")
 
 EXECUTION_LOG_API = "https://raw.githubusercontent.com/9dpi/quantix-live-execution/main/auto_execution_log.jsonl"
+AI_CORE_SIGNALS_API = "https://quantixapiserver-production.up.railway.app/api/v1/signals"
+
+CURSOR_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
 
-app = FastAPI()
+def encode_cursor(position: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    """Opaque cursor -> position; raises ValueError on anything malformed"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict) or position.get("d") not in ("next", "prev"):
+        raise ValueError("Invalid cursor")
+    if "g" in position or "i" in position:
+        # Both end up inside a PostgREST filter: only a timestamp and a plain id get through
+        g, i = position.get("g"), position.get("i")
+        try:
+            datetime.fromisoformat(str(g).replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError("Invalid cursor")
+        if isinstance(i, bool) or not (isinstance(i, int) or (isinstance(i, str) and CURSOR_ID_RE.fullmatch(i))):
+            raise ValueError("Invalid cursor")
+    if "o" in position and (isinstance(position["o"], bool) or not isinstance(position["o"], int)):
+        raise ValueError("Invalid cursor")
+    return position
+
+async def fetch_history_page(asset, state, limit, cursor):
+    """
+    Keyset page of fx_signals ordered by (generated_at, id) DESC.
+    The cursor pins the boundary row, so Postgres seeks straight to it via
+    the (filter, generated_at, id) indexes: page N costs the same as page 1.
+    """
+    sb_url = os.getenv("SUPABASE_URL")
+    sb_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
+    position = decode_cursor(cursor) if cursor else {"d": "next"}
+    forward = position["d"] == "next"
+
+    if not (sb_url and sb_key):
+        # Legacy AI Core only pages by offset: keep the cursor contract, encode the offset
+        offset = max(0, int(position.get("o", 0)))
+        resp = await http_client.aget(AI_CORE_SIGNALS_API, params={
+            "limit": limit, "offset": offset,
+            **({"asset": asset} if asset else {}), **({"state": state} if state else {}),
+        }, timeout=5)
+        resp.raise_for_status()
+        body = resp.json()
+        rows = body.get("data", []) if isinstance(body, dict) else body
+        return {
+            "data": rows,
+            "next_cursor": encode_cursor({"d": "next", "o": offset + limit}) if len(rows) == limit else None,
+            "prev_cursor": encode_cursor({"d": "prev", "o": max(0, offset - limit)}) if offset else None,
+        }
+
+    params = {
+        "select": "*",
+        "order": "generated_at.desc,id.desc" if forward else "generated_at.asc,id.asc",
+        "limit": limit + 1,  # One extra row tells whether another page exists
+    }
+    if asset: params["asset"] = f"eq.{asset}"
+    if state: params["state"] = f"eq.{state}"
+    if "g" in position:
+        op = "lt" if forward else "gt"
+        g, i = position["g"], position["i"]
+        params["or"] = f'(generated_at.{op}."{g}",and(generated_at.eq."{g}",id.{op}."{i}"))'
+        # Plain range on the leading index column, so the planner seeks instead of scanning the OR
+        params["generated_at"] = f'{"lte" if forward else "gte"}.{g}'
+
+    resp = await http_client.aget(
+        f"{sb_url}/rest/v1/fx_signals", params=params,
+        headers={"apikey": sb_key, "Authorization": f"Bearer {sb_key}"}, timeout=5,
+    )
+    resp.raise_for_status()
+    rows = resp.json()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+    return cursor_page(rows, more, position)
+
+def cursor_page(rows, more, position):
+    """Response body for a keyset page (rows already in display order)"""
+    forward = position["d"] == "next"
+
+    def _at(row, direction):
+        return encode_cursor({"d": direction, "g": row["generated_at"], "i": row["id"]})
+
+    has_next = more if forward else bool(rows)
+    has_prev = ("g" in position) if forward else more
+    return {
+        "data": rows,
+        "next_cursor": _at(rows[-1], "next") if rows and has_next else None,
+        "prev_cursor": _at(rows[0], "prev") if rows and has_prev else None,
+    }
+
+async def fetch_history(key):
+    """Upstream fetch for the history cache; raises so stale pages can be served"""
+    asset, state, limit, offset, cursor = key
+    if cursor is not None:
+        return await fetch_history_page(asset, state, limit, cursor)
+
+    params = {"limit": limit, "offset": offset}
+    if asset: params["asset"] = asset
+    if state: params["state"] = state
+    
+    resp = await http_client.aget(AI_CORE_SIGNALS_API, params=params, timeout=5)
+    resp.raise_for_status()
+    return resp.json()
+
+history_cache = HistoryCache(fetch_history)
+tick_store.add_listener(feed_prober.on_tick)
+
+def _restore_history(entries, age):
+    # JSON turned the tuple keys into lists; restored pages start stale so they refresh on first read
+    for key, value in entries:
+        history_cache.prime(tuple(key), value, max(age, history_cache.ttl))
+
+warm_state.register(
+    "history_cache",
+    lambda: [[list(key), value] for key, value in history_cache.export(WARM_HISTORY_KEYS)],
+    _restore_history,
+)
+
+async def warm_up():
+    """Fill the signal caches without holding up startup (they are never restored from a snapshot)"""
+    try:
+        await asyncio.gather(get_latest_signal_safe_async(), get_active_signals_safe_async())
+    except Exception as e:
+        log.warning("⚠️ Warm-up fetch failed", error=str(e))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lifespan_started = time.perf_counter()
+    migrate_legacy_execution_log()
+    warm_state.restore()
+    warm_state.mark_ready(BOOT_STARTED, lifespan_started)
+    # Per worker: its own caches, its own SSE clients, its own Telegram sender
+    worker_tasks = [
+        asyncio.create_task(warm_up()),
+        asyncio.create_task(broadcaster.run()),
+        asyncio.create_task(history_cache.run_refresher()),
+    ]
+    outbox.start()
+    # Once per deployment: only the elected leader runs these (see leader.py)
+    election = asyncio.create_task(leader.run())
+    yield
+    election.cancel()
+    was_leader = leader.is_leader
+    leader.stop()
+    await broadcasts.stop()
+    await outbox.stop()
+    for task in worker_tasks:
+        task.cancel()
+    if was_leader:
+        try:
+            warm_state.save()
+        except Exception as e:
+            log.warning("⚠️ Warm state not saved on shutdown", error=str(e))
+    await http_client.aclose()
+
+# With the replica on, telemetry is fed from its change stream instead of polling
+leader.register(lambda: replica.run() if replica.enabled else telemetry.run())
+leader.register(broadcasts.resume)  # outbox is already running when the election loop starts
+leader.register(lambda: stream_twelve_data(tick_store))
+if os.getenv("TICK_REPLAY_FILE"):
+    leader.register(lambda: replay_file(tick_store, os.getenv("TICK_REPLAY_FILE"), float(os.getenv("TICK_REPLAY_SPEED", "1"))))
+if os.getenv("TICK_REPLAY_PORT"):
+    leader.register(lambda: serve_socket_replay(tick_store, port=int(os.getenv("TICK_REPLAY_PORT"))))
+leader.register(watcher.run)
+leader.register(feed_prober.run)
+leader.register(warm_state.run)
+
+app = FastAPI(lifespan=lifespan)
 
 # Only ONE signal allowed per session
 def load_persisted_signal():
+    """Legacy execution_log.json (pre state store); only read to migrate it"""
     try:
         if os.path.exists("execution_log.json"):
             with open("execution_log.json", "r") as f:
@@ -28,33 +221,36 @@ def load_persisted_signal():
                     # DAILY RESET REMOVED per user request
                     return data
     except Exception as e:
-        print(f"⚠️ Failed to load persistent log: {e}")
+        log.warning("⚠️ Failed to load persistent log", error=str(e))
     return None
 
 def get_active_signal():
-    """Returns the current signal if it's from today, otherwise clears it."""
-    global CURRENT_SIGNAL
-    
-    if CURRENT_SIGNAL:
-        # DAILY RESET REMOVED per user request
-        pass
-    
-    # If still None, try reloading from file (but load_persisted_signal also checks date)
-    if CURRENT_SIGNAL is None:
-        CURRENT_SIGNAL = load_persisted_signal()
-        
-    return CURRENT_SIGNAL
+    """Executed signal shared by every worker (cached until another worker writes)"""
+    # DAILY RESET REMOVED per user request
+    return execution_state.get(CURRENT_SIGNAL_KEY)
 
-CURRENT_SIGNAL = load_persisted_signal()
+def migrate_legacy_execution_log():
+    """One-time copy of execution_log.json into the state store (run at startup, not import)"""
+    if execution_state.version(CURRENT_SIGNAL_KEY) == 0:
+        legacy_signal = load_persisted_signal()
+        if legacy_signal:
+            execution_state.compare_and_set(CURRENT_SIGNAL_KEY, legacy_signal, 0)
 
 @app.middleware("http")
 async def observability_layer(request: Request, call_next):
-    print(f"📡 [{request.method}] {request.url.path}")
+    started = time.perf_counter()
     try:
-        return await call_next(request)
+        response = await call_next(request)
     except Exception as e:
-        print(f"🔥 CRITICAL ERROR: {repr(e)}")
-        return JSONResponse(status_code=500, content={"status": "error"})
+        log.error("🔥 CRITICAL ERROR", path=request.url.path, error=repr(e))
+        response = JSONResponse(status_code=500, content={"status": "error"})
+    # Route template (not the raw path) keeps label cardinality bounded
+    route = request.scope.get("route")
+    elapsed = time.perf_counter() - started
+    metrics.observe_route(request.method, getattr(route, "path", "unmatched"), response.status_code, elapsed)
+    log.info("📡 request", method=request.method, path=request.url.path, status=response.status_code,
+             ms=round(elapsed * 1000, 2), sample=True)
+    return response
 
 app.add_middleware(
     CORSMiddleware,
@@ -64,63 +260,97 @@ app.add_middleware(
 )
 
 @app.get("/health")
-def health():
+async def health():
     return {
         "status": "ok", 
         "market_open": is_market_open(),
         "telegram_token_set": bool(os.getenv("TELEGRAM_BOT_TOKEN")),
         "supabase_url_set": bool(os.getenv("SUPABASE_URL")),
-        "supabase_key_set": bool(os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY"))
+        "supabase_key_set": bool(os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")),
+        "signal_cache": get_signal_cache_stats(),
+        "http_pool": get_pool_stats(),
+        "history_cache": history_cache.get_stats(),
+        "signal_stream": broadcaster.get_stats(),
+        "telegram_queue": outbox.get_stats(),
+        "broadcasts": broadcasts.get_stats(),
+        "telemetry": telemetry.get_stats(),
+        "signal_replica": replica.get_stats(),
+        "execution_state": execution_state.get_stats(),
+        "leader": leader.get_stats(),
+        "startup": warm_state.get_stats(),
+        "request_budget": budget.get_stats(),
+        "ticks": tick_store.get_stats(),
+        "data_feed": feed_prober.get_stats(),
+        "signal_watcher": watcher.get_stats(),
+        "latency": metrics.get_stats(),
+        "logging": structured_log.get_stats()
     }
 
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape: per-route and per-upstream latency histograms"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/data-feed/health")
 def data_feed_health():
     """
     Data feed health status endpoint
-    Shows if external market data is available
+    Shows if external market data is available (rolling probe stats, from memory)
     """
-    try:
-        if os.path.exists("data_feed_health.json"):
-            with open("data_feed_health.json", "r") as f:
-                health_data = json.load(f)
-                return health_data
-        else:
-            return {
-                "status": "unknown",
-                "reason": "No health check performed yet"
-            }
-    except Exception as e:
-        return {
-            "status": "error",
-            "reason": str(e)
-        }
+    return DataFeedMonitor.get_health_status()
 
 @app.get("/signal")
-def list_signals(
+async def list_signals(
     asset: Optional[str] = None,
     state: Optional[str] = None,
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    cursor: Optional[str] = None
 ):
-    """Bridge to Quantix AI Core for History"""
+    """
+    Bridge to Quantix AI Core for History (cached, stale-on-error).
+    Pass cursor (empty for the first page) to page by keyset instead of
+    offset; the response then carries data, next_cursor and prev_cursor.
+    """
+    if cursor is not None:
+        limit, offset = max(1, min(limit, 200)), 0
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError as e:
+                return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+    if replica.ready:
+        # Local indexed read; keeps answering with the last synced rows if Supabase is down
+        if cursor is None:
+            return replica.offset_page(asset, state, limit, max(0, offset))
+        position = decode_cursor(cursor) if cursor else {"d": "next"}
+        return cursor_page(*replica.page(asset, state, limit, position), position)
     try:
-        # Forward the request to the real AI Core
-        # Note: In a real production bridge, you might want to cache this
-        AI_CORE_BASE = "https://quantixapiserver-production.up.railway.app/api/v1/signals"
-        params = {"limit": limit, "offset": offset}
-        if asset: params["asset"] = asset
-        if state: params["state"] = state
-        
-        resp = requests.get(AI_CORE_BASE, params=params, timeout=5)
-        if resp.ok:
-            return resp.json()
-        return []
+        history = await history_cache.get((asset, state, limit, offset, cursor))
+        if history is None:
+            return {"data": [], "next_cursor": None, "prev_cursor": None} if cursor is not None else []
+        return history
     except Exception as e:
-        print(f"❌ History bridge error: {e}")
-        return []
+        log.error("❌ History bridge error", error=str(e))
+        return {"data": [], "next_cursor": None, "prev_cursor": None} if cursor is not None else []
+
+@app.get("/signal/stream")
+async def signal_stream(request: Request):
+    """Server-Sent Events: live fx_signals state transitions"""
+    return StreamingResponse(
+        broadcaster.stream(request, request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def read_latest_signal():
+    """Replica first (local lookup); the cached network path until it is ready"""
+    if replica.ready:
+        return replica.latest()
+    return await get_latest_signal_safe_async()
 
 @app.get("/signal/latest")
-def latest():
+async def latest():
     # 1. First priority: Signal already executed and locked in this session
     sig = get_active_signal()
     if sig:
@@ -129,32 +359,39 @@ def latest():
     # 2. Second priority: Check for valid ACTIVE signal in Database (Pre-execution)
     # This ensures "Real Data" is shown as soon as the Miner pushes it.
     try:
-        fresh_sig = get_latest_signal_safe()
+        fresh_sig = await read_latest_signal()
         if fresh_sig:
-            print(f"✅ Serving live signal for {fresh_sig.get('asset')}")
+            log.info("✅ Serving live signal", asset=fresh_sig.get('asset'), sample=True)
             return fresh_sig
     except Exception as e:
-        print(f"⚠️ Failed to fetch fresh signal: {e}")
+        log.warning("⚠️ Failed to fetch fresh signal", error=str(e))
 
     return JSONResponse(status_code=404, content={"status": "AWAITING_EXECUTION"})
 
+@app.get("/signal/active")
+async def active_signals():
+    """Every actionable signal across assets (batch feed for auto_executor)"""
+    if replica.ready:
+        signals = replica.active(ACTIVE_SIGNALS_LIMIT)
+    else:
+        signals = await get_active_signals_safe_async()
+    return {"count": len(signals), "signals": signals}
+
 @app.post("/signal/execute")
-def execute():
-    global CURRENT_SIGNAL
-    
+async def execute():
     if not is_market_open():
         return JSONResponse(status_code=403, content={"status": "MARKET_CLOSED"})
 
     if get_active_signal():
         return JSONResponse(status_code=409, content={"status": "ALREADY_EXECUTED"})
 
-    # Phase 1: Pure Execution
-    sig = get_latest_signal_safe()
+    # Phase 1: Pure Execution (fresh read: never execute a cached or stale signal)
+    sig = await get_latest_signal_fresh_async()
     if not sig:
         return JSONResponse(status_code=404, content={"status": "NO_ACTIVE_SIGNAL", "message": "No active signals found in Signal Genius AI [T1]"})
 
     new_signal_id = f"live-{datetime.now(timezone.utc).strftime('%Y%m%d')}-001"
-    CURRENT_SIGNAL = {
+    executed = {
         "signal_id": new_signal_id,
         "status": "EXECUTED",
         "asset": sig["asset"],
@@ -168,9 +405,49 @@ def execute():
         "mode": "LIVE" if os.getenv("LIVE_MODE") == "true" else "SIMULATION"
     }
     
-    # Save log
-    save_log(CURRENT_SIGNAL)
-    return CURRENT_SIGNAL
+    # Execute once: atomic across workers, the loser of a race sees 409
+    if not execution_state.compare_and_set(CURRENT_SIGNAL_KEY, executed, 0):
+        return JSONResponse(status_code=409, content={"status": "ALREADY_EXECUTED"})
+    return executed
+
+def broadcast_status(signal, status, price) -> bool:
+    """Queue a lifecycle notification (frontend detection or server-side watcher)"""
+    # Add status to signal object for formatter
+    signal["status"] = status
+    signal["current_price"] = price
+    payload = broadcasts.render(signal)
+
+    # Main channel gets it directly; subscriber chats through the fan-out engine
+    # Claimed once across workers: every worker's watcher sees the same hit
+    chat_id = os.getenv("TELEGRAM_CHAT_ID")
+    signal_id = signal.get("id") or signal.get("signal_id")
+    queued = False
+    if chat_id:
+        claim = f"notify:{chat_id}:{signal_id}:{status}" if signal_id is not None else None
+        if claim is None or execution_state.claim(claim):
+            queued = outbox.enqueue_payload(chat_id, {**payload, "chat_id": chat_id})
+            if not queued and claim:
+                execution_state.release(claim)  # Not sent: let the next detection retry it
+    fanned_out = broadcasts.publish(signal, payload)
+    log.info("📡 Broadcasting", status=status, signal_id=signal.get('id'), chat_id=chat_id, subscribers=fanned_out)
+    return queued or fanned_out
+
+replica.add_listener(telemetry.ingest_rows, replay=telemetry.high_water is None)
+
+# Watcher transitions drive notifications; the notify claim and the per-(signal, status)
+# broadcast key dedupe them against the frontend's /api/v1/signal/notify reports
+if os.getenv("SIGNAL_WATCHER_NOTIFY", "true").lower() == "true":
+    watcher.add_listener(lambda event: broadcast_status(event["signal"], event["status"], event["price"]))
+tick_store.add_listener(watcher.on_tick)
+
+@app.get("/api/v1/telemetry")
+async def signal_telemetry():
+    """Outcome counters (totals, win rate, confidence) maintained incrementally in memory"""
+    if not leader.is_leader:
+        telemetry.follow()
+    if telemetry.snapshot is None:
+        return JSONResponse(status_code=503, content={"status": "error", "message": "Telemetry warming up"})
+    return telemetry.snapshot
 
 @app.post("/api/v1/signal/notify")
 async def notify_hit(request: Request):
@@ -181,84 +458,88 @@ async def notify_hit(request: Request):
         status = data.get("status")
         price = data.get("price")
         
-        chat_id = os.getenv("TELEGRAM_CHAT_ID")
-        if not chat_id:
-            # Fallback to a test chat ID or log warning
-            print("⚠️ TELEGRAM_CHAT_ID not set, cannot broadcast.")
-            return {"status": "error", "message": "TELEGRAM_CHAT_ID not set"}
-
-        # Add status to signal object for formatter
-        signal["status"] = status
-        signal["current_price"] = price
-        
-        print(f"📡 Broadcasting {status} for signal {signal.get('id')} to {chat_id}")
-        send_telegram(chat_id, signal)
+        # Main channel and subscribers are both recipients: only fail when there are neither
+        if not os.getenv("TELEGRAM_CHAT_ID") and not subscribers.count():
+            log.warning("⚠️ No Telegram recipients (TELEGRAM_CHAT_ID not set, no subscribers), cannot broadcast.")
+            return {"status": "error", "message": "No Telegram recipients: TELEGRAM_CHAT_ID not set and no subscribers"}
+
+        if not broadcast_status(signal, status, price):
+            return JSONResponse(status_code=503, content={"status": "error", "message": "Telegram queue unavailable"})
         
-        return {"status": "success"}
+        return {"status": "success", "queued": True}
     except Exception as e:
-        print(f"❌ Notification API Error: {e}")
+        log.error("❌ Notification API Error", error=str(e))
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
-def save_log(signal):
-    with open("execution_log.json", "w") as f:
-        json.dump(signal, f, indent=2)
+async def reply_signal(chat_id):
+    """Resolve the /signal answer and queue it (runs off the webhook request)"""
+    try:
+        # 1. 1st Choice: Live signal in memory
+        executed = get_active_signal()
+        if executed:
+            log.info("✅ Found Live Signal in memory.", chat_id=chat_id)
+            outbox.enqueue(chat_id, executed)
+            return
+
+        # 2. 2nd Choice: Check Supabase (Hybrid Mode)
+        fresh_sig = await read_latest_signal()
+        if fresh_sig:
+            log.info("✅ Found Live Signal in Supabase.", chat_id=chat_id)
+            outbox.enqueue(chat_id, fresh_sig)
+            return
+
+        # 3. 3rd Choice: Check GitHub Logs (Fallback)
+        log.info("🔄 Checking GitHub Logs...", chat_id=chat_id)
+        try:
+            log_response = await http_client.aget(EXECUTION_LOG_API, timeout=5)
+            if log_response.is_success:
+                lines = log_response.text.strip().split('\n')
+                if lines:
+                    latest_log = json.loads(lines[-1])
+                    latest_log["status"] = "SIGNAL RECORD (Sync)"
+                    outbox.enqueue(chat_id, latest_log)
+                    return
+        except Exception as log_err:
+            log.warning("⚠️ GitHub Log fetch failed", error=str(log_err))
+
+        # 4. 4th Choice: Waiting
+        waiting_status = {
+            "status": "AWAITING_EXECUTION",
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        outbox.enqueue(chat_id, waiting_status)
+        
+    except Exception as err:
+        log.error("❌ Internal Signal Check Failed", chat_id=chat_id, error=str(err))
+        outbox.enqueue_text(chat_id, f"⚠️ System Error: {str(err)}")
+
+# Strong references so in-flight webhook replies are not garbage collected
+_background_tasks = set()
 
 @app.post("/telegram/webhook")
 async def telegram_webhook(request: Request):
     try:
         data = await request.json()
-        print(f"📥 Telegram Webhook received: {json.dumps(data)}")
         message = data.get("message", {})
         chat_id = message.get("chat", {}).get("id")
         text = message.get("text", "")
+        # Summary fields only: the full update body is never serialized on this path
+        log.info("📥 Telegram Webhook received", update_id=data.get("update_id"), chat_id=chat_id,
+                 command=text.split(" ", 1)[0] if text.startswith("/") else None, sample=True)
 
         if text.startswith("/signal") and chat_id:
-            print(f"🔍 Signal requested by chat_id: {chat_id}")
-        if text.startswith("/signal") and chat_id:
-            print(f"🔍 Signal requested by chat_id: {chat_id}")
-            
-            try:
-                # 1. 1st Choice: Live signal in memory
-                if CURRENT_SIGNAL:
-                    print("✅ Found Live Signal in memory.")
-                    send_telegram(chat_id, CURRENT_SIGNAL)
-                else:
-                    # 2. 2nd Choice: Check Supabase (Hybrid Mode)
-                    fresh_sig = get_latest_signal_safe()
-                    if fresh_sig:
-                        print("✅ Found Live Signal in Supabase.")
-                        send_telegram(chat_id, fresh_sig)
-                    else:
-                        # 3. 3rd Choice: Check GitHub Logs (Fallback)
-                        print("🔄 Checking GitHub Logs...")
-                        try:
-                            log_response = requests.get(EXECUTION_LOG_API, timeout=5)
-                            if log_response.ok:
-                                lines = log_response.text.strip().split('\n')
-                                if lines:
-                                    latest_log = json.loads(lines[-1])
-                                    latest_log["status"] = "SIGNAL RECORD (Sync)"
-                                    send_telegram(chat_id, latest_log)
-                                    return {"ok": True}
-                        except Exception as log_err:
-                            print(f"⚠️ GitHub Log fetch failed: {log_err}")
-
-                        # 4. 4th Choice: Waiting
-                        waiting_status = {
-                            "status": "AWAITING_EXECUTION",
-                            "timestamp": datetime.now(timezone.utc).isoformat()
-                        }
-                        send_telegram(chat_id, waiting_status)
-                
-            except Exception as err:
-                print(f"❌ Internal Signal Check Failed: {err}")
-                bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
-                if bot_token:
-                    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-                    requests.post(url, json={
-                        "chat_id": chat_id, 
-                        "text": f"⚠️ System Error: {str(err)}"
-                    })
+            log.info("🔍 Signal requested", chat_id=chat_id)
+            task = asyncio.create_task(reply_signal(chat_id))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        elif text.startswith("/start") and chat_id:
+            added = subscribers.subscribe(chat_id)
+            log.info("➕ Subscriber added", chat_id=chat_id, new=added)
+            outbox.enqueue_text(chat_id, "✅ Subscribed to Signal Genius AI alerts. Send /stop to unsubscribe.")
+        elif text.startswith("/stop") and chat_id:
+            subscribers.unsubscribe(chat_id)
+            log.info("➖ Subscriber removed", chat_id=chat_id)
+            outbox.enqueue_text(chat_id, "🔕 Unsubscribed. Send /start to receive alerts again.")
     except Exception as e:
-        print(f"🔥 Webhook error: {repr(e)}")
+        log.error("🔥 Webhook error", error=repr(e))
     return {"ok": True}
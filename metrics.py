@@ -0,0 +1,172 @@
+"""
+Latency Metrics
+Fixed-bucket histograms per API route and per upstream dependency
+(Supabase, AI Core, Telegram, Twelve Data, GitHub raw), exported in
+Prometheus text format at /metrics.
+
+Recording is a bisect plus a few integer increments under a lock, so it
+is cheap enough for every request; p50/p95/p99 are estimated from the
+buckets at scrape time.
+"""
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Upper bounds in seconds (log-spaced, 1 ms .. 10 s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Known upstream hosts -> dependency name (env-configured hosts added at lookup)
+UPSTREAM_HOSTS = {
+    "api.telegram.org": "telegram",
+    "api.twelvedata.com": "twelve_data",
+    "ws.twelvedata.com": "twelve_data",
+    "raw.githubusercontent.com": "github_raw",
+    "quantixapiserver-production.up.railway.app": "ai_core",
+    "signalgeniusai-production.up.railway.app": "signal_api",
+}
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with error count"""
+
+    __slots__ = ("counts", "count", "sum", "errors")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last slot = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Linear interpolation inside the bucket holding the q-th observation"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+                return lower + (upper - lower) * ((rank - seen) / n)
+            seen += n
+        return LATENCY_BUCKETS[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Histogram] = {}
+        self._upstreams: Dict[str, Histogram] = {}
+        self._hosts: Dict[str, str] = {}
+
+    def upstream_name(self, host: str) -> str:
+        name = self._hosts.get(host)
+        if name is None:
+            name = UPSTREAM_HOSTS.get(host)
+            if name is None:
+                configured = {
+                    urlsplit(os.getenv("SUPABASE_URL") or "").netloc: "supabase",
+                    urlsplit(os.getenv("TELEGRAM_API_BASE") or "").netloc: "telegram",
+                }
+                name = configured.get(host) or ("supabase" if host.endswith(".supabase.co") else host)
+            self._hosts[host] = name
+        return name
+
+    def observe_route(self, method: str, route: str, status: int, seconds: float):
+        with self._lock:
+            hist = self._routes.get((method, route))
+            if hist is None:
+                hist = self._routes[(method, route)] = Histogram()
+            hist.observe(seconds, status >= 500)
+
+    def observe_upstream(self, host: str, seconds: float, ok: bool):
+        name = self.upstream_name(host)
+        with self._lock:
+            hist = self._upstreams.get(name)
+            if hist is None:
+                hist = self._upstreams[name] = Histogram()
+            hist.observe(seconds, not ok)
+
+    def _snapshot(self):
+        with self._lock:
+            routes = {key: _copy(h) for key, h in self._routes.items()}
+            upstreams = {key: _copy(h) for key, h in self._upstreams.items()}
+        return routes, upstreams
+
+    def get_stats(self) -> Dict[str, Dict[str, dict]]:
+        """JSON view: count, error rate and p50/p95/p99 in ms"""
+        routes, upstreams = self._snapshot()
+
+        def _summary(h: Histogram) -> dict:
+            out = {"count": h.count, "error_rate": round(h.errors / h.count, 4) if h.count else 0.0}
+            for q in QUANTILES:
+                value = h.quantile(q)
+                out[f"p{int(q * 100)}_ms"] = round(value * 1000, 2) if value is not None else None
+            return out
+
+        return {
+            "routes": {f"{m} {r}": _summary(h) for (m, r), h in routes.items()},
+            "upstreams": {name: _summary(h) for name, h in upstreams.items()},
+        }
+
+    def render_prometheus(self) -> str:
+        routes, upstreams = self._snapshot()
+        lines: List[str] = []
+        _family(lines, "quantix_http_request_duration_seconds", "API request latency by route",
+                {(("method", m), ("route", r)): h for (m, r), h in routes.items()})
+        _family(lines, "quantix_upstream_request_duration_seconds", "Upstream call latency by dependency",
+                {(("upstream", name),): h for name, h in upstreams.items()})
+        return "\n".join(lines) + "\n"
+
+
+def _copy(h: Histogram) -> Histogram:
+    c = Histogram()
+    c.counts, c.count, c.sum, c.errors = list(h.counts), h.count, h.sum, h.errors
+    return c
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs, extra: Tuple = ()) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in (*pairs, *extra)) + "}"
+
+
+def _family(lines: List[str], name: str, help_text: str, series: Dict[Tuple, Histogram]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, h in series.items():
+        cumulative = 0
+        for bound, n in zip((*LATENCY_BUCKETS, "+Inf"), h.counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(labels, (('le', bound),))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {h.sum:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {h.count}")
+
+    lines.append(f"# HELP {name[:-8]}_quantile_seconds Estimated latency quantiles")
+    lines.append(f"# TYPE {name[:-8]}_quantile_seconds gauge")
+    for labels, h in series.items():
+        for q in QUANTILES:
+            value = h.quantile(q)
+            if value is not None:
+                lines.append(f"{name[:-8]}_quantile_seconds{_labels(labels, (('quantile', q),))} {value:.6f}")
+
+    errors = name.replace("_duration_seconds", "_errors_total")
+    lines.append(f"# HELP {errors} Failed calls (5xx or transport error)")
+    lines.append(f"# TYPE {errors} counter")
+    for labels, h in series.items():
+        lines.append(f"{errors}{_labels(labels)} {h.errors}")
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,150 @@
+"""
+Shared Request Budget
+Per-provider quotas for metered upstreams, shared by every process on the
+host through one SQLite file (scheduler, API server, feed monitor).
+
+- Fixed windows per provider: per UTC day and per minute
+- Priority classes: lower priorities may only spend part of each window,
+  so health probes can never starve execution
+- acquire() is atomic across processes (BEGIN IMMEDIATE) and never blocks
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from runtime_paths import data_path, prepare
+
+RATE_BUDGET_DB = os.getenv("RATE_BUDGET_DB") or data_path("rate_budget.db")
+
+# Priority classes (lower value = more important)
+EXECUTION = 0
+NORMAL = 1
+HEALTH = 2
+
+# Share of each window a priority class may consume
+PRIORITY_SHARES = {
+    EXECUTION: 1.0,
+    NORMAL: 0.9,
+    HEALTH: 0.75,
+}
+
+# 0 = no limit for that window
+PROVIDER_LIMITS = {
+    "twelve_data": {
+        "day": int(os.getenv("TWELVE_DATA_DAILY_LIMIT", "800")),
+        "minute": int(os.getenv("TWELVE_DATA_MINUTE_LIMIT", "8")),
+    },
+    "signal_api": {
+        "day": int(os.getenv("SIGNAL_API_DAILY_LIMIT", "800")),
+        "minute": int(os.getenv("SIGNAL_API_MINUTE_LIMIT", "0")),
+    },
+}
+
+
+def _windows(now: float) -> Dict[str, str]:
+    """Current window key per window kind"""
+    dt = datetime.fromtimestamp(now, timezone.utc)
+    return {"day": dt.strftime("%Y-%m-%d"), "minute": dt.strftime("%Y-%m-%dT%H:%M")}
+
+
+def _resets_in(kind: str, now: float) -> int:
+    if kind == "minute":
+        return int(60 - now % 60)
+    return int(86400 - now % 86400)
+
+
+class RequestBudget:
+    """Cross-process quota ledger"""
+
+    def __init__(self, db_path: str = RATE_BUDGET_DB, limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self.db_path = db_path
+        self.limits = limits if limits is not None else PROVIDER_LIMITS
+        self._local = threading.local()
+        self.stats = {"granted": 0, "denied": 0}
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, opened on first use (never at import)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(prepare(self.db_path), timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS usage ("
+                " provider TEXT NOT NULL, kind TEXT NOT NULL, window TEXT NOT NULL,"
+                " used INTEGER NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (provider, kind))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _usage(self, conn, provider: str, windows: Dict[str, str]) -> Dict[str, int]:
+        used = {kind: 0 for kind in windows}
+        for kind, window, count in conn.execute(
+            "SELECT kind, window, used FROM usage WHERE provider = ?", (provider,)
+        ):
+            if windows.get(kind) == window:
+                used[kind] = count  # Older windows have rolled over
+        return used
+
+    def acquire(self, provider: str, priority: int = NORMAL, cost: int = 1) -> bool:
+        """Spend cost requests if every window allows it; False = do not call"""
+        limits = self.limits.get(provider)
+        if not limits:
+            return True  # Unmetered provider
+        now = time.time()
+        windows = _windows(now)
+        share = PRIORITY_SHARES.get(priority, PRIORITY_SHARES[NORMAL])
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            used = self._usage(conn, provider, windows)
+            for kind, limit in limits.items():
+                if limit and used[kind] + cost > int(limit * share):
+                    conn.execute("ROLLBACK")
+                    self.stats["denied"] += 1
+                    return False
+            for kind, window in windows.items():
+                conn.execute(
+                    "INSERT INTO usage (provider, kind, window, used) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (provider, kind) DO UPDATE SET "
+                    " used = CASE WHEN window = excluded.window THEN used + excluded.used ELSE excluded.used END,"
+                    " window = excluded.window",
+                    (provider, kind, window, cost),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.stats["granted"] += 1
+        return True
+
+    def remaining(self, provider: str, priority: int = NORMAL) -> Dict[str, Any]:
+        """Requests left per window for a priority class (None = unlimited)"""
+        limits = self.limits.get(provider) or {}
+        now = time.time()
+        windows = _windows(now)
+        used = self._usage(self._conn(), provider, windows)
+        share = PRIORITY_SHARES.get(priority, PRIORITY_SHARES[NORMAL])
+        result = {}
+        for kind in windows:
+            limit = limits.get(kind, 0)
+            result[kind] = {
+                "used": used[kind],
+                "limit": limit or None,
+                "remaining": max(0, int(limit * share) - used[kind]) if limit else None,
+                "resets_in_seconds": _resets_in(kind, now),
+            }
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "providers": {provider: self.remaining(provider) for provider in self.limits},
+        }
+
+
+budget = RequestBudget()
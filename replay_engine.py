@@ -0,0 +1,297 @@
+"""
+Historical Replay Engine
+Streams past fx_signals rows and M1 candle (or tick) files through the
+same rules the live system uses, and writes outcome metrics:
+
+- Acceptance: SignalConsumer.is_signal_valid at the first scheduler poll
+- Lifecycle: the SignalWatcher rules (entry window, TP/SL, the signal's own
+  max trade time if it has one) via signal_watcher.resolve_path, one vector
+  scan per phase
+
+Days are independent, so they are replayed in parallel across a process
+pool.
+
+Price files:  <prices>/<SYMBOL>/<YYYY-MM-DD>.csv   (e.g. prices/EURUSD/2026-01-26.csv)
+    candles:  timestamp,open,high,low,close
+    ticks:    timestamp,price
+timestamp is epoch seconds or ISO-8601. Each candle is walked as
+open -> low -> high -> close (high before low for bearish candles).
+
+Usage:
+    python replay_engine.py --signals fx_signals.jsonl --prices prices/ --output replay_results.json
+    python replay_engine.py --supabase --start 2025-01-01 --end 2026-01-01 --prices prices/
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import http_client
+from jsonl_writer import atomic_write_json
+from signal_engine import signal_from_supabase_row
+from signal_watcher import SignalWatcher, _epoch, _symbol_key, resolve_path
+
+REPLAY_POLL_SECONDS = 120           # Scheduler poll delay before a signal is first seen
+REPLAY_SUPABASE_PAGE = 1000
+OUTCOMES = ("TP_HIT", "SL_HIT", "EXPIRED", "INCOMPLETE", "NO_DATA", "UNUSABLE")
+
+
+def _pip_size(asset: str) -> float:
+    return 0.01 if "JPY" in _symbol_key(asset) else 0.0001
+
+
+# ---- inputs ----------------------------------------------------------
+
+
+def load_signal_file(path: str) -> List[Dict[str, Any]]:
+    """fx_signals export: JSONL rows, or one JSON array"""
+    with open(path, "r") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def fetch_supabase_signals(start: str, end: str) -> List[Dict[str, Any]]:
+    """fx_signals rows with start <= generated_at < end, paged by generated_at"""
+    sb_url = os.getenv("SUPABASE_URL")
+    sb_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
+    if not (sb_url and sb_key):
+        raise ValueError("SUPABASE_URL / SUPABASE_KEY not configured")
+
+    rows, cursor = [], start
+    while True:
+        resp = http_client.get(
+            f"{sb_url}/rest/v1/fx_signals",
+            params={
+                "select": "*",  # Per-signal limits (activation_limit_mins, max_monitoring_mins, meta) included
+                "and": f"(generated_at.gt.{cursor},generated_at.lt.{end})" if rows else f"(generated_at.gte.{cursor},generated_at.lt.{end})",
+                "order": "generated_at.asc",
+                "limit": REPLAY_SUPABASE_PAGE,
+            },
+            headers={"apikey": sb_key, "Authorization": f"Bearer {sb_key}"},
+            timeout=30,
+        )
+        resp.raise_for_status()
+        page = resp.json()
+        rows.extend(page)
+        if len(page) < REPLAY_SUPABASE_PAGE:
+            return rows
+        cursor = page[-1]["generated_at"]
+
+
+def _parse_time_column(values: List[str]) -> np.ndarray:
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        return np.array([_epoch(v) for v in values], dtype=np.float64)
+
+
+def load_price_path(prices_dir: str, symbol: str, day: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(timestamps, prices) for one symbol-day; candles expand to 4 points each"""
+    path = os.path.join(prices_dir, _symbol_key(symbol), f"{day}.csv")
+    if not os.path.exists(path):
+        return np.empty(0), np.empty(0)
+    with open(path, "r") as f:
+        rows = [line.strip().split(",") for line in f if line.strip() and line[0] not in "#tT"]
+    if not rows:
+        return np.empty(0), np.empty(0)
+
+    cols = list(zip(*rows))
+    ts = _parse_time_column(list(cols[0]))
+    if len(cols) == 2:
+        return ts, np.array(cols[1], dtype=np.float64)
+
+    o, h, l, c = (np.array(col, dtype=np.float64) for col in cols[1:5])
+    bullish = c >= o
+    # Bullish candles dip first, bearish candles spike first
+    first = np.where(bullish, l, h)
+    second = np.where(bullish, h, l)
+    times = np.stack([ts, ts + 15, ts + 30, ts + 59], axis=1).ravel()
+    prices = np.stack([o, first, second, c], axis=1).ravel()
+    return times, prices
+
+
+# ---- worker ----------------------------------------------------------
+
+
+def _iso(epoch: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat() if epoch is not None else None
+
+
+def _accepted(row: Dict[str, Any], poll_seconds: float, ttl_minutes: float) -> bool:
+    # Only the (pure) validator is used: nothing here opens stores, logs or network
+    from auto_executor import SignalConsumer
+    generated = _epoch(row.get("generated_at"))
+    if generated is None:
+        return False
+    seen_at = datetime.fromtimestamp(generated + poll_seconds, timezone.utc)
+    return SignalConsumer.is_signal_valid(signal_from_supabase_row(row), seen_at, ttl_minutes)
+
+
+def replay_day(day: str, rows: List[Dict[str, Any]], prices_dir: str, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Replay one day's signals; returns one outcome record per signal"""
+    entry_window = options["entry_window_minutes"] * 60
+    max_trade = options["max_duration_minutes"] * 60 if options.get("max_duration_minutes") else None
+
+    next_day = (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    results = []
+    by_asset = defaultdict(list)
+    for row in rows:
+        by_asset[row.get("asset", "EUR/USD")].append(row)
+
+    for asset, asset_rows in by_asset.items():
+        # Trades can outlive the day (no fixed lifetime), so they may finish on the next day's file
+        ts, px = load_price_path(prices_dir, asset, day)
+        ts_b, px_b = load_price_path(prices_dir, asset, next_day)
+        ts, px = np.concatenate([ts, ts_b]), np.concatenate([px, px_b])
+
+        pip = _pip_size(asset)
+        for row in asset_rows:
+            # Replayed from scratch; the recorded status is only compared against
+            normalized = SignalWatcher.normalize({**row, "status": "PUBLISHED"}, max_trade, entry_window)
+            if normalized is None:
+                results.append({"signal_id": row.get("id"), "asset": asset, "outcome": "UNUSABLE"})
+                continue
+            generated = normalized[5]
+            resolved = resolve_path(normalized, ts, px) if len(ts) else {"outcome": "NO_DATA"}
+            outcome, entry_ts, closed_ts = resolved["outcome"], resolved.get("entry_ts"), resolved.get("closed_ts")
+            entry, tp, sl = normalized[2:5]
+            pips = None
+            if outcome == "TP_HIT":
+                pips = abs(tp - entry) / pip
+            elif outcome == "SL_HIT":
+                pips = -abs(entry - sl) / pip
+            results.append({
+                "signal_id": row["id"],
+                "asset": asset,
+                "direction": row.get("direction"),
+                "generated_at": row.get("generated_at"),
+                "accepted": _accepted(row, options["poll_seconds"], options["ttl_minutes"]),
+                "outcome": outcome,
+                "recorded_status": (row.get("status") or row.get("state") or "").upper() or None,
+                "entry_hit_at": _iso(entry_ts),
+                "closed_at": _iso(closed_ts),
+                "minutes_to_entry": round((entry_ts - generated) / 60, 2) if entry_ts is not None else None,
+                "minutes_open": round((closed_ts - generated) / 60, 2) if closed_ts is not None else None,
+                "pips": round(pips, 1) if pips is not None else None,
+            })
+    return results
+
+
+# ---- metrics ---------------------------------------------------------
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _block(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        counts = {outcome: 0 for outcome in OUTCOMES}
+        for r in items:
+            counts[r["outcome"]] += 1
+        decided = counts["TP_HIT"] + counts["SL_HIT"]
+        pips = [r["pips"] for r in items if r.get("pips") is not None]
+        entries = [r["minutes_to_entry"] for r in items if r.get("minutes_to_entry") is not None]
+        replayed = len(items) - counts["UNUSABLE"] - counts["NO_DATA"]
+        return {
+            "signals": len(items),
+            **counts,
+            "entry_fill_rate": round(len(entries) / replayed, 4) if replayed else None,
+            "win_rate": round(counts["TP_HIT"] / decided, 4) if decided else None,
+            "total_pips": round(sum(pips), 1),
+            "expectancy_pips": round(sum(pips) / len(pips), 2) if pips else None,
+            "median_minutes_to_entry": float(np.median(entries)) if entries else None,
+        }
+
+    recorded = [r for r in results if r.get("recorded_status") in ("TP_HIT", "SL_HIT", "EXPIRED")]
+    agree = sum(1 for r in recorded if r["recorded_status"] == r["outcome"])
+    by_asset = defaultdict(list)
+    for r in results:
+        by_asset[r["asset"]].append(r)
+    return {
+        "all": _block(results),
+        "accepted": _block([r for r in results if r.get("accepted")]),
+        "rejected": _block([r for r in results if r.get("accepted") is False]),
+        "by_asset": {asset: _block(items) for asset, items in sorted(by_asset.items())},
+        "agreement_with_recorded": round(agree / len(recorded), 4) if recorded else None,
+    }
+
+
+def run_replay(rows: List[Dict[str, Any]], prices_dir: str, workers: Optional[int] = None,
+               options: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    options = {
+        "poll_seconds": REPLAY_POLL_SECONDS,
+        "ttl_minutes": 90,
+        "entry_window_minutes": 35,
+        "max_duration_minutes": None,  # Fallback for signals without their own limit (None = TP/SL only)
+        **(options or {}),
+    }
+    days = defaultdict(list)
+    for row in rows:
+        generated = _epoch(row.get("generated_at"))
+        if generated is not None:
+            days[datetime.fromtimestamp(generated, timezone.utc).strftime("%Y-%m-%d")].append(row)
+
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(replay_day, day, day_rows, prices_dir, options) for day, day_rows in sorted(days.items())]
+        for future in futures:
+            results.extend(future.result())
+    metrics = summarize(results)
+    metrics["days"] = len(days)
+    metrics["options"] = options
+    return metrics, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay historical signals through the live rules")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--signals", help="fx_signals export (JSONL or JSON array)")
+    source.add_argument("--supabase", action="store_true", help="Fetch fx_signals from Supabase")
+    parser.add_argument("--start", help="First day (with --supabase)")
+    parser.add_argument("--end", help="Day after the last one (with --supabase)")
+    parser.add_argument("--prices", required=True, help="Directory of <SYMBOL>/<YYYY-MM-DD>.csv files")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--poll-seconds", type=float, default=REPLAY_POLL_SECONDS)
+    parser.add_argument("--ttl-minutes", type=float, default=90)
+    parser.add_argument("--entry-window-minutes", type=float, default=35)
+    parser.add_argument("--max-duration-minutes", type=float, default=None,
+                        help="Max trade time after entry for signals that do not set one")
+    parser.add_argument("--output", default="replay_results.json")
+    parser.add_argument("--details", help="Optional JSONL file with one outcome per signal")
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    if args.supabase:
+        if not (args.start and args.end):
+            parser.error("--supabase needs --start and --end")
+        rows = fetch_supabase_signals(args.start, args.end)
+    else:
+        rows = load_signal_file(args.signals)
+    print(f"🔁 Replaying {len(rows)} signals against {args.prices}")
+
+    metrics, results = run_replay(rows, args.prices, args.workers, {
+        "poll_seconds": args.poll_seconds,
+        "ttl_minutes": args.ttl_minutes,
+        "entry_window_minutes": args.entry_window_minutes,
+        "max_duration_minutes": args.max_duration_minutes,
+    })
+    metrics["elapsed_seconds"] = round(time.time() - started, 2)
+    atomic_write_json(args.output, metrics, indent=2)
+    if args.details:
+        with open(args.details, "w") as f:
+            for r in results:
+                f.write(json.dumps(r) + "\n")
+
+    print(f"📊 {json.dumps(metrics['all'])}")
+    print(f"✅ Replay finished in {metrics['elapsed_seconds']}s -> {args.output}")
+    return metrics
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
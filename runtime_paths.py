@@ -0,0 +1,28 @@
+"""
+Runtime State Paths
+Where the service keeps its local state (SQLite stores, checkpoints,
+snapshots): DATA_DIR, default ./data. Nothing is created at import time;
+stores call prepare() when they first open their file.
+"""
+import os
+
+DATA_DIR = os.getenv("DATA_DIR", "data")
+
+
+def data_path(name: str) -> str:
+    """
+    DATA_DIR/name, unless a file of that name already sits in the working
+    directory from before DATA_DIR existed (keep using it, don't orphan it)
+    """
+    path = os.path.join(DATA_DIR, name)
+    if os.path.exists(name) and not os.path.exists(path):
+        return name
+    return path
+
+
+def prepare(path: str) -> str:
+    """Create the parent directory of a state file on first use"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return path
@@ -1,10 +1,16 @@
+import asyncio
 import os
 import random
-import requests
+import http_client
 import sys
+import threading
+import time
 from datetime import datetime, timezone
+from typing import Optional
 
-from datetime import datetime, timezone
+from structured_log import get_logger
+
+log = get_logger("signal_engine")
 
 # Legacy API (Fallback)
 # AI_CORE_API = "https://quantixapiserver-production.up.railway.app/api/v1/active"
@@ -19,9 +25,15 @@ except ImportError:
 LIVE_MODE = os.getenv("LIVE_MODE", "false").lower() == "true"
 AI_CORE_API = "https://quantixapiserver-production.up.railway.app/api/v1/active"
 
-def is_market_open():
+# Signal cache: fresh for TTL, then served stale (while one refresh runs) for STALE more seconds
+SIGNAL_CACHE_TTL_SECONDS = float(os.getenv("SIGNAL_CACHE_TTL_SECONDS", "5"))
+SIGNAL_CACHE_STALE_SECONDS = float(os.getenv("SIGNAL_CACHE_STALE_SECONDS", "60"))
+# Hard limit: past this age a failed refresh yields None, never the last value
+SIGNAL_CACHE_MAX_AGE_SECONDS = float(os.getenv("SIGNAL_CACHE_MAX_AGE_SECONDS", "300"))
+
+def is_market_open(now_utc: Optional[datetime] = None):
     """Forex market hours: Open Sunday 22:00 UTC to Friday 22:00 UTC"""
-    now_utc = datetime.now(timezone.utc)
+    now_utc = now_utc or datetime.now(timezone.utc)
     weekday = now_utc.weekday()  # 0=Mon, 4=Fri, 5=Sat, 6=Sun
     hour = now_utc.hour
 
@@ -34,74 +46,301 @@ def is_market_open():
     
     return True
 
-def consume_ai_core_signal():
-    """CONSUMPTION ONLY [T3]: Fetches signal from Immutable Record [T1]"""
+# Max actionable signals pulled per batch (all assets)
+ACTIVE_SIGNALS_LIMIT = int(os.getenv("ACTIVE_SIGNALS_LIMIT", "20"))
+
+def signal_from_supabase_row(latest):
+    # print(f"✅ Extracted signal from Supabase: {latest.get('id')}")
+    return {
+        "signal_id": latest.get("id"),
+        "asset": latest.get("asset", "EUR/USD"),
+        "direction": latest.get("direction", "NEUTRAL"),
+        "strength": "(HIGH)" if float(latest.get("ai_confidence", 0)) > 0.8 else "(MID)",
+        "entry": float(latest.get("entry_low", 0)),
+        "tp": float(latest.get("tp", 0)),
+        "sl": float(latest.get("sl", 0)),
+        "confidence": int(float(latest.get("ai_confidence", 0)) * 100),
+        "strategy": latest.get("strategy", "Quantix Core [Hybrid]"),
+        "validity": 90,
+        "validity_passed": 0,
+        "volatility": "Verified",
+        "timestamp": latest.get("generated_at")
+    }
+
+def _signal_from_legacy_row(latest):
+    return {
+        "signal_id": latest.get("id", "legacy-001"),
+        "asset": latest["asset"],
+        "direction": latest["direction"],
+        "strength": "(HIGH)" if latest["ai_confidence"] > 0.8 else "(MID)",
+        "entry": float(latest.get("entry_low", 0)),
+        "tp": float(latest.get("tp", 0)),
+        "sl": float(latest.get("sl", 0)),
+        "confidence": int(latest["ai_confidence"] * 100),
+        "strategy": "Quantix Core [Legacy]",
+        "validity": 90,
+        "validity_passed": 0,
+        "volatility": "Verified via Core",
+        "timestamp": latest["generated_at"]
+    }
+
+def _signal_request(limit: int = 1):
+    """Returns (url, headers, row parser) for the configured signal source"""
     sb_url = os.getenv("SUPABASE_URL")
     sb_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
     
     if sb_url and sb_key:
+        # 1. NEW: Try Supabase Direct (Primary)
+        # Fetch signals that are either waiting for entry or already hit entry
+        url = f"{sb_url}/rest/v1/fx_signals?select=*&status=in.(PUBLISHED,ENTRY_HIT)&order=generated_at.desc&limit={limit}"
+        headers = {
+            "apikey": sb_key, 
+            "Authorization": f"Bearer {sb_key}",
+            "Content-Type": "application/json"
+        }
+        return url, headers, signal_from_supabase_row
+    
+    # Fallback to legacy only if Supabase is NOT configured
+    return AI_CORE_API, {}, _signal_from_legacy_row
+
+def _fetch_ai_core_signal():
+    """
+    Upstream fetch behind consume_ai_core_signal.
+    Returns the signal (or None when there is none) and raises on upstream
+    failure, so the cache can tell "no signal" apart from "Supabase is down".
+    """
+    url, headers, parse = _signal_request()
+    resp = http_client.get(url, headers=headers, timeout=5)
+    resp.raise_for_status()
+    rows = resp.json()
+    return parse(rows[0]) if rows else None
+
+async def _fetch_ai_core_signal_async():
+    """Async twin of _fetch_ai_core_signal for the API event loop"""
+    url, headers, parse = _signal_request()
+    resp = await http_client.aget(url, headers=headers, timeout=5)
+    resp.raise_for_status()
+    rows = resp.json()
+    return parse(rows[0]) if rows else None
+
+def _fetch_active_signals():
+    """Every actionable signal (all assets) in one upstream call, newest first"""
+    url, headers, parse = _signal_request(ACTIVE_SIGNALS_LIMIT)
+    resp = http_client.get(url, headers=headers, timeout=5)
+    resp.raise_for_status()
+    return [parse(row) for row in (resp.json() or [])[:ACTIVE_SIGNALS_LIMIT]]
+
+async def _fetch_active_signals_async():
+    url, headers, parse = _signal_request(ACTIVE_SIGNALS_LIMIT)
+    resp = await http_client.aget(url, headers=headers, timeout=5)
+    resp.raise_for_status()
+    return [parse(row) for row in (resp.json() or [])[:ACTIVE_SIGNALS_LIMIT]]
+
+def consume_ai_core_signal():
+    """CONSUMPTION ONLY [T3]: Fetches signal from Immutable Record [T1]"""
+    try:
+        return _fetch_ai_core_signal()
+    except Exception as e:
+        log.warning("⚠️ Signal fetch failed", error=str(e))
+        return None
+
+
+class SignalCache:
+    """
+    Single-flight TTL cache in front of an upstream fetch.
+    - Fresh (age < ttl): served from memory
+    - Stale (age < ttl + stale_ttl): served from memory, one background refresh
+    - Expired/empty: one caller fetches, concurrent callers wait for its result
+    Upstream errors keep the previous value instead of replacing it with None,
+    but only up to max_age; older than that, an error returns None.
+    get() serves threads (scheduler, scripts); aget() serves the API event loop;
+    aget_fresh() always waits for a new fetch (execution must not act on stale data).
+    """
+    
+    def __init__(self, fetch, ttl: float, stale_ttl: float, name: str = "signal", afetch=None,
+                 max_age: float = SIGNAL_CACHE_MAX_AGE_SECONDS):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_age = max(max_age, ttl + stale_ttl)
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = None  # time.monotonic() of last successful fetch
+        self._inflight = None    # threading.Event while a fetch is running
+        self._afetch = afetch
+        self._atask = None       # asyncio.Task while an async fetch is running
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "errors": 0}
+    
+    def _age(self):
+        if self._fetched_at is None:
+            return None
+        return time.monotonic() - self._fetched_at
+    
+    def _usable(self):
+        """Last value, unless it is older than max_age (call with the lock held)"""
+        age = self._age()
+        return self._value if age is not None and age < self.max_age else None
+    
+    def _store(self, value):
+        with self._lock:
+            self._value = value
+            self._fetched_at = time.monotonic()
+            self.stats["refreshes"] += 1
+    
+    def _store_error(self, error):
+        log.warning("⚠️ Cache refresh failed", cache=self.name, error=str(error))
+        with self._lock:
+            self.stats["errors"] += 1
+    
+    def _refresh(self):
+        """Run the upstream fetch; only ever called by the single in-flight leader"""
         try:
-            # 1. NEW: Try Supabase Direct (Primary)
-            # Fetch signals that are either waiting for entry or already hit entry
-            url = f"{sb_url}/rest/v1/fx_signals?select=*&status=in.(PUBLISHED,ENTRY_HIT)&order=generated_at.desc&limit=1"
-            headers = {
-                "apikey": sb_key, 
-                "Authorization": f"Bearer {sb_key}",
-                "Content-Type": "application/json"
-            }
-            resp = requests.get(url, headers=headers, timeout=5)
+            self._store(self._fetch())
+        except Exception as e:
+            self._store_error(e)
+        finally:
+            with self._lock:
+                event, self._inflight = self._inflight, None
+            event.set()
+        with self._lock:
+            return self._usable()
+    
+    def get(self):
+        with self._lock:
+            age = self._age()
+            if age is not None and age < self.ttl:
+                self.stats["hits"] += 1
+                return self._value
             
-            if resp.ok:
-                data = resp.json()
-                if data:
-                    latest = data[0]
-                    # print(f"✅ Extracted signal from Supabase: {latest.get('id')}")
-                    return {
-                        "signal_id": latest.get("id"),
-                        "asset": latest.get("asset", "EUR/USD"),
-                        "direction": latest.get("direction", "NEUTRAL"),
-                        "strength": "(HIGH)" if float(latest.get("ai_confidence", 0)) > 0.8 else "(MID)",
-                        "entry": float(latest.get("entry_low", 0)),
-                        "tp": float(latest.get("tp", 0)),
-                        "sl": float(latest.get("sl", 0)),
-                        "confidence": int(float(latest.get("ai_confidence", 0)) * 100),
-                        "strategy": latest.get("strategy", "Quantix Core [Hybrid]"),
-                        "validity": 90,
-                        "validity_passed": 0,
-                        "volatility": "Verified",
-                        "timestamp": latest.get("generated_at")
-                    }
-        except Exception as sb_err:
-            print(f"⚠️ Supabase fetch failed: {sb_err}")
-
-    # Fallback to legacy only if Supabase is NOT configured
-    if not (sb_url and sb_key):
+            if age is not None and age < self.ttl + self.stale_ttl:
+                # Stale-while-revalidate: answer now, refresh once in background
+                self.stats["stale_hits"] += 1
+                if self._inflight is None:
+                    self._inflight = threading.Event()
+                    threading.Thread(target=self._refresh, daemon=True).start()
+                return self._value
+            
+            if self._inflight is None:
+                self._inflight = threading.Event()
+                self.stats["misses"] += 1
+                leader = True
+            else:
+                event = self._inflight
+                self.stats["coalesced"] += 1
+                leader = False
+        
+        if leader:
+            return self._refresh()
+        
+        # Follower: wait for the leader instead of issuing a second upstream call
+        event.wait(timeout=10)
+        with self._lock:
+            return self._usable()
+    
+    async def _arefresh(self):
         try:
-            response = requests.get(AI_CORE_API, timeout=5)
-            if response.ok:
-                signals = response.json()
-                if signals:
-                    latest = signals[0]
-                    return {
-                        "signal_id": latest.get("id", "legacy-001"),
-                        "asset": latest["asset"],
-                        "direction": latest["direction"],
-                        "strength": "(HIGH)" if latest["ai_confidence"] > 0.8 else "(MID)",
-                        "entry": float(latest.get("entry_low", 0)),
-                        "tp": float(latest.get("tp", 0)),
-                        "sl": float(latest.get("sl", 0)),
-                        "confidence": int(latest["ai_confidence"] * 100),
-                        "strategy": "Quantix Core [Legacy]",
-                        "validity": 90,
-                        "validity_passed": 0,
-                        "volatility": "Verified via Core",
-                        "timestamp": latest["generated_at"]
-                    }
+            self._store(await self._afetch())
         except Exception as e:
-            pass
+            self._store_error(e)
+        finally:
+            with self._lock:
+                self._atask = None
+    
+    async def aget(self):
+        with self._lock:
+            age = self._age()
+            if age is not None and age < self.ttl:
+                self.stats["hits"] += 1
+                return self._value
             
-    return None
+            if age is not None and age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                if self._atask is None:
+                    self._atask = asyncio.ensure_future(self._arefresh())
+                return self._value
+            
+            if self._atask is None:
+                self._atask = asyncio.ensure_future(self._arefresh())
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+            task = self._atask
+        
+        # Shielded so a disconnecting client does not cancel the shared fetch
+        await asyncio.shield(task)
+        with self._lock:
+            return self._usable()
+    
+    async def aget_fresh(self):
+        """Value from a fetch that finished after this call; None if it failed"""
+        started = time.monotonic()
+        with self._lock:
+            if self._atask is None:
+                self._atask = asyncio.ensure_future(self._arefresh())
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+            task = self._atask
+        await asyncio.shield(task)
+        with self._lock:
+            fresh = self._fetched_at is not None and self._fetched_at >= started
+            return self._value if fresh else None
+    
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = None
+    
+    def get_stats(self):
+        with self._lock:
+            age = self._age()
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+        stats["age_seconds"] = round(age, 3) if age is not None else None
+        stats["ttl_seconds"] = self.ttl
+        stats["max_age_seconds"] = self.max_age
+        return stats
+
+
+_signal_cache = SignalCache(
+    _fetch_ai_core_signal,
+    SIGNAL_CACHE_TTL_SECONDS,
+    SIGNAL_CACHE_STALE_SECONDS,
+    afetch=_fetch_ai_core_signal_async,
+)
+
+_active_signals_cache = SignalCache(
+    _fetch_active_signals,
+    SIGNAL_CACHE_TTL_SECONDS,
+    SIGNAL_CACHE_STALE_SECONDS,
+    name="active signals",
+    afetch=_fetch_active_signals_async,
+)
+
+def get_signal_cache_stats():
+    return _signal_cache.get_stats()
+
+def invalidate_signal_cache():
+    """Force the next read to refetch (called when a state change is detected)"""
+    _signal_cache.invalidate()
+    _active_signals_cache.invalidate()
 
 def get_latest_signal_safe():
-    """Execution Layer Entry [T3]"""
-    return consume_ai_core_signal()
+    """Execution Layer Entry [T3] (cached, single-flight)"""
+    return _signal_cache.get()
+
+async def get_latest_signal_safe_async():
+    """Latest signal for async read handlers (cached, single-flight)"""
+    return await _signal_cache.aget()
+
+async def get_latest_signal_fresh_async():
+    """Execution Layer Entry [T3]: always a new upstream read, None if it fails"""
+    return await _signal_cache.aget_fresh()
+
+def get_active_signals_safe():
+    """Batch Execution Entry [T3]: all actionable signals (cached, single-flight)"""
+    return _active_signals_cache.get() or []
+
+async def get_active_signals_safe_async():
+    return await _active_signals_cache.aget() or []
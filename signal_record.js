@@ -153,6 +153,14 @@ async function fetchFromSupabase(endpoint) {
     }
 
     if (endpoint.includes('/telemetry')) {
+        // Server-side counters first; the full-table scan below is the last resort
+        try {
+            const aggRes = await fetch(`${window.CONFIG.EXECUTION_API}/api/v1/telemetry`);
+            if (aggRes.ok) return await aggRes.json();
+        } catch (e) {
+            console.warn("⚠️ Telemetry endpoint unavailable, counting from Supabase:", e.message);
+        }
+
         const statsRes = await fetch(`${baseUrl}/fx_signals?select=state,ai_confidence`, { headers });
         const data = await statsRes.json();
 
@@ -615,13 +623,36 @@ document.addEventListener('DOMContentLoaded', () => {
     if (nextBtn) nextBtn.addEventListener('click', () => changePage(1));
 
     setInterval(() => {
-        if (activeTab === 'overview' || activeTab === 'active') fetchLatestSignal();
+        // Live stream pushes changes; only poll when it is unavailable
+        if (!signalStreamConnected && (activeTab === 'overview' || activeTab === 'active')) fetchLatestSignal();
         if (activeTab === 'logs') fetchLogs();
     }, 10000); // Increased sync to 10s to match Telesignal
 
+    initSignalStream();
     initPriceFeed();
 });
 
+// === LIVE SIGNAL STREAM (SSE) ===
+let signalStreamConnected = false;
+
+function initSignalStream() {
+    const url = window.CONFIG?.SIGNAL_STREAM_URL;
+    if (!url || typeof EventSource === 'undefined') return;
+
+    const source = new EventSource(url);
+    source.onopen = () => { signalStreamConnected = true; };
+    source.onerror = () => { signalStreamConnected = false; }; // EventSource reconnects on its own
+
+    ['PUBLISHED', 'ENTRY_HIT', 'TP_HIT', 'SL_HIT', 'EXPIRED'].forEach(state => {
+        source.addEventListener(state, (event) => {
+            const data = JSON.parse(event.data);
+            console.log(`📡 Stream: ${state} for #${data.signal?.id}`);
+            fetchLatestSignal();
+            if (state !== 'PUBLISHED' && activeTab === 'history') loadHistory();
+        });
+    });
+}
+
 // === LIVE PRICE FEED ===
 function initPriceFeed() {
     console.log("🔌 Initializing Binance Feed...");
@@ -0,0 +1,281 @@
+"""
+Local Signal Replica
+SQLite copy of fx_signals kept in sync by one background loop, so the API
+reads (/signal/latest, /signal/active, /signal history, webhook replies)
+are local indexed lookups instead of Supabase round trips.
+
+- Each sync pulls rows generated since the high-water mark, plus the rows
+  that are still open (their state can change); closed rows are final
+- Rows persist in the replica file, so after a restart (or while Supabase
+  is unreachable) the last known state is served immediately
+- Listeners receive only the rows that actually changed
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import http_client
+from runtime_paths import data_path, prepare
+from signal_engine import signal_from_supabase_row
+from signal_watcher import OPEN_STATES
+from structured_log import get_logger
+
+log = get_logger("signal_replica")
+
+SIGNAL_REPLICA_ENABLED = os.getenv("SIGNAL_REPLICA_ENABLED", "true").lower() == "true"
+SIGNAL_REPLICA_DB = os.getenv("SIGNAL_REPLICA_DB") or data_path("signal_replica.db")
+SIGNAL_REPLICA_SYNC_SECONDS = float(os.getenv("SIGNAL_REPLICA_SYNC_SECONDS", "5"))
+SIGNAL_REPLICA_OPEN_HOURS = int(os.getenv("SIGNAL_REPLICA_OPEN_HOURS", "24"))  # open rows older than this are not re-polled (nor served as live)
+SIGNAL_REPLICA_PAGE_SIZE = 1000
+_ID_CHUNK = 100  # ids per id=in.(...) request
+
+# Same "live" filter as signal_engine._signal_request
+LIVE_STATUSES = ("PUBLISHED", "ENTRY_HIT")
+
+
+def _supabase() -> Optional[Tuple[str, Dict[str, str]]]:
+    sb_url = os.getenv("SUPABASE_URL")
+    sb_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
+    if not (sb_url and sb_key):
+        return None
+    return f"{sb_url}/rest/v1/fx_signals", {"apikey": sb_key, "Authorization": f"Bearer {sb_key}"}
+
+
+def _open_cutoff() -> str:
+    """Open rows generated before this are no longer re-polled, so their stored state may be stale"""
+    return (datetime.now(timezone.utc) - timedelta(hours=SIGNAL_REPLICA_OPEN_HOURS)).isoformat()
+
+
+class SignalReplica:
+    """fx_signals mirror: one writer (the sync loop), indexed local reads"""
+
+    def __init__(self, db_path: str = SIGNAL_REPLICA_DB):
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._listeners: List[Tuple[Callable[[List[Dict[str, Any]]], None], bool]] = []
+        self._synced_once = False
+        self.last_sync_at: Optional[float] = None
+        self.stats = {"syncs": 0, "errors": 0, "rows_fetched": 0, "rows_changed": 0, "last_sync_ms": None}
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use (never at import)
+        if self._db is None:
+            conn = sqlite3.connect(prepare(self.db_path), isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS signals ("
+                " id PRIMARY KEY, asset TEXT, state TEXT, status TEXT,"
+                " generated_at TEXT NOT NULL, row TEXT NOT NULL)"
+            )
+            for name, columns in (
+                ("signals_generated", "generated_at DESC, id DESC"),
+                ("signals_asset", "asset, generated_at DESC, id DESC"),
+                ("signals_state", "state, generated_at DESC, id DESC"),
+                ("signals_status", "status, generated_at DESC"),
+            ):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON signals ({columns})")
+            self._db = conn
+        return self._db
+
+    # --- Sync ---------------------------------------------------------------
+
+    def add_listener(self, fn: Callable[[List[Dict[str, Any]]], None], replay: bool = False):
+        """fn(changed_rows) after every sync; replay=True first hands it every stored row"""
+        self._listeners.append((fn, replay))
+
+    @property
+    def enabled(self) -> bool:
+        return SIGNAL_REPLICA_ENABLED and _supabase() is not None
+
+    @property
+    def ready(self) -> bool:
+        """Safe to serve reads: synced this run, or holding rows from a previous run"""
+        return self.enabled and (self._synced_once or self.count() > 0)
+
+    def high_water(self) -> Optional[str]:
+        return self._conn.execute("SELECT MAX(generated_at) FROM signals").fetchone()[0]
+
+    def _open_ids(self) -> List[Any]:
+        cutoff = _open_cutoff()
+        placeholders = ",".join("?" * len(OPEN_STATES))
+        return [row[0] for row in self._conn.execute(
+            f"SELECT id FROM signals WHERE generated_at >= ? AND COALESCE(status, state) IN ({placeholders})",
+            (cutoff, *OPEN_STATES),
+        )]
+
+    async def _get(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        url, headers = _supabase()
+        resp = await http_client.aget(url, params=params, headers=headers, timeout=10)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _fetch_new(self, since: Optional[str]) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        while True:
+            params = {
+                "select": "*", "order": "generated_at.asc,id.asc",
+                "limit": SIGNAL_REPLICA_PAGE_SIZE, "offset": len(rows),
+            }
+            if since:
+                params["generated_at"] = f"gte.{since}"  # Ties at the mark are re-read; upsert is idempotent
+            page = await self._get(params)
+            rows.extend(page)
+            if len(page) < SIGNAL_REPLICA_PAGE_SIZE:
+                return rows
+
+    async def _fetch_open(self, ids: List[Any]) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        for i in range(0, len(ids), _ID_CHUNK):
+            chunk = ",".join(json.dumps(str(v)) for v in ids[i:i + _ID_CHUNK])
+            rows.extend(await self._get({"select": "*", "id": f"in.({chunk})"}))
+        return rows
+
+    def _upsert(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Write rows; returns the ones that are new or differ from the stored copy"""
+        changed = []
+        self._conn.execute("BEGIN")
+        try:
+            for row in rows:
+                if row.get("id") is None or not row.get("generated_at"):
+                    continue
+                text = json.dumps(row, sort_keys=True, default=str)
+                stored = self._conn.execute("SELECT row FROM signals WHERE id = ?", (row["id"],)).fetchone()
+                if stored and stored[0] == text:
+                    continue
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO signals (id, asset, state, status, generated_at, row) VALUES (?, ?, ?, ?, ?, ?)",
+                    (row["id"], row.get("asset"), row.get("state"), row.get("status"), row["generated_at"], text),
+                )
+                changed.append(row)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return changed
+
+    def _notify(self, rows: List[Dict[str, Any]]):
+        for fn, _ in self._listeners:
+            try:
+                fn(rows)
+            except Exception as e:
+                log.warning("⚠️ Replica listener failed", error=str(e))
+
+    def _replay(self):
+        pending = [fn for fn, replay in self._listeners if replay]
+        self._listeners = [(fn, False) for fn, _ in self._listeners]
+        if pending:
+            rows = self.all_rows()
+            for fn in pending:
+                fn(rows)
+
+    async def sync_once(self) -> int:
+        started = time.perf_counter()
+        open_ids = self._open_ids()
+        rows = await self._fetch_new(self.high_water())
+        fetched = {row.get("id") for row in rows}
+        rows.extend(await self._fetch_open([i for i in open_ids if i not in fetched]))
+
+        changed = self._upsert(rows)
+        self._synced_once = True
+        self.last_sync_at = time.time()
+        self.stats["syncs"] += 1
+        self.stats["rows_fetched"] += len(rows)
+        self.stats["rows_changed"] += len(changed)
+        self.stats["last_sync_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if changed:
+            self._notify(changed)
+        return len(changed)
+
+    async def run(self):
+        """Background sync loop (keeps serving the stored rows while Supabase is down)"""
+        self._replay()
+        while True:
+            try:
+                await self.sync_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.warning("⚠️ Replica sync failed", error=str(e))
+            await asyncio.sleep(SIGNAL_REPLICA_SYNC_SECONDS)
+
+    # --- Reads --------------------------------------------------------------
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+
+    def all_rows(self) -> List[Dict[str, Any]]:
+        return [json.loads(r[0]) for r in self._conn.execute("SELECT row FROM signals ORDER BY generated_at, id")]
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        """Newest raw rows first (the SSE poller's lookback window)"""
+        return [json.loads(r[0]) for r in self._conn.execute(
+            "SELECT row FROM signals ORDER BY generated_at DESC, id DESC LIMIT ?", (limit,)
+        )]
+
+    def active(self, limit: int) -> List[Dict[str, Any]]:
+        """Live signals newest first, parsed like the Supabase read path (only rows still being re-polled)"""
+        rows = self._conn.execute(
+            "SELECT row FROM signals WHERE status IN (?, ?) AND generated_at >= ? ORDER BY generated_at DESC LIMIT ?",
+            (*LIVE_STATUSES, _open_cutoff(), limit),
+        ).fetchall()
+        return [signal_from_supabase_row(json.loads(r[0])) for r in rows]
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        rows = self.active(1)
+        return rows[0] if rows else None
+
+    def page(self, asset: Optional[str], state: Optional[str], limit: int,
+             position: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Keyset page ordered by (generated_at, id) DESC (same contract as the
+        Supabase cursor path); returns (rows in display order, more beyond).
+        """
+        forward = position.get("d", "next") == "next"
+        where, args = [], []
+        if asset:
+            where.append("asset = ?")
+            args.append(asset)
+        if state:
+            where.append("state = ?")
+            args.append(state)
+        if "g" in position:
+            where.append("(generated_at, id) < (?, ?)" if forward else "(generated_at, id) > (?, ?)")
+            args += [position["g"], position["i"]]
+        sql = "SELECT row FROM signals"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY generated_at DESC, id DESC" if forward else " ORDER BY generated_at ASC, id ASC"
+        rows = [json.loads(r[0]) for r in self._conn.execute(sql + " LIMIT ?", (*args, limit + 1))]
+        more = len(rows) > limit
+        rows = rows[:limit]
+        if not forward:
+            rows.reverse()
+        return rows, more
+
+    def offset_page(self, asset: Optional[str], state: Optional[str], limit: int, offset: int) -> List[Dict[str, Any]]:
+        where, args = [], []
+        if asset:
+            where.append("asset = ?")
+            args.append(asset)
+        if state:
+            where.append("state = ?")
+            args.append(state)
+        sql = "SELECT row FROM signals" + (" WHERE " + " AND ".join(where) if where else "")
+        sql += " ORDER BY generated_at DESC, id DESC LIMIT ? OFFSET ?"
+        return [json.loads(r[0]) for r in self._conn.execute(sql, (*args, limit, offset))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "rows": self.count(),
+            "high_water": self.high_water(),
+            "lag_seconds": round(time.time() - self.last_sync_at, 1) if self.last_sync_at else None,
+        }
+
+
+replica = SignalReplica()
@@ -0,0 +1,189 @@
+"""
+Live Signal Stream
+One backend poller watches fx_signals and pushes state transitions
+(PUBLISHED, ENTRY_HIT, TP_HIT, SL_HIT, EXPIRED) to every /signal/stream
+subscriber over Server-Sent Events. Upstream load is one query per poll
+interval regardless of how many browsers are connected; with the signal
+replica on, every worker polls the local replica file instead, so extra
+workers add no Supabase load.
+"""
+import asyncio
+import json
+import os
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import http_client
+from signal_engine import get_latest_signal_safe_async, invalidate_signal_cache
+from signal_replica import replica
+from structured_log import get_logger
+
+log = get_logger("signal_stream")
+
+SIGNAL_STREAM_POLL_SECONDS = float(os.getenv("SIGNAL_STREAM_POLL_SECONDS", "1"))
+SIGNAL_STREAM_LOOKBACK = int(os.getenv("SIGNAL_STREAM_LOOKBACK", "20"))         # rows checked per poll
+SIGNAL_STREAM_HEARTBEAT_SECONDS = float(os.getenv("SIGNAL_STREAM_HEARTBEAT_SECONDS", "15"))
+SIGNAL_STREAM_QUEUE_SIZE = int(os.getenv("SIGNAL_STREAM_QUEUE_SIZE", "100"))     # per subscriber
+SIGNAL_STREAM_REPLAY_SIZE = 100  # events kept for Last-Event-ID resume
+
+TRACKED_STATES = {"PUBLISHED", "ENTRY_HIT", "TP_HIT", "SL_HIT", "EXPIRED"}
+# state is the lifecycle column; status carries publishing/closing labels for the same steps
+STATE_ALIASES = {"WAITING_FOR_ENTRY": "PUBLISHED", "CLOSED_TP": "TP_HIT", "CLOSED_SL": "SL_HIT", "CLOSED_TIMEOUT": "EXPIRED"}
+STREAM_COLUMNS = "id,asset,timeframe,direction,status,state,entry_low,tp,sl,ai_confidence,generated_at,entry_hit_at,closed_at"
+
+
+def lifecycle_state(row: Dict[str, Any]) -> str:
+    """Tracked lifecycle step of a row ("" if none): state first, like telemetry._outcome"""
+    for field in ("state", "status"):
+        value = str(row.get(field) or "").upper()
+        value = STATE_ALIASES.get(value, value)
+        if value in TRACKED_STATES:
+            return value
+    return ""
+
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+class SignalBroadcaster:
+    """Single change detector fanning out to per-subscriber queues"""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._known: Dict[Any, str] = {}
+        self._primed = False
+        self._seq = 0
+        self._replay = deque(maxlen=SIGNAL_STREAM_REPLAY_SIZE)
+        self.stats = {"polls": 0, "poll_errors": 0, "events": 0, "dropped_subscribers": 0}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def _fetch_rows(self) -> List[Dict[str, Any]]:
+        if replica.ready:
+            # Synced by the background leader; a local indexed read
+            return replica.recent(SIGNAL_STREAM_LOOKBACK)
+
+        sb_url = os.getenv("SUPABASE_URL")
+        sb_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
+
+        if sb_url and sb_key:
+            resp = await http_client.aget(
+                f"{sb_url}/rest/v1/fx_signals",
+                params={
+                    "select": STREAM_COLUMNS,
+                    "order": "generated_at.desc",
+                    "limit": SIGNAL_STREAM_LOOKBACK,
+                },
+                headers={"apikey": sb_key, "Authorization": f"Bearer {sb_key}"},
+                timeout=5,
+            )
+            resp.raise_for_status()
+            return resp.json()
+
+        # Legacy mode: only the latest signal is visible, via the shared cache
+        sig = await get_latest_signal_safe_async()
+        if not sig:
+            return []
+        return [{"id": sig.get("signal_id"), "status": "PUBLISHED", **sig}]
+
+    def _publish(self, event_type: str, payload: Dict[str, Any]):
+        self._seq += 1
+        event = {
+            "seq": self._seq,
+            "type": event_type,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "signal": payload,
+        }
+        self._replay.append(event)
+        self.stats["events"] += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop it rather than buffer without bound
+                self._subscribers.discard(queue)
+                self.stats["dropped_subscribers"] += 1
+
+    async def poll_once(self) -> int:
+        """Detect transitions in the recent rows; returns events published"""
+        rows = await self._fetch_rows()
+        self.stats["polls"] += 1
+        published = 0
+        for row in reversed(rows):  # oldest first so events arrive in order
+            state = lifecycle_state(row)
+            if not state:
+                continue
+            if self._known.get(row.get("id")) == state:
+                continue
+            self._known[row.get("id")] = state
+            if self._primed:
+                self._publish(state, row)
+                published += 1
+
+        # Only remember rows still in the lookback window
+        visible = {row.get("id") for row in rows}
+        for sid in [sid for sid in self._known if sid not in visible]:
+            del self._known[sid]
+
+        if published:
+            invalidate_signal_cache()
+        self._primed = True
+        return published
+
+    async def run(self):
+        """Background poller; idles while nobody is subscribed"""
+        while True:
+            if self._subscribers:
+                try:
+                    await self.poll_once()
+                except Exception as e:
+                    self.stats["poll_errors"] += 1
+                    log.warning("⚠️ Signal stream poll failed", error=str(e))
+            else:
+                # Re-prime on the next subscriber so stale diffs are not replayed
+                self._primed = False
+            await asyncio.sleep(SIGNAL_STREAM_POLL_SECONDS)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SIGNAL_STREAM_QUEUE_SIZE)
+        if last_event_id and last_event_id.isdigit():
+            for event in self._replay:
+                if event["seq"] > int(last_event_id) and not queue.full():
+                    queue.put_nowait(event)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    async def stream(self, request, last_event_id: Optional[str] = None):
+        """SSE body generator for one client"""
+        queue = self.subscribe(last_event_id)
+        try:
+            yield f"retry: 3000\n: subscribers={self.subscriber_count}\n\n"
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SIGNAL_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if queue not in self._subscribers:
+                        break  # Dropped as a slow consumer
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format_sse(event)
+        finally:
+            self.unsubscribe(queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["subscribers"] = self.subscriber_count
+        stats["tracked_signals"] = len(self._known)
+        return stats
+
+
+broadcaster = SignalBroadcaster()
@@ -0,0 +1,368 @@
+"""
+Signal Lifecycle Watcher
+Server-side twin of the Logic.ini state machine:
+
+    PUBLISHED --entry hit--> ENTRY_HIT --TP/SL--> TP_HIT / SL_HIT
+        |                        |
+        +-- 35 min, no entry --> EXPIRED <-- max trade time (only if the signal sets one)
+
+The entry window is the signal's activation_limit_mins (35 by default).
+Logic.ini closes an entered trade only on TP/SL; a signal that carries
+max_monitoring_mins (or meta.max_trade_mins) is additionally expired that
+many minutes after its entry.
+
+Open signals are kept per asset in NumPy columns (direction, entry, tp, sl,
+deadlines), so one tick evaluates every open signal of its asset with a
+handful of vector operations instead of a Python loop per signal.
+Transitions are emitted to listeners (Telegram notify); fx_signals itself
+is never written (the database stays the immutable record).
+"""
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import http_client
+from signal_engine import _signal_request
+from structured_log import get_logger
+
+log = get_logger("signal_watcher")
+
+MAX_PENDING_SECONDS = 35 * 60     # Default entry window (Logic.ini)
+SIGNAL_WATCHER_SYNC_SECONDS = float(os.getenv("SIGNAL_WATCHER_SYNC_SECONDS", "30"))
+SIGNAL_WATCHER_SYNC_LIMIT = int(os.getenv("SIGNAL_WATCHER_SYNC_LIMIT", "1000"))
+SIGNAL_WATCHER_SWEEP_SECONDS = 5  # Expiry check for assets without ticks
+_CLOSED_MEMORY = 10000            # Closed ids remembered so a sync cannot reopen them
+
+OPEN_STATES = {"PUBLISHED", "WAITING", "WAITING_FOR_ENTRY", "ACTIVE", "ENTRY_HIT"}
+ENTERED_STATES = {"ACTIVE", "ENTRY_HIT"}
+
+
+def _symbol_key(asset: str) -> str:
+    return (asset or "").replace("/", "").upper()
+
+
+def _epoch(value: Any) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def _limit_seconds(row: Dict[str, Any], key: str, meta_key: Optional[str] = None) -> Optional[float]:
+    """Per-signal minutes limit (row field, else meta field) in seconds; None if unset"""
+    value = row.get(key)
+    if value in (None, "", 0) and meta_key:
+        meta = row.get("meta")
+        if isinstance(meta, str):
+            try:
+                meta = json.loads(meta)
+            except ValueError:
+                meta = None
+        value = meta.get(meta_key) if isinstance(meta, dict) else None
+    try:
+        minutes = float(value)
+    except (TypeError, ValueError):
+        return None
+    return minutes * 60 if minutes > 0 else None
+
+
+class _Book:
+    """Open signals of one asset as parallel column arrays"""
+
+    def __init__(self, capacity: int = 64):
+        self.n = 0
+        self.signals: List[Dict[str, Any]] = []
+        self._alloc(capacity)
+
+    def _alloc(self, capacity: int):
+        old = getattr(self, "direction", None)
+        cols = {
+            "direction": np.float64, "entry": np.float64, "tp": np.float64, "sl": np.float64,
+            "deadline": np.float64, "max_trade": np.float64, "expires": np.float64, "entered": np.bool_,
+        }
+        for name, dtype in cols.items():
+            col = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                col[:self.n] = getattr(self, name)[:self.n]
+            setattr(self, name, col)
+
+    def add(self, signal: Dict[str, Any], direction: float, entry: float, tp: float, sl: float,
+            generated: float, entered: bool, entry_window: float, max_trade: Optional[float],
+            entered_at: Optional[float]):
+        if self.n == len(self.direction):
+            self._alloc(2 * self.n)
+        i = self.n
+        self.direction[i], self.entry[i], self.tp[i], self.sl[i] = direction, entry, tp, sl
+        self.deadline[i] = generated + entry_window
+        self.max_trade[i] = max_trade if max_trade is not None else np.inf
+        self.entered[i] = entered
+        # Trade clock starts at entry; open-ended unless the signal sets a limit
+        self.expires[i] = (entered_at or time.time()) + self.max_trade[i] if entered else np.inf
+        self.signals.append(signal)
+        self.n += 1
+
+    def evaluate(self, price: Optional[float], now: float) -> List[tuple]:
+        """(row, new status) for every signal this tick moves; price=None checks time only"""
+        n = self.n
+        if not n:
+            return []
+        d, entered = self.direction[:n], self.entered[:n]
+        if price is not None:
+            # BUY: entry when price <= entry, TP when >= tp, SL when <= sl (SELL mirrored)
+            sl_hit = entered & (d * (price - self.sl[:n]) <= 0)
+            tp_hit = entered & ~sl_hit & (d * (price - self.tp[:n]) >= 0)
+            entry_hit = ~entered & (d * (price - self.entry[:n]) <= 0) & (now < self.deadline[:n])
+        else:
+            sl_hit = tp_hit = entry_hit = np.zeros(n, dtype=np.bool_)
+        missed = ~entered & ~entry_hit & (now >= self.deadline[:n])
+        timed_out = entered & ~sl_hit & ~tp_hit & (now >= self.expires[:n])  # expires is inf when unlimited
+
+        moved = sl_hit | tp_hit | entry_hit | missed | timed_out
+        if not moved.any():
+            return []
+
+        transitions = []
+        for status, mask in (("SL_HIT", sl_hit), ("TP_HIT", tp_hit), ("ENTRY_HIT", entry_hit),
+                             ("EXPIRED", missed | timed_out)):
+            transitions.extend((int(i), status) for i in np.flatnonzero(mask))
+        self.mark_entered(entry_hit, now)
+
+        closed = sl_hit | tp_hit | missed | timed_out
+        if closed.any():
+            self._compact(~closed)
+        return transitions
+
+    def mark_entered(self, mask: np.ndarray, at):
+        """Enter the masked rows (not yet entered) at time(s) at; starts their trade clock"""
+        n = self.n
+        mask = mask & ~self.entered[:n]
+        self.expires[:n] = np.where(mask, at + self.max_trade[:n], self.expires[:n])
+        self.entered[:n] |= mask
+
+    def _compact(self, keep: np.ndarray):
+        idx = np.flatnonzero(keep)
+        for name in ("direction", "entry", "tp", "sl", "deadline", "max_trade", "expires", "entered"):
+            col = getattr(self, name)
+            col[:len(idx)] = col[idx]
+        self.signals = [self.signals[i] for i in idx.tolist()]
+        self.n = len(idx)
+
+    def remove(self, signal_ids: set):
+        if any(s["id"] in signal_ids for s in self.signals):
+            self._compact(np.array([s["id"] not in signal_ids for s in self.signals], dtype=np.bool_))
+
+
+def resolve_path(normalized: tuple, ts: np.ndarray, prices: np.ndarray) -> Dict[str, Any]:
+    """
+    Batch form of the watcher rules for one signal over a recorded price path
+    (replays/backtests): the same comparisons as _Book.evaluate, but each
+    phase is one vector scan instead of one call per tick.
+    Returns outcome (ENTRY window / TP / SL / EXPIRED, or INCOMPLETE when the
+    path ends first) with entry_ts and closed_ts.
+    """
+    _, d, entry, tp, sl, generated, _, entry_window, max_trade, _ = normalized
+    deadline = generated + entry_window
+    last = ts[-1] if len(ts) else -np.inf
+
+    lo = int(np.searchsorted(ts, generated, side="left"))
+    hi = int(np.searchsorted(ts, deadline, side="left"))
+    hits = d * (prices[lo:hi] - entry) <= 0
+    if not hits.any():
+        if last >= deadline:
+            return {"outcome": "EXPIRED", "entry_ts": None, "closed_ts": float(ts[hi])}
+        return {"outcome": "INCOMPLETE", "entry_ts": None, "closed_ts": None}
+    entered = lo + int(np.argmax(hits))
+
+    # TP/SL are checked from the tick after entry (entry state is pre-tick)
+    expires = ts[entered] + max_trade if max_trade is not None else np.inf
+    end = int(np.searchsorted(ts, expires, side="left"))
+    window = prices[entered + 1:end]
+    sl_hits = d * (window - sl) <= 0
+    tp_hits = d * (window - tp) >= 0
+    first_sl = int(np.argmax(sl_hits)) if sl_hits.any() else None
+    first_tp = int(np.argmax(tp_hits)) if tp_hits.any() else None
+    result = {"entry_ts": float(ts[entered])}
+    if first_sl is not None and (first_tp is None or first_sl <= first_tp):
+        return {**result, "outcome": "SL_HIT", "closed_ts": float(ts[entered + 1 + first_sl])}
+    if first_tp is not None:
+        return {**result, "outcome": "TP_HIT", "closed_ts": float(ts[entered + 1 + first_tp])}
+    if last >= expires:
+        return {**result, "outcome": "EXPIRED", "closed_ts": float(ts[end])}
+    return {**result, "outcome": "INCOMPLETE", "closed_ts": None}
+
+
+class SignalWatcher:
+    """Per-asset books of open signals, driven by ticks and a periodic sync"""
+
+    def __init__(self):
+        self._books: Dict[str, _Book] = {}
+        self._open: Dict[Any, str] = {}                  # signal id -> symbol key
+        self._closed: "OrderedDict[Any, str]" = OrderedDict()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.stats = {"ticks": 0, "transitions": 0, "syncs": 0, "sync_errors": 0, "tick_us_max": 0}
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        self._listeners.append(listener)
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
+
+    # ---- loading -----------------------------------------------------
+
+    @staticmethod
+    def normalize(row: Dict[str, Any], max_trade: Optional[float] = None,
+                  entry_window: float = MAX_PENDING_SECONDS) -> Optional[tuple]:
+        """
+        (signal, direction, entry, tp, sl, generated epoch, entered, entry window s,
+        max trade s or None, entered epoch or None), or None if not usable.
+        max_trade / entry_window (seconds) apply to signals that carry no limit of their own.
+        """
+        sid = row.get("id", row.get("signal_id"))
+        status = (row.get("status") or row.get("state") or "PUBLISHED").upper()
+        if sid is None or status not in OPEN_STATES:
+            return None
+        direction = (row.get("direction") or row.get("side") or "").upper()
+        generated = _epoch(row.get("generated_at") or row.get("timestamp"))
+        try:
+            entry = float(row.get("entry_low", row.get("entry")) or 0)
+            tp, sl = float(row.get("tp") or 0), float(row.get("sl") or 0)
+        except (TypeError, ValueError):
+            return None
+        if direction not in ("BUY", "SELL") or generated is None or not (entry and tp and sl):
+            return None
+        signal = {
+            "id": sid, "asset": row.get("asset", "EUR/USD"), "direction": direction,
+            "entry": entry, "tp": tp, "sl": sl, "timeframe": row.get("timeframe"),
+            "confidence": row.get("confidence", int(float(row.get("ai_confidence") or 0) * 100)),
+            "generated_at": row.get("generated_at") or row.get("timestamp"),
+        }
+        entered = status in ENTERED_STATES
+        return (
+            signal, 1.0 if direction == "BUY" else -1.0, entry, tp, sl, generated, entered,
+            _limit_seconds(row, "activation_limit_mins") or entry_window,
+            _limit_seconds(row, "max_monitoring_mins", "max_trade_mins") or max_trade,
+            _epoch(row.get("entry_hit_at")) if entered else None,
+        )
+
+    def track(self, row: Dict[str, Any]) -> bool:
+        """Start watching an fx_signals row (or parsed signal); False if not open/usable"""
+        sid = row.get("id", row.get("signal_id"))
+        if sid in self._open or sid in self._closed:
+            return False
+        normalized = self.normalize(row)
+        if normalized is None:
+            return False
+        signal = normalized[0]
+        self._books.setdefault(_symbol_key(signal["asset"]), _Book()).add(*normalized)
+        self._open[sid] = _symbol_key(signal["asset"])
+        return True
+
+    def sync(self, rows: List[Dict[str, Any]]):
+        """Reconcile with the open signals upstream (new ones added, vanished ones dropped)"""
+        upstream, entered = set(), {}
+        now = time.time()
+        for row in rows:
+            sid = row.get("id", row.get("signal_id"))
+            upstream.add(sid)
+            if not self.track(row) and (row.get("status") or "").upper() in ENTERED_STATES:
+                entered[sid] = _epoch(row.get("entry_hit_at")) or now
+        if entered:
+            # Entry seen upstream before any local tick confirmed it
+            for book in self._books.values():
+                at = np.array([entered.get(s["id"], now) for s in book.signals], dtype=np.float64)
+                book.mark_entered(np.array([s["id"] in entered for s in book.signals], dtype=np.bool_), at)
+        gone = set(self._open) - upstream
+        if gone:
+            # Closed upstream (e.g. by the AI Core watcher): stop watching quietly
+            for book in self._books.values():
+                book.remove(gone)
+            for sid in gone:
+                self._open.pop(sid, None)
+        self.stats["syncs"] += 1
+
+    # ---- evaluation --------------------------------------------------
+
+    def _emit(self, transitions: List[tuple], price: Optional[float], now: float):
+        for signal, status in transitions:
+            if status != "ENTRY_HIT":
+                self._open.pop(signal["id"], None)
+                self._closed[signal["id"]] = status
+                while len(self._closed) > _CLOSED_MEMORY:
+                    self._closed.popitem(last=False)
+            event = {
+                "signal_id": signal["id"],
+                "status": status,
+                "price": price,
+                "timestamp": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+                "signal": dict(signal),
+            }
+            self.stats["transitions"] += 1
+            for listener in self._listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    log.warning("⚠️ Watcher listener failed", error=str(e))
+
+    def _run_book(self, book: _Book, price: Optional[float], now: float):
+        signals = book.signals  # evaluate() returns indexes from before it compacts
+        transitions = book.evaluate(price, now)
+        if transitions:
+            self._emit([(signals[i], status) for i, status in transitions], price, now)
+
+    def on_tick(self, symbol: str, ts: float, price: float):
+        """TickStore listener: evaluate every open signal of the symbol at once"""
+        book = self._books.get(_symbol_key(symbol))
+        if book is None or not book.n:
+            return
+        started = time.perf_counter()
+        self._run_book(book, price, ts)
+        self.stats["ticks"] += 1
+        elapsed_us = int((time.perf_counter() - started) * 1e6)
+        if elapsed_us > self.stats["tick_us_max"]:
+            self.stats["tick_us_max"] = elapsed_us
+
+    def sweep(self, now: Optional[float] = None):
+        """Time-only pass so signals expire even when their asset is not ticking"""
+        now = now or time.time()
+        for book in self._books.values():
+            self._run_book(book, None, now)
+
+    async def _fetch_open_rows(self) -> List[Dict[str, Any]]:
+        url, headers, _ = _signal_request(SIGNAL_WATCHER_SYNC_LIMIT)
+        resp = await http_client.aget(url, headers=headers, timeout=5)
+        resp.raise_for_status()
+        return resp.json() or []
+
+    async def run(self):
+        """Background loop: periodic upstream sync plus expiry sweeps"""
+        last_sync = 0.0
+        while True:
+            if time.monotonic() - last_sync >= SIGNAL_WATCHER_SYNC_SECONDS:
+                try:
+                    self.sync(await self._fetch_open_rows())
+                except Exception as e:
+                    self.stats["sync_errors"] += 1
+                    log.warning("⚠️ Watcher sync failed", error=str(e))
+                last_sync = time.monotonic()
+            self.sweep()
+            await asyncio.sleep(SIGNAL_WATCHER_SWEEP_SECONDS)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "open_signals": self.open_count,
+            "assets": {key: book.n for key, book in self._books.items()},
+        }
+
+
+watcher = SignalWatcher()
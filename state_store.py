@@ -0,0 +1,145 @@
+"""
+Shared Execution State
+Small key/value store every API worker (and the scheduler) sees the same
+way: one SQLite file in WAL mode instead of a module global plus a
+rewritten JSON file.
+
+- compare_and_set() is atomic across processes (BEGIN IMMEDIATE), so
+  "execute once" cannot race between workers
+- Every key carries a version; readers re-read a value only when SQLite's
+  data_version says another connection committed since their last look
+- claim() hands out one-shot tokens (e.g. "notify this hit once");
+  release() gives one back when the claimed work did not happen
+- acquire_lease() is a renewable, expiring claim (leader election)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from runtime_paths import data_path, prepare
+
+STATE_STORE_DB = os.getenv("STATE_STORE_DB") or data_path("execution_state.db")
+CLAIM_RETENTION_SECONDS = 7 * 86400
+
+CURRENT_SIGNAL_KEY = "current_signal"
+
+
+class StateStore:
+    def __init__(self, db_path: str = STATE_STORE_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        self.stats = {"reads": 0, "cached_reads": 0, "cas_won": 0, "cas_lost": 0}
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, opened on first use; the read cache lives next to it
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(prepare(self.db_path), timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " version INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS claims (key TEXT PRIMARY KEY, claimed_at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS claims_age ON claims (claimed_at)")
+            self._local.conn = conn
+            self._local.cache = {}
+            self._local.data_version = None
+        return conn
+
+    def _fresh_cache(self) -> Dict[str, Tuple[int, Any]]:
+        """Thread-local cache, dropped whenever another connection has committed"""
+        conn = self._conn()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._local.data_version:
+            self._local.cache = {}
+            self._local.data_version = data_version
+        return self._local.cache
+
+    def read(self, key: str) -> Tuple[int, Any]:
+        """(version, value); version 0 means the key does not exist"""
+        cache = self._fresh_cache()
+        if key in cache:
+            self.stats["cached_reads"] += 1
+            return cache[key]
+        self.stats["reads"] += 1
+        row = self._conn().execute("SELECT version, value FROM state WHERE key = ?", (key,)).fetchone()
+        entry = (row[0], json.loads(row[1])) if row else (0, None)
+        cache[key] = entry
+        return entry
+
+    def get(self, key: str) -> Any:
+        return self.read(key)[1]
+
+    def version(self, key: str) -> int:
+        return self.read(key)[0]
+
+    def compare_and_set(self, key: str, value: Any, expected_version: int) -> bool:
+        """Write value only if the key is still at expected_version (0 = absent)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT version FROM state WHERE key = ?", (key,)).fetchone()
+            current = row[0] if row else 0
+            if current != expected_version:
+                conn.execute("ROLLBACK")
+                self.stats["cas_lost"] += 1
+                return False
+            conn.execute(
+                "INSERT INTO state (key, value, version, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, version = excluded.version,"
+                " updated_at = excluded.updated_at",
+                (key, json.dumps(value, default=str), current + 1, time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._fresh_cache()[key] = (current + 1, value)
+        self.stats["cas_won"] += 1
+        return True
+
+    def set(self, key: str, value: Any) -> int:
+        """Unconditional write; returns the new version"""
+        while True:
+            version = self.read(key)[0]
+            if self.compare_and_set(key, value, version):
+                return version + 1
+            self._local.data_version = None  # Lost a race: force a re-read
+
+    def claim(self, key: str) -> bool:
+        """True for exactly one caller across all processes"""
+        now = time.time()
+        conn = self._conn()
+        won = conn.execute("INSERT OR IGNORE INTO claims (key, claimed_at) VALUES (?, ?)", (key, now)).rowcount > 0
+        if won:
+            conn.execute("DELETE FROM claims WHERE claimed_at < ?", (now - CLAIM_RETENTION_SECONDS,))
+        return won
+
+    def release(self, key: str):
+        """Undo a claim whose work failed, so the next caller can take it"""
+        self._conn().execute("DELETE FROM claims WHERE key = ?", (key,))
+
+    def acquire_lease(self, key: str, holder: str, ttl: float) -> bool:
+        """Take or renew key for holder if it is free, expired or already held by holder"""
+        version, lease = self.read(key)
+        now = time.time()
+        if lease and lease.get("holder") not in (None, holder) and lease.get("expires_at", 0) > now:
+            return False
+        return self.compare_and_set(key, {"holder": holder, "expires_at": now + ttl}, version)
+
+    def release_lease(self, key: str, holder: str):
+        """Give the lease up early (clean shutdown) so another worker need not wait for expiry"""
+        version, lease = self.read(key)
+        if lease and lease.get("holder") == holder:
+            self.compare_and_set(key, {"holder": None, "expires_at": 0}, version)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "db": self.db_path, "current_signal_version": self.version(CURRENT_SIGNAL_KEY)}
+
+
+execution_state = StateStore()
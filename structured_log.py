@@ -0,0 +1,131 @@
+"""
+Structured Logging
+Non-blocking replacement for print(): callers only enqueue a record; one
+background thread formats and writes it (QueueHandler -> QueueListener),
+so stdout never blocks the event loop or the executor threads.
+
+    log = get_logger("main")
+    log.info("Serving live signal", asset="EUR/USD")          # fields -> JSON keys
+    log.info("Request", path="/health", sample=True)          # sampled high-volume line
+
+LOG_FORMAT=json (default) emits one JSON object per line; LOG_FORMAT=text
+keeps the human-readable console style. LOG_SAMPLE_RATE applies to lines
+logged with sample=True (warnings and errors are never sampled).
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_ROOT = "quantix"
+_listener = None
+_dropped = 0
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name[len(_ROOT) + 1:] or record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None)
+        line = record.getMessage()
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _SamplingFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and record.levelno < logging.WARNING:
+            return random.random() < LOG_SAMPLE_RATE
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never block the caller: a full queue drops the record and counts it"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only freeze the message here
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """log.info("message", key=value, sample=True) -> extra fields + sampling flag"""
+
+    def process(self, msg, kwargs):
+        sampled = kwargs.pop("sample", False)
+        passthrough = {k: kwargs.pop(k) for k in ("exc_info", "stack_info", "stacklevel") if k in kwargs}
+        passthrough["extra"] = {"fields": kwargs, "sampled": sampled}
+        return msg, passthrough
+
+
+def _configure():
+    global _listener
+    root = logging.getLogger(_ROOT)
+    if _listener is not None or root.handlers:
+        return root
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+    log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = _DroppingQueueHandler(log_queue)
+    handler.addFilter(_SamplingFilter())
+    root.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=False)
+    _listener.start()
+    atexit.register(shutdown)
+    return root
+
+
+def get_logger(name: str) -> StructuredLogger:
+    _configure()
+    return StructuredLogger(logging.getLogger(f"{_ROOT}.{name}"), {})
+
+
+def shutdown():
+    """Drain the queue and stop the writer thread (registered with atexit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_stats() -> Dict[str, Any]:
+    size = _listener.queue.qsize() if _listener is not None else 0
+    return {"queued": size, "dropped": _dropped, "format": LOG_FORMAT, "sample_rate": LOG_SAMPLE_RATE}
@@ -0,0 +1,333 @@
+"""
+Subscriber Broadcasts
+Registry of Telegram chats that opted in (/start, /stop) and a fan-out
+engine that pushes each lifecycle event to all of them.
+
+- Each (signal, status) message is rendered once and cached; every chat
+  gets a copy of the same payload
+- Delivery goes through the outbox (token buckets, retries), in batches
+  so interactive replies keep headroom in the queue
+- Progress is committed to SQLite after every batch; a broadcast that was
+  running when the process died resumes from its cursor on startup
+- The worker sending a broadcast holds a renewed lease on its row, so a
+  resume (e.g. by a newly elected leader) only picks up orphaned ones
+- Chats that blocked the bot (HTTP 403) are deactivated automatically
+"""
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from runtime_paths import data_path, prepare
+from structured_log import get_logger
+from telegram_formatter import build_message_payload, format_signal_message
+from telegram_queue import TELEGRAM_QUEUE_SIZE, outbox
+
+log = get_logger("subscribers")
+
+SUBSCRIBERS_DB = os.getenv("SUBSCRIBERS_DB") or data_path("subscribers.db")
+BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "500"))
+BROADCAST_LEASE_SECONDS = float(os.getenv("BROADCAST_LEASE_SECONDS", "60"))  # renewed every third of this
+RENDER_CACHE_SIZE = 256
+
+
+class SubscriberRegistry:
+    """Persistent chat registry and broadcast progress (one SQLite file, WAL, per-thread connections)"""
+
+    def __init__(self, db_path: str = SUBSCRIBERS_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use (never at import)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(prepare(self.db_path), timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS subscribers ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id TEXT NOT NULL UNIQUE,"
+                " active INTEGER NOT NULL DEFAULT 1, subscribed_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS broadcasts ("
+                " key TEXT PRIMARY KEY, payload TEXT NOT NULL, state TEXT NOT NULL,"
+                " max_id INTEGER NOT NULL, cursor INTEGER NOT NULL DEFAULT 0,"
+                " total INTEGER NOT NULL, sent INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL, finished_at REAL, owner TEXT, lease_until REAL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(broadcasts)")}
+            for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:  # Files created before broadcast leases
+                    conn.execute(f"ALTER TABLE broadcasts ADD COLUMN {column} {kind}")
+            self._local.conn = conn
+        return conn
+
+    def subscribe(self, chat_id) -> bool:
+        """Add or reactivate a chat; False if it was already active"""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT active FROM subscribers WHERE chat_id = ?", (str(chat_id),)).fetchone()
+        if row and row[0]:
+            return False
+        conn.execute(
+            "INSERT INTO subscribers (chat_id, active, subscribed_at, updated_at) VALUES (?, 1, ?, ?) "
+            "ON CONFLICT (chat_id) DO UPDATE SET active = 1, updated_at = excluded.updated_at",
+            (str(chat_id), now, now),
+        )
+        return True
+
+    def unsubscribe(self, chat_id) -> bool:
+        cur = self._conn().execute(
+            "UPDATE subscribers SET active = 0, updated_at = ? WHERE chat_id = ? AND active = 1",
+            (time.time(), str(chat_id)),
+        )
+        return cur.rowcount > 0
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM subscribers WHERE active = 1").fetchone()[0]
+
+    def max_id(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM subscribers").fetchone()[0]
+
+    def page(self, after_id: int, upto_id: int, limit: int) -> List[Tuple[int, str]]:
+        """Active chats in id order (keyset pagination, stable across restarts)"""
+        return self._conn().execute(
+            "SELECT id, chat_id FROM subscribers WHERE active = 1 AND id > ? AND id <= ? "
+            "ORDER BY id LIMIT ?",
+            (after_id, upto_id, limit),
+        ).fetchall()
+
+    # --- Broadcast progress -------------------------------------------------
+
+    def create_broadcast(self, key: str, payload: Dict[str, Any], total: int, owner: str) -> bool:
+        """Record a new RUNNING broadcast up to the current max id, leased to owner; False if key exists"""
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT OR IGNORE INTO broadcasts (key, payload, state, max_id, total, created_at, owner, lease_until) "
+            "VALUES (?, ?, 'RUNNING', ?, ?, ?, ?, ?)",
+            (key, json.dumps(payload), self.max_id(), total, now, owner, now + BROADCAST_LEASE_SECONDS),
+        )
+        return cur.rowcount > 0
+
+    def claim_broadcast(self, key: str, owner: str) -> bool:
+        """Take over a RUNNING broadcast whose lease lapsed (its sender died); atomic across processes"""
+        now = time.time()
+        cur = self._conn().execute(
+            "UPDATE broadcasts SET owner = ?, lease_until = ? WHERE key = ? AND state = 'RUNNING'"
+            " AND (owner IS NULL OR owner = ? OR lease_until IS NULL OR lease_until < ?)",
+            (owner, now + BROADCAST_LEASE_SECONDS, key, owner, now),
+        )
+        return cur.rowcount > 0
+
+    def renew_broadcast(self, key: str, owner: str) -> bool:
+        """Extend owner's lease; False if another worker has taken the broadcast over"""
+        cur = self._conn().execute(
+            "UPDATE broadcasts SET lease_until = ? WHERE key = ? AND owner = ? AND state = 'RUNNING'",
+            (time.time() + BROADCAST_LEASE_SECONDS, key, owner),
+        )
+        return cur.rowcount > 0
+
+    def release_broadcasts(self, owner: str):
+        """Expire owner's leases at once (clean shutdown) so another worker can resume them"""
+        self._conn().execute(
+            "UPDATE broadcasts SET lease_until = 0 WHERE owner = ? AND state = 'RUNNING'", (owner,)
+        )
+
+    def running_broadcasts(self) -> List[str]:
+        return [row[0] for row in self._conn().execute(
+            "SELECT key FROM broadcasts WHERE state = 'RUNNING' ORDER BY created_at"
+        )]
+
+    def load_broadcast(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT payload, max_id, cursor, sent, failed, created_at FROM broadcasts WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"payload": json.loads(row[0]), "max_id": row[1], "cursor": row[2],
+                "sent": row[3], "failed": row[4], "created_at": row[5]}
+
+    def save_progress(self, key: str, cursor: int, sent: int, failed: int, owner: str) -> bool:
+        """Commit a batch (renewing the lease); False if owner no longer holds the broadcast"""
+        cur = self._conn().execute(
+            "UPDATE broadcasts SET cursor = ?, sent = ?, failed = ?, lease_until = ? WHERE key = ? AND owner = ?",
+            (cursor, sent, failed, time.time() + BROADCAST_LEASE_SECONDS, key, owner),
+        )
+        return cur.rowcount > 0
+
+    def finish_broadcast(self, key: str, finished_at: float):
+        self._conn().execute("UPDATE broadcasts SET state = 'DONE', finished_at = ? WHERE key = ?", (finished_at, key))
+
+    def running_progress(self) -> List[Tuple[str, int, int, int]]:
+        """(key, total, sent, failed) of every RUNNING broadcast"""
+        return self._conn().execute(
+            "SELECT key, total, sent, failed FROM broadcasts WHERE state = 'RUNNING'"
+        ).fetchall()
+
+
+class BroadcastEngine:
+    """Render once, fan out to every subscriber, resume after a crash"""
+
+    def __init__(self, registry: SubscriberRegistry):
+        self.registry = registry
+        self._rendered: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stats = {"rendered": 0, "render_hits": 0, "started": 0, "duplicates": 0, "deactivated": 0,
+                      "resumed": 0, "lost_leases": 0}
+        self.last: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _key(signal: Dict[str, Any]) -> Optional[str]:
+        signal_id = signal.get("id") or signal.get("signal_id")
+        return f"{signal_id}:{signal.get('status')}" if signal_id is not None else None
+
+    def render(self, signal: Dict[str, Any]) -> Dict[str, Any]:
+        """Message payload (without chat_id) for this signal state, cached by (signal, status)"""
+        key = self._key(signal)
+        if key is not None and key in self._rendered:
+            self._rendered.move_to_end(key)
+            self.stats["render_hits"] += 1
+            return self._rendered[key]
+
+        payload = build_message_payload(None, format_signal_message(signal))
+        del payload["chat_id"]
+        self.stats["rendered"] += 1
+        if key is not None:
+            self._rendered[key] = payload
+            if len(self._rendered) > RENDER_CACHE_SIZE:
+                self._rendered.popitem(last=False)
+        return payload
+
+    def publish(self, signal: Dict[str, Any], payload: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Start fanning this signal state out to all active subscribers.
+        Idempotent per (signal, status): the frontend and the watcher can
+        both report the same hit without subscribers getting it twice.
+        """
+        payload = payload or self.render(signal)
+        key = self._key(signal) or hashlib.sha1(payload["text"].encode()).hexdigest()[:16]
+        total = self.registry.count()
+        if not total:
+            return False
+
+        if not self.registry.create_broadcast(key, payload, total, self.owner):
+            self.stats["duplicates"] += 1
+            return True
+        self.stats["started"] += 1
+        self._spawn(key)
+        return True
+
+    def _spawn(self, key: str):
+        task = asyncio.get_running_loop().create_task(self._run(key))
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._tasks.pop(key) if self._tasks.get(key) is t else None)
+
+    def resume(self) -> int:
+        """Restart interrupted broadcasts whose lease lapsed (call once the outbox is running)"""
+        resumed = 0
+        for key in self.registry.running_broadcasts():
+            # A live worker still renewing its lease keeps the broadcast
+            if key not in self._tasks and self.registry.claim_broadcast(key, self.owner):
+                log.info("🔁 Resuming broadcast", key=key)
+                self._spawn(key)
+                resumed += 1
+        self.stats["resumed"] += resumed
+        return resumed
+
+    async def stop(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks = {}
+        try:
+            self.registry.release_broadcasts(self.owner)
+        except Exception as e:
+            log.warning("⚠️ Broadcast leases not released", error=str(e))
+
+    async def _keep_lease(self, key: str, lost: asyncio.Event):
+        while True:
+            await asyncio.sleep(BROADCAST_LEASE_SECONDS / 3)
+            if not self.registry.renew_broadcast(key, self.owner):
+                lost.set()
+                return
+
+    def _on_delivered(self, chat_id, delivered: bool, status: Optional[int]):
+        if status == 403 and self.registry.unsubscribe(chat_id):
+            self.stats["deactivated"] += 1
+
+    async def _send_batch(self, chats: List[Tuple[int, str]], payload: Dict[str, Any]) -> Tuple[int, int]:
+        """Queue one batch and wait until every message is sent or given up"""
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        counts = {"pending": len(chats), "sent": 0, "failed": 0}
+
+        def on_done(chat_id, delivered: bool, status: Optional[int]):
+            self._on_delivered(chat_id, delivered, status)
+            counts["sent" if delivered else "failed"] += 1
+            counts["pending"] -= 1
+            if counts["pending"] == 0 and not done.done():
+                done.set_result(None)
+
+        for _, chat_id in chats:
+            if not await outbox.put_payload(chat_id, {**payload, "chat_id": chat_id}, on_done):
+                on_done(chat_id, False, None)
+        await done
+        return counts["sent"], counts["failed"]
+
+    async def _run(self, key: str):
+        state = self.registry.load_broadcast(key)
+        if state is None:
+            return
+        payload, max_id, cursor = state["payload"], state["max_id"], state["cursor"]
+        sent, failed, created_at = state["sent"], state["failed"], state["created_at"]
+        # Leave half the outbox for replies and retries
+        batch_size = max(1, min(BROADCAST_BATCH_SIZE, TELEGRAM_QUEUE_SIZE // 2))
+        lost = asyncio.Event()
+        heartbeat = asyncio.get_running_loop().create_task(self._keep_lease(key, lost))
+
+        try:
+            while True:
+                chats = self.registry.page(cursor, max_id, batch_size) if not lost.is_set() else []
+                if chats:
+                    batch_sent, batch_failed = await self._send_batch(chats, payload)
+                    cursor, sent, failed = chats[-1][0], sent + batch_sent, failed + batch_failed
+                    if not self.registry.save_progress(key, cursor, sent, failed, self.owner):
+                        lost.set()
+                if lost.is_set():
+                    # Lease lapsed and another worker resumed it: stop before sending duplicates
+                    self.stats["lost_leases"] += 1
+                    log.warning("⚠️ Broadcast lease lost, stopping", key=key)
+                    return
+                if not chats:
+                    break
+        finally:
+            heartbeat.cancel()
+
+        finished = time.time()
+        self.registry.finish_broadcast(key, finished)
+        self.last = {"key": key, "sent": sent, "failed": failed, "seconds": round(finished - created_at, 2)}
+        log.info("📣 Broadcast complete", **self.last)
+
+    def get_stats(self) -> Dict[str, Any]:
+        running = [
+            {"key": key, "progress": f"{sent + failed}/{total}"}
+            for key, total, sent, failed in self.registry.running_progress()
+        ]
+        return {
+            **self.stats,
+            "subscribers": self.registry.count(),
+            "running": running,
+            "last": self.last,
+        }
+
+
+subscribers = SubscriberRegistry()
+broadcasts = BroadcastEngine(subscribers)
@@ -13,7 +13,23 @@ ON fx_signals(asset, timeframe, generated_at DESC);
 CREATE INDEX IF NOT EXISTS idx_fx_signals_state_generated 
 ON fx_signals(state, generated_at DESC);
 
--- 4. Index for Date Range filtering (Already partially covered by idx 1, but specific for pagination)
+-- 4. Keyset (cursor) pagination for /signal?cursor=...
+-- Rows are ordered by (generated_at, id) DESC; each index leads with the
+-- equality filter so "WHERE asset = ? AND (generated_at, id) < (?, ?)"
+-- seeks directly to the cursor row instead of skipping an offset.
+CREATE INDEX IF NOT EXISTS idx_fx_signals_generated_id_desc
+ON fx_signals(generated_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_fx_signals_asset_generated_id
+ON fx_signals(asset, generated_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_fx_signals_state_generated_id
+ON fx_signals(state, generated_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_fx_signals_asset_state_generated_id
+ON fx_signals(asset, state, generated_at DESC, id DESC);
+
+-- 5. Index for Date Range filtering (Already partially covered by idx 1, but specific for pagination)
 -- (PostgreSQL indexes are already efficient for range scans on single columns)
 
 -- Note: These indexes ensure that when filtering by Asset or Outcome, 
@@ -1,6 +1,11 @@
 import os
-import requests
+import http_client
 from datetime import datetime, timezone
+from structured_log import get_logger
+
+log = get_logger("telegram_formatter")
+
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
 
 def _format_status_badge(status: str) -> str:
     return {
@@ -155,6 +160,20 @@ def format_signal_message(signal: dict) -> str:
         f"🛑 SL: {sl}\n"
     )
 
+def build_message_payload(chat_id, message: str) -> dict:
+    return {
+        "chat_id": chat_id,
+        "text": message,
+        "parse_mode": "Markdown",
+        "reply_markup": {
+            "inline_keyboard": [
+                [
+                    {"text": "📈 View Latest Signal", "url": "https://www.signalgeniusai.com/"}
+                ]
+            ]
+        }
+    }
+
 def send_telegram(chat_id, signal):
     """
     Sends the formatted signal message to Telegram with interactive buttons.
@@ -166,22 +185,19 @@ def send_telegram(chat_id, signal):
     message = format_signal_message(signal)
 
     try:
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        payload = {
-            "chat_id": chat_id,
-            "text": message,
-            "parse_mode": "Markdown",
-            "reply_markup": {
-                "inline_keyboard": [
-                    [
-                        {"text": "📈 View Latest Signal", "url": "https://www.signalgeniusai.com/"}
-                    ]
-                ]
-            }
-        }
-        r = requests.post(url, json=payload, timeout=10)
+        url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
+        r = http_client.post(url, json=build_message_payload(chat_id, message), timeout=10)
         r.raise_for_status()
         return r.json()
     except Exception as e:
-        print(f"❌ Telegram Error: {e}")
+        log.error("❌ Telegram Error", error=str(e))
         return None
+
+async def post_telegram_payload_async(payload: dict):
+    """
+    Raw sendMessage call; returns the response without raising so callers
+    (the outbound queue) can inspect 429 retry_after.
+    """
+    bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
+    url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
+    return await http_client.apost(url, json=payload, timeout=10)
@@ -0,0 +1,235 @@
+"""
+Telegram Outbound Queue
+Endpoints enqueue messages and return immediately; background workers
+deliver them within Telegram's limits.
+- Bounded queue (full -> enqueue returns False)
+- Token buckets: per chat and global
+- Retries with exponential backoff, honoring 429 retry_after
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+from structured_log import get_logger
+from telegram_formatter import build_message_payload, format_signal_message, post_telegram_payload_async
+
+log = get_logger("telegram_queue")
+
+TELEGRAM_QUEUE_SIZE = int(os.getenv("TELEGRAM_QUEUE_SIZE", "1000"))
+TELEGRAM_WORKERS = int(os.getenv("TELEGRAM_WORKERS", "4"))
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))    # msgs/sec (Telegram: ~30)
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))         # msgs/sec per chat
+TELEGRAM_CHAT_BURST = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "5"))
+TELEGRAM_BACKOFF_BASE_SECONDS = float(os.getenv("TELEGRAM_BACKOFF_BASE_SECONDS", "1"))
+TELEGRAM_BACKOFF_MAX_SECONDS = 60.0
+TELEGRAM_CHAT_BUCKETS_MAX = 10000  # idle per-chat buckets pruned above this (broadcast fan-out)
+
+
+DoneCallback = Callable[[Any, bool, Optional[int]], None]
+
+
+class TokenBucket:
+    """Classic token bucket; reserve() returns how long to wait for a token"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def penalize(self, seconds: float):
+        """Push the bucket into debt (server told us to back off)"""
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class _Job:
+    __slots__ = ("chat_id", "payload", "attempts", "enqueued_at", "reserved", "on_done")
+
+    def __init__(self, chat_id, payload: Dict[str, Any], on_done: Optional[DoneCallback] = None):
+        self.chat_id = chat_id
+        self.payload = payload
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+        self.reserved = False  # holds a per-chat token while parked
+        self.on_done = on_done  # called once with (chat_id, delivered, http_status)
+
+
+class TelegramOutbox:
+    """Bounded delivery queue drained by a small pool of asyncio workers"""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._global = TokenBucket(TELEGRAM_GLOBAL_RATE, TELEGRAM_GLOBAL_RATE)
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._delayed = 0
+        self.stats = {
+            "enqueued": 0, "sent": 0, "failed": 0, "retried": 0,
+            "rate_limited": 0, "dropped_full": 0, "delivery_ms_total": 0,
+        }
+
+    def _bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= TELEGRAM_CHAT_BUCKETS_MAX:
+                self._prune_buckets()
+            bucket = self._chats[chat_id] = TokenBucket(TELEGRAM_CHAT_RATE, TELEGRAM_CHAT_BURST)
+        return bucket
+
+    def _prune_buckets(self):
+        """Forget chats whose bucket has refilled (a new bucket would be identical)"""
+        now = time.monotonic()
+        self._chats = {
+            chat_id: bucket for chat_id, bucket in self._chats.items()
+            if bucket.tokens + (now - bucket.updated) * bucket.rate < bucket.capacity
+        }
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=TELEGRAM_QUEUE_SIZE)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(TELEGRAM_WORKERS)]
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """Give queued messages a short window to go out, then stop workers"""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                log.warning("⚠️ Telegram queue stopped with undelivered messages", undelivered=self._queue.qsize())
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+    def enqueue_payload(self, chat_id, payload: Dict[str, Any], on_done: Optional[DoneCallback] = None) -> bool:
+        if self._queue is None or not os.getenv("TELEGRAM_BOT_TOKEN") or not chat_id:
+            return False
+        try:
+            self._queue.put_nowait(_Job(chat_id, payload, on_done))
+        except asyncio.QueueFull:
+            self.stats["dropped_full"] += 1
+            log.warning("⚠️ Telegram queue full, dropping message", chat_id=chat_id)
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    async def put_payload(self, chat_id, payload: Dict[str, Any], on_done: Optional[DoneCallback] = None) -> bool:
+        """Like enqueue_payload, but waits for queue space instead of dropping (bulk senders)"""
+        if self._queue is None or not os.getenv("TELEGRAM_BOT_TOKEN") or not chat_id:
+            return False
+        await self._queue.put(_Job(chat_id, payload, on_done))
+        self.stats["enqueued"] += 1
+        return True
+
+    def enqueue(self, chat_id, signal: Dict[str, Any]) -> bool:
+        """Render a signal and queue it; returns False if not accepted"""
+        return self.enqueue_payload(chat_id, build_message_payload(chat_id, format_signal_message(signal)))
+
+    def enqueue_text(self, chat_id, text: str) -> bool:
+        return self.enqueue_payload(chat_id, {"chat_id": chat_id, "text": text})
+
+    def _requeue_later(self, job: _Job, delay: float):
+        self._delayed += 1
+
+        def _put():
+            self._delayed -= 1
+            try:
+                self._queue.put_nowait(job)
+            except asyncio.QueueFull:
+                self.stats["dropped_full"] += 1
+                self._finish(job, False, None)
+        asyncio.get_running_loop().call_later(delay, _put)
+
+    def _finish(self, job: _Job, delivered: bool, status: Optional[int]):
+        if job.on_done is not None:
+            try:
+                job.on_done(job.chat_id, delivered, status)
+            except Exception as e:
+                log.warning("⚠️ Telegram delivery callback failed", chat_id=job.chat_id, error=str(e))
+
+    async def _deliver(self, job: _Job):
+        if not job.reserved:
+            chat_wait = self._bucket(job.chat_id).reserve()
+            if chat_wait > 0:
+                # Park it instead of sleeping, so one busy chat never blocks the others
+                job.reserved = True
+                self._requeue_later(job, chat_wait)
+                return
+        job.reserved = False
+
+        wait = self._global.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        job.attempts += 1
+        retry_after = None
+        try:
+            resp = await post_telegram_payload_async(job.payload)
+            if resp.is_success:
+                self.stats["sent"] += 1
+                self.stats["delivery_ms_total"] += int((time.monotonic() - job.enqueued_at) * 1000)
+                self._finish(job, True, resp.status_code)
+                return
+            if resp.status_code == 429:
+                self.stats["rate_limited"] += 1
+                try:
+                    retry_after = float(resp.json().get("parameters", {}).get("retry_after", 1))
+                except Exception:
+                    retry_after = 1.0
+                self._bucket(job.chat_id).penalize(retry_after)
+            elif resp.status_code < 500:
+                # 400/403: bad request or bot blocked, retrying cannot help
+                self.stats["failed"] += 1
+                log.error("❌ Telegram rejected message", chat_id=job.chat_id, status=resp.status_code)
+                self._finish(job, False, resp.status_code)
+                return
+            error = f"HTTP {resp.status_code}"
+            status = resp.status_code
+        except Exception as e:
+            error = repr(e)
+            status = None
+
+        if job.attempts > TELEGRAM_MAX_RETRIES:
+            self.stats["failed"] += 1
+            log.error("❌ Telegram delivery failed", chat_id=job.chat_id, attempts=job.attempts, error=str(error))
+            self._finish(job, False, status)
+            return
+
+        backoff = min(TELEGRAM_BACKOFF_MAX_SECONDS, TELEGRAM_BACKOFF_BASE_SECONDS * 2 ** (job.attempts - 1))
+        delay = retry_after if retry_after is not None else backoff * (0.5 + random.random() / 2)
+        self.stats["retried"] += 1
+        self._requeue_later(job, delay)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._deliver(job)
+            except Exception as e:
+                self.stats["failed"] += 1
+                log.error("❌ Telegram worker error", error=str(e))
+                self._finish(job, False, None)
+            finally:
+                self._queue.task_done()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        sent = stats.pop("delivery_ms_total")
+        stats["avg_delivery_ms"] = int(sent / stats["sent"]) if stats["sent"] else None
+        stats["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        stats["awaiting_retry"] = self._delayed
+        stats["capacity"] = TELEGRAM_QUEUE_SIZE
+        return stats
+
+
+outbox = TelegramOutbox()
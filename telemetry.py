@@ -0,0 +1,278 @@
+"""
+Signal Telemetry
+Win/loss counters over fx_signals, maintained incrementally so the
+dashboard no longer downloads the whole table to count outcomes.
+
+- Each refresh fetches only rows generated since the high-water mark,
+  plus the recent window where open signals can still change state
+- Open rows keep their current contribution, so a PUBLISHED -> TP_HIT
+  transition moves one count instead of triggering a recount
+- Rows older than the window are final and are forgotten (counted once)
+- /api/v1/telemetry serves a prebuilt snapshot from memory; workers that
+  are not the background leader reload the leader's checkpoint instead
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import http_client
+from jsonl_writer import atomic_write_json
+from runtime_paths import data_path, prepare
+from structured_log import get_logger
+
+log = get_logger("telemetry")
+
+TELEMETRY_REFRESH_SECONDS = float(os.getenv("TELEMETRY_REFRESH_SECONDS", "60"))
+TELEMETRY_REFETCH_MINUTES = int(os.getenv("TELEMETRY_REFETCH_MINUTES", "240"))  # > 180 min signal lifetime
+TELEMETRY_PAGE_SIZE = 1000
+TELEMETRY_CHECKPOINT_FILE = os.getenv("TELEMETRY_CHECKPOINT_FILE") or data_path("telemetry_checkpoint.json")
+TELEMETRY_COLUMNS = "id,asset,timeframe,state,status,ai_confidence,generated_at"
+
+WIN_STATES = {"TP_HIT"}
+LOSS_STATES = {"SL_HIT"}
+CONFIDENCE_BUCKETS = (50, 60, 70, 80, 90)  # lower bounds; below 50 -> "<50"
+
+# Same UTC session boundaries the scheduler polls by
+SESSIONS = (
+    (12, 16, "overlap"),
+    (7, 12, "london"),
+    (16, 21, "new_york"),
+    (0, 24, "asia"),
+)
+
+
+def _parse_ts(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def session_name(ts: datetime) -> str:
+    for start, end, name in SESSIONS:
+        if start <= ts.hour < end:
+            return name
+    return "asia"
+
+
+def confidence_bucket(value) -> str:
+    try:
+        conf = float(value)
+    except (TypeError, ValueError):
+        return "unknown"
+    if conf <= 1.2:  # Stored as a fraction
+        conf *= 100
+    label = "<50"
+    for lower in CONFIDENCE_BUCKETS:
+        if conf >= lower:
+            label = f"{lower}+" if lower == CONFIDENCE_BUCKETS[-1] else f"{lower}-{lower + 9}"
+    return label
+
+
+def _outcome(row: Dict[str, Any]) -> str:
+    state = str(row.get("state") or row.get("status") or "").upper()
+    if state in WIN_STATES:
+        return "win"
+    if state in LOSS_STATES:
+        return "loss"
+    return "other"
+
+
+def _empty_counters() -> Dict[str, Any]:
+    return {"total": 0, "wins": 0, "losses": 0, "confidence": {}}
+
+
+class TelemetryAggregator:
+    """Checkpointed outcome counters keyed by asset|timeframe|session"""
+
+    def __init__(self, checkpoint_file: str = TELEMETRY_CHECKPOINT_FILE):
+        self.checkpoint_file = checkpoint_file
+        self.groups: Dict[str, Dict[str, Any]] = {}
+        self.open: Dict[str, List] = {}       # id -> [group, outcome, bucket, generated_at]
+        self.high_water: Optional[str] = None  # newest generated_at counted
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self._loaded_mtime: Optional[float] = None
+        self.stats = {"refreshes": 0, "errors": 0, "rows_fetched": 0, "last_refresh_ms": None}
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.checkpoint_file):
+                self._loaded_mtime = os.path.getmtime(self.checkpoint_file)
+                with open(self.checkpoint_file, "r") as f:
+                    state = json.load(f)
+                self.groups = state.get("groups", {})
+                self.open = state.get("open", {})
+                self.high_water = state.get("high_water")
+                self._build_snapshot()
+        except Exception as e:
+            log.warning("⚠️ Telemetry checkpoint unreadable, rebuilding", error=str(e))
+            self.groups, self.open, self.high_water = {}, {}, None
+
+    def _save(self):
+        atomic_write_json(prepare(self.checkpoint_file), {
+            "groups": self.groups, "open": self.open, "high_water": self.high_water,
+        })
+        self._loaded_mtime = os.path.getmtime(self.checkpoint_file)
+
+    def follow(self):
+        """Non-leader workers: pick up the checkpoint the leader last wrote"""
+        try:
+            mtime = os.path.getmtime(self.checkpoint_file)
+        except OSError:
+            return
+        if mtime != self._loaded_mtime:
+            self._load()
+
+    def _apply(self, group: str, outcome: str, bucket: str, sign: int):
+        counters = self.groups.setdefault(group, _empty_counters())
+        counters["total"] += sign
+        if outcome == "win":
+            counters["wins"] += sign
+        elif outcome == "loss":
+            counters["losses"] += sign
+        counters["confidence"][bucket] = counters["confidence"].get(bucket, 0) + sign
+
+    def ingest(self, rows: List[Dict[str, Any]], now: Optional[datetime] = None) -> int:
+        """Fold fetched rows into the counters; returns rows that changed something"""
+        now = now or datetime.now(timezone.utc)
+        horizon = now - timedelta(minutes=TELEMETRY_REFETCH_MINUTES)
+        high_water = _parse_ts(self.high_water)
+        changed = 0
+        for row in rows:
+            ts = _parse_ts(row.get("generated_at"))
+            row_id = row.get("id")
+            if ts is None or row_id is None:
+                continue
+            row_id = str(row_id)
+            group = f"{row.get('asset') or 'UNKNOWN'}|{row.get('timeframe') or 'M15'}|{session_name(ts)}"
+            contribution = [group, _outcome(row), confidence_bucket(row.get("ai_confidence")), ts.isoformat()]
+
+            previous = self.open.get(row_id)
+            if previous is None and high_water is not None and ts <= high_water and ts < horizon:
+                continue  # Counted before it aged out of the window; final
+            if previous == contribution:
+                continue
+            if previous is not None:
+                self._apply(*previous[:3], -1)
+            self._apply(*contribution[:3], +1)
+            self.open[row_id] = contribution
+            changed += 1
+            if high_water is None or ts > high_water:
+                high_water = ts
+
+        # Rows past the refetch window can no longer change: keep their counts, drop the row
+        for row_id in [rid for rid, c in self.open.items() if _parse_ts(c[3]) < horizon]:
+            del self.open[row_id]
+        self.high_water = high_water.isoformat() if high_water else None
+        return changed
+
+    def ingest_rows(self, rows: List[Dict[str, Any]]):
+        """Push-mode feed (signal replica change stream) instead of polling Supabase"""
+        if self.ingest(rows) or self.snapshot is None:
+            self._build_snapshot()
+            self._save()
+
+    async def _fetch(self, since: Optional[datetime]) -> List[Dict[str, Any]]:
+        sb_url = os.getenv("SUPABASE_URL")
+        sb_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
+        if not (sb_url and sb_key):
+            raise RuntimeError("Supabase not configured")
+
+        rows: List[Dict[str, Any]] = []
+        while True:
+            params = {
+                "select": TELEMETRY_COLUMNS,
+                "order": "generated_at.asc,id.asc",
+                "limit": TELEMETRY_PAGE_SIZE,
+                "offset": len(rows),
+            }
+            if since is not None:
+                params["generated_at"] = f"gte.{since.isoformat()}"
+            resp = await http_client.aget(
+                f"{sb_url}/rest/v1/fx_signals", params=params,
+                headers={"apikey": sb_key, "Authorization": f"Bearer {sb_key}"}, timeout=10,
+            )
+            resp.raise_for_status()
+            page = resp.json()
+            rows.extend(page)
+            if len(page) < TELEMETRY_PAGE_SIZE:
+                return rows
+
+    async def refresh(self) -> int:
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        high_water = _parse_ts(self.high_water)
+        # First run backfills everything once; afterwards only new rows + the open window
+        since = None if high_water is None else min(high_water, now - timedelta(minutes=TELEMETRY_REFETCH_MINUTES))
+        rows = await self._fetch(since)
+        changed = self.ingest(rows, now)
+        self.stats["refreshes"] += 1
+        self.stats["rows_fetched"] += len(rows)
+        self.stats["last_refresh_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if changed or self.snapshot is None:
+            self._build_snapshot()
+            self._save()
+        return changed
+
+    def _build_snapshot(self):
+        total = {"total": 0, "wins": 0, "losses": 0}
+        by = {"asset": {}, "timeframe": {}, "session": {}}
+        confidence: Dict[str, int] = {}
+        for group, counters in self.groups.items():
+            asset, timeframe, session = group.split("|")
+            for dim, value in (("asset", asset), ("timeframe", timeframe), ("session", session)):
+                entry = by[dim].setdefault(value, {"total": 0, "wins": 0, "losses": 0})
+                for field in entry:
+                    entry[field] += counters[field]
+            for field in total:
+                total[field] += counters[field]
+            for bucket, n in counters["confidence"].items():
+                confidence[bucket] = confidence.get(bucket, 0) + n
+
+        def _with_rate(c: Dict[str, int]) -> Dict[str, Any]:
+            decided = c["wins"] + c["losses"]
+            return {**c, "win_rate": round(c["wins"] / decided * 100, 1) if decided else 0}
+
+        performance = _with_rate(total)
+        self.snapshot = {
+            "total_samples": total["total"],
+            "performance": {
+                "total_signals": total["total"],
+                "wins": total["wins"],
+                "losses": total["losses"],
+                # Same type as the dashboard's own count: (x).toFixed(1) -> "57.1", or 0 with no rows
+                "win_rate": f"{performance['win_rate']:.1f}" if total["total"] else 0,
+            },
+            "confidence": confidence,
+            "by_asset": {k: _with_rate(v) for k, v in by["asset"].items()},
+            "by_timeframe": {k: _with_rate(v) for k, v in by["timeframe"].items()},
+            "by_session": {k: _with_rate(v) for k, v in by["session"].items()},
+            "groups": {k: _with_rate(v) for k, v in self.groups.items()},
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    async def run(self):
+        """Background refresher"""
+        if not (os.getenv("SUPABASE_URL") and (os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY"))):
+            log.info("ℹ️ Supabase not configured, telemetry refresher idle")
+            return
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.warning("⚠️ Telemetry refresh failed", error=str(e))
+            await asyncio.sleep(TELEMETRY_REFRESH_SECONDS)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "groups": len(self.groups), "open_rows": len(self.open), "high_water": self.high_water}
+
+
+telemetry = TelemetryAggregator()
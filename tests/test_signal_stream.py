@@ -0,0 +1,32 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from signal_stream import SignalBroadcaster, lifecycle_state
+
+
+def _poll(broadcaster, rows):
+    async def fetch():
+        return rows
+    broadcaster._fetch_rows = fetch
+    return asyncio.run(broadcaster.poll_once())
+
+
+def test_closed_row_publishes_tp_hit():
+    broadcaster = SignalBroadcaster()
+    queue = broadcaster.subscribe()
+    _poll(broadcaster, [{"id": 1, "state": "ENTRY_HIT", "status": "ENTRY_HIT"}])  # primes
+    published = _poll(broadcaster, [{"id": 1, "state": "TP_HIT", "status": "CLOSED_TP"}])
+    assert published == 1
+    event = queue.get_nowait()
+    assert event["type"] == "TP_HIT"
+    assert event["signal"]["id"] == 1
+
+
+def test_lifecycle_state_prefers_state_and_maps_status():
+    assert lifecycle_state({"state": "SL_HIT", "status": "CLOSED_SL"}) == "SL_HIT"
+    assert lifecycle_state({"state": "WAITING_FOR_ENTRY", "status": "PUBLISHED"}) == "PUBLISHED"
+    assert lifecycle_state({"status": "CLOSED_TIMEOUT"}) == "EXPIRED"
+    assert lifecycle_state({"state": "UNKNOWN"}) == ""
@@ -0,0 +1,272 @@
+"""
+Tick Store
+In-memory price history per symbol, fed by a streaming source.
+
+- One preallocated NumPy ring per symbol (no allocation per tick)
+- latest() is O(1); window(n) / since(seconds) return zero-copy views
+- Sources: Twelve Data websocket, JSONL/CSV file replay, TCP socket replay
+  (the replays are stand-ins for the live feed in tests and backtests)
+
+Consumers read prices from here instead of issuing their own REST calls.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from structured_log import get_logger
+
+try:
+    import websockets
+except ImportError:  # Optional: only the live Twelve Data stream needs it
+    websockets = None
+
+log = get_logger("tick_store")
+
+TICK_BUFFER_SIZE = int(os.getenv("TICK_BUFFER_SIZE", "65536"))  # ticks kept per symbol
+TICK_SYMBOLS = [s.strip() for s in os.getenv("TICK_SYMBOLS", "EUR/USD").split(",") if s.strip()]
+TICK_MAX_AGE_SECONDS = float(os.getenv("TICK_MAX_AGE_SECONDS", "15"))  # older = stale
+TWELVE_DATA_WS_URL = "wss://ws.twelvedata.com/v1/quotes/price"
+TWELVE_DATA_HEARTBEAT_SECONDS = 10
+RECONNECT_MAX_SECONDS = 60
+
+
+class TickRing:
+    """
+    Fixed-size ring of (timestamp, price) float64 pairs.
+    Every tick is written twice (i and i + capacity), so the newest n ticks
+    are always one contiguous slice and windows never need a copy.
+    """
+
+    def __init__(self, capacity: int = TICK_BUFFER_SIZE):
+        self.capacity = capacity
+        self._ts = np.zeros(2 * capacity, dtype=np.float64)
+        self._price = np.zeros(2 * capacity, dtype=np.float64)
+        self._head = 0      # next write slot in [0, capacity)
+        self.count = 0      # ticks ever written
+        self._lock = threading.Lock()
+
+    def append(self, ts: float, price: float):
+        with self._lock:
+            i = self._head
+            self._ts[i] = self._ts[i + self.capacity] = ts
+            self._price[i] = self._price[i + self.capacity] = price
+            self._head = (i + 1) % self.capacity
+            self.count += 1
+
+    def extend(self, ts: np.ndarray, prices: np.ndarray):
+        """Bulk append (replays); keeps only what fits"""
+        ts, prices = ts[-self.capacity:], prices[-self.capacity:]
+        with self._lock:
+            idx = (self._head + np.arange(len(prices))) % self.capacity
+            self._ts[idx] = self._ts[idx + self.capacity] = ts
+            self._price[idx] = self._price[idx + self.capacity] = prices
+            self._head = (self._head + len(prices)) % self.capacity
+            self.count += len(prices)
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            if not self.count:
+                return None
+            i = self._head - 1 + self.capacity
+            return float(self._ts[i]), float(self._price[i])
+
+    def window(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Newest n ticks, oldest first, as read-only views into the ring.
+        Views alias the buffer and are only valid until the next append (a
+        full window's first slot is the next one overwritten): use them
+        right away, or np.array() them to keep them.
+        """
+        with self._lock:
+            size = len(self) if n is None else min(n, len(self))
+            end = self._head + self.capacity
+            ts = self._ts[end - size:end]
+            price = self._price[end - size:end]
+        ts.flags.writeable = False
+        price.flags.writeable = False
+        return ts, price
+
+    def since(self, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Ticks from the last `seconds` (binary search over the window)"""
+        ts, price = self.window()
+        start = np.searchsorted(ts, (now or time.time()) - seconds, side="left")
+        return ts[start:], price[start:]
+
+
+class TickStore:
+    """Symbol -> TickRing registry shared by every consumer in the process"""
+
+    def __init__(self, capacity: int = TICK_BUFFER_SIZE):
+        self.capacity = capacity
+        self._rings: Dict[str, TickRing] = {}
+        self._lock = threading.Lock()
+        self.sources: Dict[str, str] = {}   # source name -> status
+        self._listeners: List[Callable[[str, float, float], None]] = []
+
+    def add_listener(self, listener: Callable[[str, float, float], None]):
+        """Call listener(symbol, ts, price) for every new tick (keep it cheap)"""
+        self._listeners.append(listener)
+
+    def ring(self, symbol: str) -> TickRing:
+        ring = self._rings.get(symbol)
+        if ring is None:
+            with self._lock:
+                ring = self._rings.setdefault(symbol, TickRing(self.capacity))
+        return ring
+
+    def on_tick(self, symbol: str, price: float, ts: Optional[float] = None):
+        ts = ts if ts is not None else time.time()
+        self.ring(symbol).append(ts, float(price))
+        for listener in self._listeners:
+            try:
+                listener(symbol, ts, float(price))
+            except Exception as e:
+                log.warning("⚠️ Tick listener failed", symbol=symbol, error=str(e))
+
+    def latest(self, symbol: str, max_age: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """(timestamp, price) of the newest tick; None if missing or older than max_age"""
+        ring = self._rings.get(symbol)
+        tick = ring.latest() if ring else None
+        if tick and max_age is not None and time.time() - tick[0] > max_age:
+            return None
+        return tick
+
+    def latest_price(self, symbol: str, max_age: Optional[float] = TICK_MAX_AGE_SECONDS) -> Optional[float]:
+        tick = self.latest(symbol, max_age)
+        return tick[1] if tick else None
+
+    def window(self, symbol: str, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        return self.ring(symbol).window(n)
+
+    def since(self, symbol: str, seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+        return self.ring(symbol).since(seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        symbols = {}
+        for symbol, ring in list(self._rings.items()):
+            tick = ring.latest()
+            symbols[symbol] = {
+                "ticks": ring.count,
+                "buffered": len(ring),
+                "last_price": tick[1] if tick else None,
+                "age_seconds": round(now - tick[0], 3) if tick else None,
+            }
+        return {"symbols": symbols, "sources": dict(self.sources), "capacity": self.capacity}
+
+
+# ---- sources ---------------------------------------------------------
+
+
+def _parse_tick(record: Dict[str, Any]) -> Optional[Tuple[str, float, float]]:
+    """Normalize a tick record ({symbol, price, timestamp}) -> (symbol, ts, price)"""
+    try:
+        ts = record.get("timestamp")
+        return record["symbol"], float(ts) if ts is not None else time.time(), float(record["price"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _iter_tick_lines(lines: Iterable[str]):
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                tick = _parse_tick(json.loads(line))
+            except ValueError:
+                tick = None
+        else:
+            # CSV: symbol,timestamp,price
+            parts = line.split(",")
+            tick = _parse_tick({"symbol": parts[0], "timestamp": parts[1], "price": parts[2]}) if len(parts) >= 3 else None
+        if tick:
+            yield tick
+
+
+async def replay_file(store: TickStore, path: str, speed: float = 0.0) -> int:
+    """
+    Feed ticks from a JSONL or CSV file (symbol,timestamp,price).
+    speed=0 loads as fast as possible; speed=1 replays in real time.
+    """
+    store.sources[f"file:{path}"] = "running"
+    count, prev_ts = 0, None
+    with open(path, "r") as f:
+        for symbol, ts, price in _iter_tick_lines(f):
+            if speed > 0 and prev_ts is not None and ts > prev_ts:
+                await asyncio.sleep((ts - prev_ts) / speed)
+            elif count % 10000 == 0:
+                await asyncio.sleep(0)  # Stay cooperative on big files
+            store.on_tick(symbol, price, ts)
+            prev_ts, count = ts, count + 1
+    store.sources[f"file:{path}"] = f"done ({count} ticks)"
+    return count
+
+
+async def serve_socket_replay(store: TickStore, host: str = "127.0.0.1", port: int = 8765):
+    """TCP endpoint accepting newline-delimited ticks (test/replay stand-in for the live feed)"""
+
+    async def _client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                for symbol, ts, price in _iter_tick_lines([line.decode(errors="replace")]):
+                    store.on_tick(symbol, price, ts)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(_client, host, port)
+    store.sources[f"socket:{host}:{port}"] = "listening"
+    async with server:
+        await server.serve_forever()
+
+
+async def stream_twelve_data(store: TickStore, symbols=None, api_key: Optional[str] = None):
+    """Live prices from the Twelve Data websocket, reconnecting with backoff"""
+    api_key = api_key or os.getenv("TWELVE_DATA_API_KEY")
+    symbols = symbols or TICK_SYMBOLS
+    if websockets is None or not api_key:
+        store.sources["twelve_data"] = "disabled (websockets not installed)" if api_key else "disabled (no API key)"
+        return
+
+    backoff = 1
+    while True:
+        try:
+            async with websockets.connect(f"{TWELVE_DATA_WS_URL}?apikey={api_key}") as ws:
+                await ws.send(json.dumps({"action": "subscribe", "params": {"symbols": ",".join(symbols)}}))
+                store.sources["twelve_data"] = "connected"
+                log.info("📈 Tick stream connected", symbols=symbols)
+                backoff = 1
+                while True:
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=TWELVE_DATA_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        await ws.send(json.dumps({"action": "heartbeat"}))
+                        continue
+                    event = json.loads(raw)
+                    if event.get("event") == "price":
+                        tick = _parse_tick(event)
+                        if tick:
+                            store.on_tick(tick[0], tick[2], tick[1])
+        except asyncio.CancelledError:
+            store.sources["twelve_data"] = "stopped"
+            raise
+        except Exception as e:
+            store.sources["twelve_data"] = f"reconnecting ({e})"
+            log.warning("⚠️ Tick stream error, reconnecting", error=str(e), retry_in_seconds=backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(RECONNECT_MAX_SECONDS, backoff * 2)
+
+
+tick_store = TickStore()
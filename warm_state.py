@@ -0,0 +1,106 @@
+"""
+Warm Start
+Periodic snapshot of the API's read caches (recent history pages) so a
+restarted process answers from memory immediately instead of paying full
+upstream latency on its first requests. The latest/active signal caches
+are deliberately not snapshotted: a signal may have closed while the
+process was down, so those are always fetched fresh at startup.
+
+- restore() runs in the lifespan, before the server accepts traffic
+- Restored entries are marked stale, so the first read is served at once
+  and also triggers a background refresh
+- Snapshots older than WARM_STATE_MAX_AGE_SECONDS are ignored
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from jsonl_writer import atomic_write_json
+from runtime_paths import data_path, prepare
+from structured_log import get_logger
+
+log = get_logger("warm_state")
+
+WARM_STATE_FILE = os.getenv("WARM_STATE_FILE") or data_path("warm_state.json")
+WARM_STATE_SNAPSHOT_SECONDS = float(os.getenv("WARM_STATE_SNAPSHOT_SECONDS", "60"))
+WARM_STATE_MAX_AGE_SECONDS = float(os.getenv("WARM_STATE_MAX_AGE_SECONDS", "900"))
+WARM_HISTORY_KEYS = int(os.getenv("WARM_HISTORY_KEYS", "32"))  # most recently used history pages kept
+
+
+class WarmState:
+    """Named sections: dump() -> JSON-able data, load(data, age_seconds)"""
+
+    def __init__(self, path: str = WARM_STATE_FILE):
+        self.path = path
+        self._sections: Dict[str, tuple] = {}
+        self.restored: Dict[str, bool] = {}
+        self.snapshot_age: Optional[float] = None
+        self.timings: Dict[str, Optional[float]] = {"boot_ms": None, "restore_ms": None, "time_to_ready_ms": None}
+        self.stats = {"snapshots": 0, "errors": 0}
+
+    def register(self, name: str, dump: Callable[[], Any], load: Callable[[Any, float], None]):
+        self._sections[name] = (dump, load)
+
+    def restore(self) -> Dict[str, bool]:
+        started = time.perf_counter()
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    snapshot = json.load(f)
+                age = max(0.0, time.time() - snapshot.get("saved_at", 0))
+                self.snapshot_age = round(age, 1)
+                if age <= WARM_STATE_MAX_AGE_SECONDS:
+                    for name, (_, load) in self._sections.items():
+                        data = snapshot.get("sections", {}).get(name)
+                        if data is None:
+                            continue
+                        try:
+                            load(data, age)
+                            self.restored[name] = True
+                        except Exception as e:
+                            self.restored[name] = False
+                            log.warning("⚠️ Warm state section not restored", section=name, error=str(e))
+                else:
+                    log.info("🧊 Warm state snapshot too old, starting cold", age_seconds=self.snapshot_age)
+        except Exception as e:
+            log.warning("⚠️ Warm state unreadable, starting cold", error=str(e))
+        self.timings["restore_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return self.restored
+
+    def save(self):
+        sections = {}
+        for name, (dump, _) in self._sections.items():
+            try:
+                data = dump()
+            except Exception as e:
+                log.warning("⚠️ Warm state section not saved", section=name, error=str(e))
+                continue
+            if data is not None:
+                sections[name] = data
+        atomic_write_json(prepare(self.path), {"saved_at": time.time(), "sections": sections})
+        self.stats["snapshots"] += 1
+
+    def mark_ready(self, boot_started: float, lifespan_started: float):
+        """boot_started: perf_counter() at the top of main; lifespan_started: when startup began"""
+        now = time.perf_counter()
+        self.timings["boot_ms"] = round((lifespan_started - boot_started) * 1000, 1)
+        self.timings["time_to_ready_ms"] = round((now - boot_started) * 1000, 1)
+        log.info("🚀 Ready", **self.timings, restored=sorted(k for k, ok in self.restored.items() if ok))
+
+    async def run(self):
+        """Background snapshot loop; cancel to stop (the lifespan saves once more on shutdown)"""
+        while True:
+            await asyncio.sleep(WARM_STATE_SNAPSHOT_SECONDS)
+            try:
+                self.save()
+            except Exception as e:
+                self.stats["errors"] += 1
+                log.warning("⚠️ Warm state snapshot failed", error=str(e))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.timings, **self.stats, "restored": self.restored, "snapshot_age_seconds": self.snapshot_age}
+
+
+warm_state = WarmState()